@@ -0,0 +1,311 @@
+"""
+Asynchronous actor/learner training.
+
+Actor processes play games with an epsilon-greedy policy on a local NumPy copy of the model and push their transitions
+into a ring buffer in shared memory, one ring per actor. The learner (the calling process) takes transitions from the
+rings into its replay memory at a fixed replay ratio (``replay_ratio`` gradient steps per transition) and publishes its
+weights to the actors every ``copy_step`` gradient steps. The rings are small and actors wait while theirs is full, so
+the actors never get more than a ring ahead of the learner. Actors never import TensorFlow.
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai.ai_env import BlackjackEnv
+from ai.model_configs.mlp_config import MLPConfig
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+from ai.replay_buffer import experience_fields
+
+
+def transition_dtype(state_size: int, num_actions: int) -> np.dtype:
+    return np.dtype([(key, dtype, shape) for key, (dtype, shape) in experience_fields(state_size, num_actions).items()])
+
+
+class SharedTransitionRing:
+    """
+    Single producer, single consumer ring buffer of transitions in shared memory.
+
+    The producer only writes the ``written`` counter and the consumer only writes the ``read`` counter, and both are
+    updated after the records are copied, so no lock is needed.
+    """
+
+    def __init__(self, capacity: int, dtype: np.dtype, name: Optional[str] = None):
+        self.capacity = capacity
+        self.dtype = dtype
+        size = 16 + capacity * dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self._counters = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf)  # written, read
+        self._records = np.ndarray((capacity,), dtype=dtype, buffer=self.shm.buf, offset=16)
+        if name is None:
+            self._counters[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self):
+        return int(self._counters[0] - self._counters[1])
+
+    def push(self, records: np.ndarray) -> bool:
+        """Add the records if there is room for all of them, return False (and add nothing) otherwise."""
+        written, read = int(self._counters[0]), int(self._counters[1])
+        num = len(records)
+        if written + num - read > self.capacity:
+            return False
+        start = written % self.capacity
+        first = min(num, self.capacity - start)
+        self._records[start:start + first] = records[:first]
+        self._records[:num - first] = records[first:]
+        self._counters[0] = written + num
+        return True
+
+    def pop(self, max_records: Optional[int] = None) -> np.ndarray:
+        """Remove and return (a copy of) the oldest records."""
+        written, read = int(self._counters[0]), int(self._counters[1])
+        num = written - read if max_records is None else min(written - read, max_records)
+        start = read % self.capacity
+        first = min(num, self.capacity - start)
+        records = np.concatenate([self._records[start:start + first], self._records[:num - first]])
+        self._counters[1] = read + num
+        return records
+
+    def close(self) -> None:
+        # Views on the buffer have to be released before the shared memory can be closed
+        del self._counters, self._records
+        self.shm.close()
+
+
+class SharedWeights:
+    """
+    The weights of a model in shared memory, written by one process and read by many.
+
+    Readers use the version counter as a seqlock: it is odd while the weights are being written, and a copy is only
+    accepted if the version did not change while it was made.
+    """
+
+    def __init__(self, shapes: List[Tuple[int, ...]], name: Optional[str] = None):
+        self.shapes = shapes
+        self.sizes = [int(np.prod(shape)) for shape in shapes]
+        size = 8 + sum(self.sizes) * 4
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self._version = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self._weights = np.ndarray((sum(self.sizes),), dtype=np.float32, buffer=self.shm.buf, offset=8)
+        if name is None:
+            self._version[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def version(self) -> int:
+        return int(self._version[0])
+
+    def write(self, arrays: List[np.ndarray]) -> None:
+        self._version[0] += 1
+        self._weights[:] = np.concatenate([np.ravel(array) for array in arrays])
+        self._version[0] += 1
+
+    def read(self, known_version: int = 0) -> Optional[Tuple[int, List[np.ndarray]]]:
+        """Return the version and the weights if they are newer than known_version, None otherwise."""
+        version = self.version
+        if version == known_version or version % 2:
+            return None
+        flat = self._weights.copy()
+        if self.version != version:
+            return None
+        arrays, offset = [], 0
+        for shape, size in zip(self.shapes, self.sizes):
+            arrays.append(flat[offset:offset + size].reshape(shape))
+            offset += size
+        return version, arrays
+
+    def close(self) -> None:
+        del self._version, self._weights
+        self.shm.close()
+
+
+def _layer_arrays(model: NumpyMultiLayerPerceptron) -> List[np.ndarray]:
+    arrays = []
+    for kernel, bias in zip(model.kernels, model.biases):
+        arrays.extend([kernel, bias])
+    return arrays
+
+
+def _actor(actor_id: int, cfg: MLPConfig, penalty, ring_name: str, weights_name: str,
+           weight_shapes: List[Tuple[int, ...]], activations: List[str], stats_name: str, num_actors: int,
+           stop_event, seed: int) -> None:
+    ring = SharedTransitionRing(cfg.actor_queue_capacity, transition_dtype(cfg.num_states, cfg.num_actions),
+                                name=ring_name)
+    weights = SharedWeights(weight_shapes, name=weights_name)
+    stats_shm = shared_memory.SharedMemory(name=stats_name)
+    stats = np.ndarray((num_actors, 2), dtype=np.int64, buffer=stats_shm.buf)  # episodes, env steps
+    try:
+        env = BlackjackEnv(cfg.num_actions, cfg.num_states, penalty, seed=seed, record_actions=False,
+                           state_encoding=cfg.state_encoding)
+        rng = np.random.default_rng(seed)
+        batch = np.zeros(cfg.actor_push_size, dtype=ring.dtype)
+        model, version = None, 0
+        epsilon = cfg.epsilon
+        num_episodes, num_steps, num_batched = 0, 0, 0
+        state = env.reset()
+        while not stop_event.is_set():
+            update = weights.read(version)
+            if update is not None:
+                version, arrays = update
+                model = NumpyMultiLayerPerceptron(arrays[0::2], arrays[1::2], activations)
+            if model is None:
+                time.sleep(0.001)
+                continue
+            mask = env.get_current_actions_mask()
+            if rng.random() < epsilon:
+                action = int(rng.choice(np.flatnonzero(mask)))
+            else:
+                predictions = model({'state': state[None]})[0]
+                action = int(np.argmax(np.where(mask, predictions, -np.inf)))
+            next_state, reward, done, _ = env.step(action)
+            record = batch[num_batched]
+            record['s'], record['a'], record['r'], record['s2'] = state, action, reward, next_state
+            record['done'], record['m'], record['m2'] = done, mask, env.get_current_actions_mask()
+            num_batched += 1
+            num_steps += 1
+            if done:
+                num_episodes += 1
+                epsilon = max(cfg.min_epsilon, epsilon * cfg.decay)
+                state = env.reset()
+            else:
+                state = next_state
+            if num_batched == len(batch):
+                # The learner fell behind, wait until there is room again
+                while not ring.push(batch):
+                    if stop_event.is_set():
+                        return
+                    time.sleep(0.001)
+                num_batched = 0
+                stats[actor_id] = num_episodes, num_steps
+    finally:
+        del stats
+        stats_shm.close()
+        ring.close()
+        weights.close()
+
+
+def train_actor_learner(penalty, cfg: Optional[MLPConfig] = None, num_actors: Optional[int] = None,
+                        num_episodes: Optional[int] = None, report_seconds: float = 10.0,
+                        seed: int = 0, save: bool = True) -> Dict[str, float]:
+    """
+    Train with num_actors actor processes and a learner in the calling process.
+
+    :param num_episodes: stop once the learner took in the transitions of this many episodes, defaults to
+                         ``cfg.number_iterations``
+    :param save: if True, export and save the weights of the trained model like :func:`ai_trainer.main`
+    :return: the number of environment and gradient steps and their rates
+    :raises RuntimeError: if an actor process died
+    """
+    import tensorflow as tf
+    from ai.ai_trainer import DQN
+
+    if cfg is None:
+        cfg = MLPConfig()
+    num_actors = num_actors or cfg.num_actors
+    num_episodes = num_episodes or cfg.number_iterations
+    summary_writer = tf.summary.create_file_writer(cfg.log_dir)
+    train_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr,
+                    jit_compile=cfg.jit_compile)
+    target_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr,
+                     jit_compile=cfg.jit_compile)
+    numpy_model = train_net.model.to_numpy()
+    target_net.copy_weights(train_net)
+    arrays = _layer_arrays(numpy_model)
+
+    dtype = transition_dtype(cfg.num_states, cfg.num_actions)
+    rings = [SharedTransitionRing(cfg.actor_queue_capacity, dtype) for _ in range(num_actors)]
+    weights = SharedWeights([array.shape for array in arrays])
+    weights.write(arrays)
+    stats_shm = shared_memory.SharedMemory(create=True, size=num_actors * 2 * 8)
+    stats = np.ndarray((num_actors, 2), dtype=np.int64, buffer=stats_shm.buf)
+    stats[:] = 0
+    # TensorFlow does not survive a fork
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    actors = [context.Process(target=_actor, daemon=True,
+                              args=(i, cfg, penalty, rings[i].name, weights.name, weights.shapes,
+                                    numpy_model.activations, stats_shm.name, num_actors, stop_event, seed + i))
+              for i in range(num_actors)]
+    try:
+        for actor in actors:
+            actor.start()
+        start_time = report_time = time.perf_counter()
+        report_env_steps, report_train_steps = 0, 0
+        # Transitions and episodes the learner took in from the actors
+        num_transitions, learned_episodes = 0, 0
+        while True:
+            owed_steps = int((num_transitions - cfg.min_experiences) * cfg.replay_ratio) - train_net.num_train_steps
+            if learned_episodes >= num_episodes and owed_steps <= 0:
+                break
+            if num_transitions < cfg.min_experiences or owed_steps <= 0:
+                # Take in more transitions only once the learner trained on the ones it has
+                for i, actor in enumerate(actors):
+                    if not actor.is_alive():
+                        raise RuntimeError("Actor {} exited with code {}".format(i, actor.exitcode))
+                num_popped = 0
+                for ring in rings:
+                    if len(ring):
+                        records = ring.pop(cfg.actor_push_size)
+                        train_net.experience.add_batch(records)
+                        num_popped += len(records)
+                        learned_episodes += int(records['done'].sum())
+                if not num_popped:
+                    time.sleep(0.001)
+                num_transitions += num_popped
+                continue
+            train_net.train(target_net)
+            if train_net.num_train_steps % cfg.copy_step == 0:
+                target_net.copy_weights(train_net)
+                weights.write(_layer_arrays(train_net.model.to_numpy()))
+            now = time.perf_counter()
+            if now - report_time >= report_seconds:
+                env_steps = int(stats[:, 1].sum())
+                env_steps_per_sec = (env_steps - report_env_steps) / (now - report_time)
+                train_steps_per_sec = (train_net.num_train_steps - report_train_steps) / (now - report_time)
+                report_time, report_env_steps, report_train_steps = now, env_steps, train_net.num_train_steps
+                with summary_writer.as_default():
+                    tf.summary.scalar('env steps/sec', env_steps_per_sec, step=learned_episodes)
+                    tf.summary.scalar('gradient steps/sec', train_steps_per_sec, step=learned_episodes)
+                print("episodes:", learned_episodes, "env steps/sec:", round(env_steps_per_sec, 1),
+                      "gradient steps/sec:", round(train_steps_per_sec, 1))
+        seconds = time.perf_counter() - start_time
+        env_steps = int(stats[:, 1].sum())
+        result = {
+            "num_actors": num_actors,
+            "seconds": seconds,
+            "episodes": int(stats[:, 0].sum()),
+            "learned_episodes": learned_episodes,
+            "env_steps": env_steps,
+            "learned_transitions": num_transitions,
+            "gradient_steps": train_net.num_train_steps,
+            "env_steps_per_sec": env_steps / seconds,
+            "gradient_steps_per_sec": train_net.num_train_steps / seconds,
+        }
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=10)
+            if actor.is_alive():
+                actor.terminate()
+        del stats
+        for shm in [stats_shm, weights.shm] + [ring.shm for ring in rings]:
+            shm.unlink()
+        for ring in rings:
+            ring.close()
+        weights.close()
+        stats_shm.close()
+    print("env steps/sec:", round(result["env_steps_per_sec"], 1),
+          "gradient steps/sec:", round(result["gradient_steps_per_sec"], 1))
+    if save:
+        train_net.model.export_numpy(cfg.numpy_weights_path)
+        train_net.model.save_weights(cfg.save_path)
+    return result
@@ -1,14 +1,27 @@
 import logging
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import numpy as np
 from gym import Env, spaces
 
 from ai.controlled_game import ControlledGame
-from base.actions.action import Action
-from base.actions.action_service import ActionService
+from base.cards.deck_bank import DeckBank
 from base.constants import Constants
 from base.enums.game_phase import GamePhase
+from base.episode_log import EpisodeLogWriter
+from base.game_state import CARD_ENCODING, RANK_ENCODING, GameState
+from base.utils.instrumentation import timed
+
+if TYPE_CHECKING:
+    from base.players.player import Player
+
+
+def step_reward(player: 'Player', penalty) -> float:
+    """The reward of a step that ends with the given player, penalty if the player broke."""
+    if player.broken:
+        return penalty
+    score = player.score
+    return int((score**2 / (abs(score-21) + 1)))
 
 
 class BlackjackEnv(Env):
@@ -16,9 +29,29 @@ class BlackjackEnv(Env):
     An implementation of the OpenAI environment class for the Blackjack game.
     """
 
-    def __init__(self, num_actions, state_size, penalty):
+    def __init__(self, num_actions, state_size, penalty, seed: Optional[int] = None,
+                 deck_bank: Optional[DeckBank] = None, episode_log: Optional[EpisodeLogWriter] = None,
+                 record_actions: bool = True, state_encoding: str = CARD_ENCODING):
+        """
+        :param seed: seed of the random generator that shuffles the decks of this environment
+        :param deck_bank: if given, every episode is played with the next deck of this bank
+        :param episode_log: if given, every finished episode is written to this log instead of being kept in
+                            :attr:`action_episode_memory`
+        :param record_actions: if False, the actions are not kept in :attr:`action_episode_memory`, which otherwise
+                               grows with every episode
+        :param state_encoding: encoding of the observations, CARD_ENCODING or RANK_ENCODING (see
+                               :meth:`GameState.encode_ranks`), state_size must match it
+        """
         self.__version__ = "0.1.0"
         self.penalty = penalty
+        self.shuffle_seed = seed
+        self.deck_bank = deck_bank
+        self.episode_log = episode_log
+        self._record_actions = record_actions and episode_log is None
+        if state_size != GameState.state_size(state_encoding):
+            raise ValueError("The {} encoding has {} integers, got a state size of {}".format(
+                state_encoding, GameState.state_size(state_encoding), state_size))
+        self.state_encoding = state_encoding
         logging.info("Blackjack - Version {}".format(self.__version__))
 
         # Game variables
@@ -35,6 +68,7 @@ class BlackjackEnv(Env):
         self.curr_episode = -1
         self.action_episode_memory = []
 
+    @timed("env.step")
     def step(self, action_idx: int):
         """
         The agent takes a step in the environment.
@@ -65,26 +99,21 @@ class BlackjackEnv(Env):
         """
         if self.game.is_finished():
             raise RuntimeError("Episode is done, please reset the game.")
-        action = ActionService().idx_to_action(action_idx)  # type: Action
-        pre_action_score = self.game.player.score
         self.curr_step += 1
-        self._take_action(action, action_idx)
-        if self.game.player.broken:
-            reward = self.penalty
-        else:
-            score = self.game.player.score
-            reward = int((score**2 / (abs(score-21) + 1)))
+        self._take_action(action_idx)
+        reward = step_reward(self.game.player, self.penalty)
         observation = self._get_state()
-        # print(f"{pre_action_score} => {self.game.player.score} through {action} with reward {reward}")
         return observation, reward, self.game.is_finished(), {}
 
     def get_current_actions_mask(self):
         return self.game.get_current_actions_mask()
 
-    def _take_action(self, action: Action, action_idx: int):
-        self.action_episode_memory[self.curr_episode].append(action_idx)
-        self.game.play_action(action)
+    def _take_action(self, action_idx: int):
+        if self._record_actions:
+            self.action_episode_memory[self.curr_episode].append(action_idx)
+        self.game.play_action_idx(action_idx)
 
+    @timed("env.reset")
     def reset(self):
         """
         Reset the state of the environment and returns an initial observation.
@@ -94,14 +123,21 @@ class BlackjackEnv(Env):
         """
         self.curr_step = -1
         self.curr_episode += 1
-        self.action_episode_memory.append([])
+        if self._record_actions:
+            self.action_episode_memory.append([])
         if self.game is None:
-            self.game = ControlledGame()
+            self.game = ControlledGame(seed=self.shuffle_seed, deck_bank=self.deck_bank, episode_log=self.episode_log)
         self.game.reset_game(initialize=True)
         return self._get_state()
 
     def _get_state(self) -> np.array:
-        return np.array(self.game.get_state().create_numeral_representation(self.game.player), dtype=np.float32)
+        if self.state_encoding == RANK_ENCODING:
+            return GameState.encode_ranks(self.game.player, self.game.deck)
+        return GameState.encode(self.game.player)
 
     def render(self, mode='human'):
         pass
+
+    def close(self):
+        if self.episode_log is not None:
+            self.episode_log.flush()
@@ -1,4 +1,6 @@
-from collections import defaultdict
+import os
+import time
+from typing import Optional
 
 import numpy as np
 import tensorflow as tf
@@ -6,45 +8,66 @@ import tensorflow as tf
 from ai.ai_env import BlackjackEnv
 from ai.model_configs.mlp_config import MLPConfig
 from ai.multi_layer_perceptron import MultiLayerPerceptron
+from ai.replay_buffer import ReplayBuffer
+from ai.transition_dataset import TransitionDataset
 from base.actions.action_service import ActionService
+from base.episode_log import EpisodeLogWriter
+from base.utils.instrumentation import Instrumentation, timed
 
 
 class DQN:
-    def __init__(self, model_config: MLPConfig, gamma, max_experiences, min_experiences, batch_size, lr):
+    def __init__(self, model_config: MLPConfig, gamma, max_experiences, min_experiences, batch_size, lr,
+                 jit_compile: bool = False):
         self.num_actions = model_config.num_actions
         self.batch_size = batch_size
         self.optimizer = tf.optimizers.Adam(lr)
         self.gamma = gamma
         self.model = MultiLayerPerceptron(model_config)
-        self.experience = defaultdict(list)
+        self.experience = ReplayBuffer(max_experiences, model_config.num_states, model_config.num_actions,
+                                       memmap_dir=model_config.replay_memmap_dir)
         self.max_experiences = max_experiences
         self.min_experiences = min_experiences
+        self.num_train_steps = 0
+        # The whole training step is compiled into a single graph, optionally with XLA
+        self._train_step = tf.function(self._train_step_fn, jit_compile=jit_compile)
 
     def predict(self, state):
         inputs = {'state': np.atleast_2d(state)}
         return self.model(inputs)
 
-    @tf.function
-    def train(self, target_net):
-        if len(self.experience['s']) < self.min_experiences:
+    @timed("dqn.train")
+    def train(self, target_net: 'DQN'):
+        """Sample a batch from the experience replay memory and take a single gradient step."""
+        if len(self.experience) < self.min_experiences:
             return 0
-        ids = np.random.randint(low=0, high=len(self.experience['s']), size=self.batch_size)
-        states = np.asarray([self.experience['s'][i] for i in ids])
-        actions = np.asarray([self.experience['a'][i] for i in ids])
-        rewards = np.asarray([self.experience['r'][i] for i in ids])
-        states_next = np.asarray([self.experience['s2'][i] for i in ids])
-        dones = np.asarray([self.experience['done'][i] for i in ids])
-        value_next = np.max(target_net.predict(states_next), axis=1)
-        actual_values = np.where(dones, rewards, rewards+self.gamma*value_next)
+        return self.train_on_batch(target_net, self.experience.sample(self.batch_size))
+
+    def train_on_batch(self, target_net: 'DQN', batch):
+        """Take a single gradient step on a batch of experiences (a dict with the keys of the ReplayBuffer)."""
+        loss = self._train_step(target_net.model, batch['s'], batch['a'], batch['r'], batch['s2'], batch['done'],
+                                batch['m2'])
+        self.num_train_steps += 1
+        return loss
+
+    def _train_step_fn(self, target_model, states, actions, rewards, states_next, dones, masks_next):
+        # Value of the best valid action in the next state according to the target network
+        predictions_next = target_model({'state': states_next})
+        masked_predictions_next = tf.where(masks_next, predictions_next, predictions_next.dtype.min)
+        value_next = tf.where(tf.reduce_any(masks_next, axis=1),
+                              tf.math.reduce_max(masked_predictions_next, axis=1),
+                              tf.zeros_like(rewards))
+        actual_values = tf.where(dones, rewards, rewards + self.gamma * value_next)
 
         with tf.GradientTape() as tape:
             selected_action_values = tf.math.reduce_sum(
-                self.predict(states) * tf.one_hot(actions, self.num_actions), axis=1)
+                self.model({'state': states}) * tf.one_hot(actions, self.num_actions), axis=1)
             loss = tf.math.reduce_sum(tf.square(actual_values - selected_action_values))
         variables = self.model.trainable_variables
         gradients = tape.gradient(loss, variables)
         self.optimizer.apply_gradients(zip(gradients, variables))
+        return loss
 
+    @timed("dqn.get_action")
     def get_action(self, state, mask, epsilon):
         if np.random.random() < epsilon:
             valid_actions_indexes = [idx for idx, is_valid in enumerate(mask) if is_valid]
@@ -56,13 +79,11 @@ class DQN:
             predictions = proper_predictions + masked_predictions
             return np.argmax(predictions[0])
 
+    @timed("dqn.add_experience")
     def add_experience(self, exp):
-        if len(self.experience['s']) >= self.max_experiences:
-            for key in self.experience.keys():
-                self.experience[key].pop(0)
-        for key, value in exp.items():
-            self.experience[key].append(value)
+        self.experience.add(exp)
 
+    @timed("dqn.copy_weights")
     def copy_weights(self, train_net):
         variables1 = self.model.trainable_variables
         variables2 = train_net.model.trainable_variables
@@ -80,11 +101,13 @@ def play_game(env, train_net, target_net, epsilon, copy_step, print_exp_step):
         action = train_net.get_action(state, actions_mask, epsilon)
         prev_state = state
         state, reward, done, _ = env.step(action)
+        next_actions_mask = env.get_current_actions_mask()
         rewards += reward
         if done:
             env.reset()
 
-        exp = {'s': prev_state, 'a': action, 'r': reward, 'm': actions_mask, 's2': state, 'done': done}
+        exp = {'s': prev_state, 'a': action, 'r': reward, 'm': actions_mask, 's2': state, 'done': done,
+               'm2': next_actions_mask}
         train_net.add_experience(exp)
         train_net.train(target_net)
         iteration += 1
@@ -97,8 +120,9 @@ def play_game(env, train_net, target_net, epsilon, copy_step, print_exp_step):
     return rewards
 
 
-def main(penalty):
-    cfg = MLPConfig()
+def main(penalty, cfg: Optional[MLPConfig] = None):
+    if cfg is None:
+        cfg = MLPConfig()
     # ============ CONFIG PARAMETERS =============== #
     gamma = cfg.gamma
     copy_step = cfg.copy_step
@@ -113,25 +137,105 @@ def main(penalty):
     decay = cfg.decay
     min_epsilon = cfg.min_epsilon
     avg_rewards = cfg.avg_rewards
+    jit_compile = cfg.jit_compile
     # =============================================== #
-    env = BlackjackEnv(cfg.num_actions, cfg.num_states, penalty)
-    summary_writer = tf.summary.create_file_writer(cfg.log_dir)
-    train_net = DQN(cfg, gamma, max_experiences, min_experiences, batch_size, lr)
-    target_net = DQN(cfg, gamma, max_experiences, min_experiences, batch_size, lr)
+    instrumentation = Instrumentation()
+    if cfg.instrument:
+        instrumentation.enable()
+        instrumentation.reset()
+    log_dir = cfg.log_dir
+    episode_log = None
+    if cfg.log_episodes:
+        episode_log = EpisodeLogWriter(os.path.join(log_dir, "episodes.bjlog"), policy="dqn", penalty=penalty)
+    env = BlackjackEnv(cfg.num_actions, cfg.num_states, penalty, episode_log=episode_log,
+                       state_encoding=cfg.state_encoding)
+    summary_writer = tf.summary.create_file_writer(log_dir)
+    train_net = DQN(cfg, gamma, max_experiences, min_experiences, batch_size, lr, jit_compile=jit_compile)
+    target_net = DQN(cfg, gamma, max_experiences, min_experiences, batch_size, lr, jit_compile=jit_compile)
+    start_time = time.perf_counter()
+    report_time, report_train_steps, report_env_steps = start_time, 0, 0
+    env_steps = instrumentation.get_timer("env.step")
     for n in range(number_iterations):
         epsilon = max(min_epsilon, epsilon * decay)
         total_reward = play_game(env, train_net, target_net, epsilon, copy_step, print_exp_step)
+        instrumentation.increment("episodes")
         total_rewards[n] = total_reward
         avg_rewards = total_rewards[max(0, n - 100):(n + 1)].mean()
         with summary_writer.as_default():
             tf.summary.scalar('episode reward', total_reward, step=n)
             tf.summary.scalar('running avg reward(100)', avg_rewards, step=n)
         if n % 100 == 0:
-            print("episode:", n, "episode reward:", total_reward, "eps:", epsilon, "avg reward (last 100):", avg_rewards)
+            now = time.perf_counter()
+            train_steps_per_sec = (train_net.num_train_steps - report_train_steps) / (now - report_time)
+            env_steps_per_sec = (env_steps.count - report_env_steps) / (now - report_time)
+            report_time, report_train_steps, report_env_steps = now, train_net.num_train_steps, env_steps.count
+            with summary_writer.as_default():
+                tf.summary.scalar('gradient steps/sec', train_steps_per_sec, step=n)
+                if instrumentation.enabled:
+                    tf.summary.scalar('env steps/sec', env_steps_per_sec, step=n)
+            if instrumentation.enabled:
+                instrumentation.write_summary(summary_writer, step=n)
+            print("episode:", n, "episode reward:", total_reward, "eps:", epsilon, "avg reward (last 100):", avg_rewards,
+                  "gradient steps/sec:", round(train_steps_per_sec, 1))
     print("avg reward for last 100 episodes:", avg_rewards)
+    train_seconds = time.perf_counter() - start_time
+    print("gradient steps/sec:", round(train_net.num_train_steps / train_seconds, 1))
+    if instrumentation.enabled:
+        report_path = os.path.join(log_dir, "instrumentation.json")
+        instrumentation.write_json(report_path, extra={
+            "penalty": penalty, "episodes": number_iterations,
+            "env_steps_per_sec": env_steps.count / train_seconds,
+            "gradient_steps_per_sec": train_net.num_train_steps / train_seconds})
+        print("Instrumentation report written to", report_path)
+        instrumentation.disable()
     env.close()
+    if episode_log is not None:
+        episode_log.close()
+    # Exporting first builds the model if no training step has been taken yet, so both files hold the same weights
+    train_net.model.export_numpy(cfg.numpy_weights_path)
     train_net.model.save_weights(cfg.save_path)
 
 
+def train_offline(dataset: TransitionDataset, penalty=None, cfg: Optional[MLPConfig] = None,
+                  num_steps: Optional[int] = None):
+    """
+    Train on the transitions of an offline dataset instead of on games that are played inline.
+
+    :param penalty: the reward for breaking, defaults to the penalty the dataset was generated with
+    :param num_steps: number of gradient steps, defaults to one pass over the dataset
+    """
+    if cfg is None:
+        cfg = MLPConfig()
+    if dataset.description["state_size"] != cfg.num_states:
+        raise ValueError("The dataset has states of {} integers, the {} encoding of the config has {}".format(
+            dataset.description["state_size"], cfg.state_encoding, cfg.num_states))
+    if num_steps is None:
+        num_steps = -(-len(dataset) // cfg.batch_size)
+    log_dir = cfg.log_dir
+    summary_writer = tf.summary.create_file_writer(log_dir)
+    train_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr,
+                    jit_compile=cfg.jit_compile)
+    target_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr,
+                     jit_compile=cfg.jit_compile)
+    start_time = time.perf_counter()
+    report_time = start_time
+    for step, batch in enumerate(dataset.as_tf_dataset(cfg.batch_size, penalty=penalty).take(num_steps)):
+        loss = train_net.train_on_batch(target_net, batch)
+        if step % cfg.copy_step == 0:
+            target_net.copy_weights(train_net)
+        if step % 1000 == 0:
+            now = time.perf_counter()
+            train_steps_per_sec = (1000 if step else 1) / (now - report_time)
+            report_time = now
+            with summary_writer.as_default():
+                tf.summary.scalar('loss', loss, step=step)
+                tf.summary.scalar('gradient steps/sec', train_steps_per_sec, step=step)
+            print("step:", step, "loss:", float(loss), "gradient steps/sec:", round(train_steps_per_sec, 1))
+    print("gradient steps/sec:", round(train_net.num_train_steps / (time.perf_counter() - start_time), 1))
+    train_net.model.export_numpy(cfg.numpy_weights_path)
+    train_net.model.save_weights(cfg.save_path)
+    return train_net
+
+
 if __name__ == '__main__':
     main()
@@ -1,15 +1,20 @@
-from typing import List
+import random
+from typing import Optional
+
+import numpy as np
 
 from ai.controlled_player import ControlledPlayer
 from base.actions.action import Action
-from base.actions.action_service import ActionService
+from base.cards.deck_bank import DeckBank
+from base.episode_log import EpisodeLogWriter
 from base.game import Game
 
 
 class ControlledGame(Game):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed: Optional[int] = None, rng: Optional[random.Random] = None,
+                 deck_bank: Optional[DeckBank] = None, episode_log: Optional[EpisodeLogWriter] = None):
+        super().__init__(seed=seed, rng=rng, deck_bank=deck_bank, episode_log=episode_log)
 
     def play(self, verbose: bool = False):
         raise NotImplemented("The training game can only be played through the play_action() function.")
@@ -17,11 +22,17 @@ class ControlledGame(Game):
     def play_action(self, action: Action):
         if not self.initialized:
             raise Exception("Game not initialized")
-        self.player.play_action(game_state=self.get_state(), action=action)
+        self.phase = self.player.play_action(game_state=self.get_state(), action=action)
+        if self.episode_log is not None:
+            self._log_action(self._action_service.action_to_idx(action))
+
+    def get_current_actions_mask(self) -> np.ndarray:
+        """Return a (shared, read-only) boolean array representing the current valid actions."""
+        return self._action_service.get_mask(self.player, self.phase)
 
-    def get_current_actions_mask(self) -> List[bool]:
-        """Return a boolean mask representing the current valid actions."""
-        return ActionService().get_valid_actions_mask(self.player, self.get_state())
+    def get_current_actions_bitmask(self) -> int:
+        """Return the current valid actions as an integer, bit i is set if the action with index i is valid."""
+        return self._action_service.get_bitmask(self.player, self.phase)
 
     def _initialize_players(self) -> None:
         self.player = ControlledPlayer()
@@ -1,4 +1,5 @@
 from base.actions.action import Action
+from base.enums.game_phase import GamePhase
 from base.game_state import GameState
 from base.players.player import Player
 
@@ -12,5 +13,7 @@ class ControlledPlayer(Player):
     def _choose_action(self, game_state: 'GameState', verbose: bool = False) -> 'Action':
         raise NotImplemented("Controlled players need action determination from the outside.")
 
-    def play_action(self, game_state: 'GameState', action: Action):
-        action.execute(self, game_state.deck, game_state.phase)
+    def play_action(self, game_state: 'GameState', action: Action) -> GamePhase:
+        new_phase = action.execute(self, game_state.deck, game_state.phase)
+        self.last_action = action
+        return new_phase
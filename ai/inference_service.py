@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from ai.model_registry import ModelRegistry, registry_key
+from base.game_state import GameState
+
+if TYPE_CHECKING:
+    from ai.model_configs.base_model_config import BaseModelConfig
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _InferenceRequest:
+    __slots__ = ('state', 'mask', 'future', 'submit_time')
+
+    def __init__(self, state: np.ndarray, mask: np.ndarray):
+        self.state = state
+        self.mask = mask
+        self.future = Future()
+        self.submit_time = time.perf_counter()
+
+
+class InferenceService:
+    """
+    In-process service that coalesces action requests of many games into batched forward passes.
+
+    Requests are queued by :meth:`submit` and picked up by a worker thread, which runs a single forward pass as soon as
+    either :attr:`max_batch_size` requests are waiting or the oldest waiting request is :attr:`max_wait_ms` old.
+    The model always sees a full (max_batch_size, state_size) batch, so it is traced only once.
+    """
+
+    _services = {}  # type: Dict[Tuple[str, str, str], InferenceService]
+    _services_lock = threading.Lock()
+
+    def __init__(self, model, num_actions: int, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 metrics_window: int = 100000, state_size: int = GameState.SIZE):
+        self.model = model
+        self.num_actions = num_actions
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._states = np.zeros((max_batch_size, state_size), dtype=np.float32)
+        self._masks = np.zeros((max_batch_size, num_actions), dtype=bool)
+        self._latencies = deque(maxlen=metrics_window)
+        self._num_requests = 0
+        self._num_batches = 0
+        self._start_time = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, name="InferenceService", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def for_config(cls, config: 'BaseModelConfig') -> 'InferenceService':
+        """
+        Return the service shared by all players that use the given model config, creating it if necessary.
+
+        The service runs the shared handle of the :class:`ModelRegistry`, so it picks up reloaded checkpoints.
+        """
+        handle = ModelRegistry().get(config)
+        key = registry_key(config)
+        with cls._services_lock:
+            if key not in cls._services:
+                cls._services[key] = cls(handle, config.num_actions, max_batch_size=config.inference_max_batch_size,
+                                         max_wait_ms=config.inference_max_wait_ms, state_size=config.num_states)
+            return cls._services[key]
+
+    def submit(self, state: np.ndarray, mask: Sequence[bool]) -> Future:
+        """Queue a decision request and return a future that resolves to the index of the chosen action."""
+        request = _InferenceRequest(np.array(state, dtype=np.float32), np.array(mask, dtype=bool))
+        self._queue.put(request)
+        return request.future
+
+    def choose_action(self, state: np.ndarray, mask: Sequence[bool]) -> int:
+        """Return the index of the best valid action for the given state, blocking until it has been computed."""
+        return self.submit(state, mask).result()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return latency percentiles (in milliseconds), throughput and batching statistics."""
+        latencies = np.array(self._latencies) * 1000
+        elapsed = time.perf_counter() - self._start_time
+        return {
+            'num_requests': self._num_requests,
+            'num_batches': self._num_batches,
+            'mean_batch_size': self._num_requests / max(1, self._num_batches),
+            'requests_per_sec': self._num_requests / elapsed,
+            'p50_latency_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'p99_latency_ms': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        }
+
+    def reset_metrics(self) -> None:
+        self._latencies.clear()
+        self._num_requests = 0
+        self._num_batches = 0
+        self._start_time = time.perf_counter()
+
+    def stop(self) -> None:
+        """Stop the worker thread after the queued requests have been handled."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = request.submit_time + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            try:
+                self._process(batch)
+            except Exception as e:
+                LOGGER.exception("Batched inference failed")
+                for request in batch:
+                    request.future.set_exception(e)
+
+    def _process(self, batch):
+        num_requests = len(batch)
+        for i, request in enumerate(batch):
+            self._states[i] = request.state
+            self._masks[i] = request.mask
+        predictions = np.asarray(self.model({'state': self._states}))[:num_requests]
+        action_indexes = np.where(self._masks[:num_requests], predictions, -np.inf).argmax(axis=1)
+        done_time = time.perf_counter()
+        for request, action_idx in zip(batch, action_indexes):
+            self._latencies.append(done_time - request.submit_time)
+            request.future.set_result(int(action_idx))
+        self._num_requests += num_requests
+        self._num_batches += 1
@@ -1,6 +1,8 @@
 from abc import abstractmethod, ABCMeta
+from typing import TYPE_CHECKING
 
-import tensorflow as tf
+if TYPE_CHECKING:
+    import tensorflow as tf
 
 
 class BaseModelConfig(metaclass=ABCMeta):
@@ -17,7 +19,7 @@ class BaseModelConfig(metaclass=ABCMeta):
     def save_path(self) -> str:
         raise NotImplementedError
 
-    def load_model(self) -> tf.keras.Model:
+    def load_model(self) -> 'tf.keras.Model':
         model = self.model_class(self)
         model.load_weights(self.save_path)
         return model
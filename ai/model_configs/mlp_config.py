@@ -1,48 +1,89 @@
 import datetime
 import os
+from typing import Optional
 
 from ai.model_configs.base_model_config import BaseModelConfig
-from ai.multi_layer_perceptron import MultiLayerPerceptron
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
 from base.actions.action_service import ActionService
-from base.game_state import GameState
+from base.game_state import CARD_ENCODING, GameState
 from config import Config
 
 
 class MLPConfig(BaseModelConfig):
 
-    def __init__(self):
+    def __init__(self, run_name: Optional[str] = None):
+        # Name of the training run, runs with a name get their own save path and log dir
+        self.run_name = run_name
         # Model params
         self.hidden_units = [32, 32]
         # Environment params
-        self.num_states = GameState.SIZE
+        self.state_encoding = CARD_ENCODING  # CARD_ENCODING or RANK_ENCODING, see base.game_state
         self.num_actions = ActionService().num_actions
         # Training params
         self.gamma = 0.99
         self.copy_step = 128
         self.print_exp_step = 100000000
         self.max_experiences = 1000
+        self.replay_memmap_dir = None  # If set, the replay memory is memory-mapped to files in this directory
         self.min_experiences = 64
         self.batch_size = 64
         self.lr = 1e-2
+        self.jit_compile = False  # Compile the training step with XLA
+        self.instrument = False  # Time the hot paths of the training loop, see base.utils.instrumentation
+        self.log_episodes = False  # Write every training episode to <log_dir>/episodes.bjlog, see base.episode_log
         self.number_iterations = 10000
         self.epsilon = 0.999
         self.decay = 0.99995  # This decay makes it so that after 1000 iterations epsilon is 50%
         self.min_epsilon = 0.1
         self.avg_rewards = 0
+        # Actor/learner params, see ai.actor_learner
+        self.num_actors = 4
+        self.actor_push_size = 64  # Transitions an actor collects before it pushes them to the learner
+        # Transitions that fit in the queue of every actor, actors wait when it is full so they stay close to the learner
+        self.actor_queue_capacity = 256
+        self.replay_ratio = 1.0  # Gradient steps per transition the learner takes in, ai_trainer.main takes one
+        # Inference params
+        self.use_inference_service = False  # Batch the decisions of all AI players in a shared InferenceService
+        self.inference_max_batch_size = 64
+        self.inference_max_wait_ms = 2.0
+        self.inference_backend = "tensorflow"  # "tensorflow" or "numpy", the latter does not need TensorFlow
+
+    @property
+    def num_states(self) -> int:
+        return GameState.state_size(self.state_encoding)
 
     @property
     def model_class(self):
+        # Imported here so the numpy inference backend works without TensorFlow installed
+        from ai.multi_layer_perceptron import MultiLayerPerceptron
         return MultiLayerPerceptron
 
+    def load_model(self):
+        if self.inference_backend == "numpy":
+            return NumpyMultiLayerPerceptron.load(self.numpy_weights_path)
+        return super().load_model()
+
     @property
     def log_dir(self) -> str:
         current_time = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        if self.run_name is not None:
+            return os.path.join(Config().project_root, 'logs', self.name(), self.run_name, current_time)
         return os.path.join(Config().project_root, 'logs', self.name(), current_time)
 
     @property
     def save_path(self) -> str:
+        if self.run_name is not None:
+            return os.path.join(Config().project_root, "ai", "models", self.name(), self.run_name, self.name())
         return os.path.join(Config().project_root, "ai", "models", self.name())
 
+    @property
+    def numpy_weights_path(self) -> str:
+        """Path of the weights exported for the numpy inference backend."""
+        return self.save_path + ".npz"
+
     def name(self):
+        # Models of different state encodings have different input sizes, so they are saved apart
+        if self.state_encoding != CARD_ENCODING:
+            return "MLPConfig_" + self.state_encoding
         return "MLPConfig"
 
@@ -0,0 +1,138 @@
+"""
+Process wide registry of loaded models.
+
+Every model is loaded once per process and shared by all its users through a :class:`ModelHandle`. A handle watches
+the checkpoint file it was loaded from and swaps in the new weights when the file changes, e.g. when a training run with
+the same config finishes, so long running processes (the API server, evaluators, penalty sweeps) pick up new checkpoints
+without restarting.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+from base.utils.singleton import Singleton
+
+if TYPE_CHECKING:
+    from ai.model_configs.base_model_config import BaseModelConfig
+
+LOGGER = logging.getLogger(__name__)
+
+
+def checkpoint_path(config: 'BaseModelConfig') -> str:
+    """Return the file that changes when the checkpoint of a config is rewritten."""
+    if getattr(config, "inference_backend", None) == "numpy":
+        return config.numpy_weights_path
+    # TensorFlow checkpoints are written as <save_path>.index and data shards, the index is rewritten on every save
+    return config.save_path + ".index"
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelHandle:
+    """
+    Shared, thread-safe reference to the current version of a model.
+
+    Calls are forwarded to the current model. A reload loads the new model completely before it replaces the old one
+    with a single assignment, so a concurrent call runs either on the old or on the new weights, never on a mix.
+    """
+
+    def __init__(self, config: 'BaseModelConfig'):
+        self.config = config
+        self.path = checkpoint_path(config)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._file_version = _file_version(self.path)
+        self._model = config.load_model()
+
+    @property
+    def model(self):
+        return self._model
+
+    def __call__(self, inputs, *args, **kwargs):
+        return self._model(inputs, *args, **kwargs)
+
+    def predict(self, inputs, **kwargs):
+        return self._model.predict(inputs, **kwargs)
+
+    def reload_if_changed(self) -> bool:
+        """Load the checkpoint if it changed since it was last loaded, return True if new weights were swapped in."""
+        file_version = _file_version(self.path)
+        if file_version is None or file_version == self._file_version:
+            return False
+        with self._lock:
+            if file_version == self._file_version:
+                # Another thread reloaded it in the meantime
+                return False
+            try:
+                model = self.config.load_model()
+            except Exception:
+                # The checkpoint may still be being written, the next check tries again
+                LOGGER.warning("Could not reload %s, keeping the current weights", self.path, exc_info=True)
+                return False
+            self._model = model
+            self._file_version = file_version
+            self.version += 1
+        LOGGER.info("Reloaded %s (version %d)", self.path, self.version)
+        return True
+
+
+def registry_key(config: 'BaseModelConfig') -> Tuple[str, str, str]:
+    return config.name(), config.save_path, getattr(config, "inference_backend", "tensorflow")
+
+
+class ModelRegistry(metaclass=Singleton):
+    """Registry of the model handles of a process, keyed by config name, save path and inference backend."""
+
+    def __init__(self):
+        self._handles = {}  # type: Dict[Tuple[str, str, str], ModelHandle]
+        self._lock = threading.Lock()
+        self._watcher = None  # type: Optional[threading.Thread]
+        self._stop_watching = threading.Event()
+
+    def get(self, config: 'BaseModelConfig') -> ModelHandle:
+        """Return the handle of the model of the given config, loading the model if it was not loaded before."""
+        key = registry_key(config)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = ModelHandle(config)
+                return handle
+        # Checking the file is a single stat call, so handing out a handle always gives the latest checkpoint
+        handle.reload_if_changed()
+        return handle
+
+    def reload_changed(self) -> int:
+        """Reload every model whose checkpoint changed, return the number of reloaded models."""
+        with self._lock:
+            handles = list(self._handles.values())
+        return sum(handle.reload_if_changed() for handle in handles)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._handles.clear()
+
+    def start_watching(self, interval: float = 5.0) -> None:
+        """Check all checkpoints for changes every interval seconds in a background thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="ModelRegistryWatcher",
+                                         daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_watching.wait(interval):
+            self.reload_changed()
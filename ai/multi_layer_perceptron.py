@@ -2,6 +2,8 @@ from typing import Dict, Any, TYPE_CHECKING
 
 import tensorflow as tf
 
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+
 if TYPE_CHECKING:
     from ai.model_configs.mlp_config import MLPConfig
 
@@ -10,6 +12,7 @@ class MultiLayerPerceptron(tf.keras.Model):
 
     def __init__(self, config: 'MLPConfig'):
         super(MultiLayerPerceptron, self).__init__()
+        self.num_states = config.num_states
         self.input_layer = tf.keras.layers.InputLayer(input_shape=(config.num_states,))
         self.hidden_layers = []
         for i in config.hidden_units:
@@ -25,3 +28,17 @@ class MultiLayerPerceptron(tf.keras.Model):
             z = layer(z)
         output = self.output_layer(z)
         return output
+
+    def to_numpy(self) -> NumpyMultiLayerPerceptron:
+        """Return a pure NumPy copy of this model."""
+        if not self.output_layer.built:
+            # Layers (and weights restored from a checkpoint) are only created on the first call
+            self({'state': tf.zeros((1, self.num_states))})
+        layers = self.hidden_layers + [self.output_layer]
+        return NumpyMultiLayerPerceptron(kernels=[layer.kernel.numpy() for layer in layers],
+                                         biases=[layer.bias.numpy() for layer in layers],
+                                         activations=[layer.get_config()['activation'] for layer in layers])
+
+    def export_numpy(self, path: str) -> None:
+        """Export the weights of this model to a flat .npz file for the numpy inference backend."""
+        self.to_numpy().save(path)
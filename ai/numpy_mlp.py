@@ -0,0 +1,62 @@
+import os
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+#: the activations a NumpyMultiLayerPerceptron supports, by Keras name
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'linear': lambda z: z,
+}  # type: Dict[str, Callable[[np.ndarray], np.ndarray]]
+
+
+class NumpyMultiLayerPerceptron:
+    """
+    Pure NumPy forward pass of a trained :class:`MultiLayerPerceptron`.
+
+    The weights are exported by :meth:`MultiLayerPerceptron.export_numpy` into a flat .npz file, so models can be served
+    without TensorFlow being installed.
+    """
+
+    def __init__(self, kernels: List[np.ndarray], biases: List[np.ndarray], activations: List[str]):
+        if not len(kernels) == len(biases) == len(activations):
+            raise ValueError("Expected a kernel, bias and activation for every layer")
+        for activation in activations:
+            if activation not in ACTIVATIONS:
+                raise ValueError("Unsupported activation '{}'".format(activation))
+        self.kernels = [np.asarray(kernel, dtype=np.float32) for kernel in kernels]
+        self.biases = [np.asarray(bias, dtype=np.float32) for bias in biases]
+        self.activations = list(activations)
+        self._activation_fns = [ACTIVATIONS[activation] for activation in activations]
+
+    def __call__(self, inputs: Dict[str, Any]) -> np.ndarray:
+        z = np.asarray(inputs['state'], dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self._activation_fns):
+            z = activation(z @ kernel + bias)
+        return z
+
+    def predict(self, inputs: Dict[str, Any], **kwargs) -> np.ndarray:
+        """Same as calling the model, accepts (and ignores) the keyword arguments of Keras' predict."""
+        return self(inputs)
+
+    def save(self, path: str) -> None:
+        """Save the weights to a .npz file, the file is replaced atomically so readers never see a partial file."""
+        if not path.endswith('.npz'):
+            path += '.npz'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {'activations': np.array(self.activations)}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays['kernel_{}'.format(i)] = kernel
+            arrays['bias_{}'.format(i)] = bias
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyMultiLayerPerceptron':
+        with np.load(path) as data:
+            activations = [str(activation) for activation in data['activations']]
+            kernels = [data['kernel_{}'.format(i)] for i in range(len(activations))]
+            biases = [data['bias_{}'.format(i)] for i in range(len(activations))]
+        return cls(kernels, biases, activations)
@@ -0,0 +1,200 @@
+"""
+Exact solver for the single player game.
+
+The player draws from a shuffled 52 card deck until they stop, reach 21 or exceed 21. Because the deck only loses the
+cards in the player's hand, a decision state is fully described by the number of cards of every rank in the hand.
+The solver computes the optimal stop/draw decision for every reachable state by memoized expectimax over the next card.
+"""
+import argparse
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from base.actions.action_service import ActionService
+from base.actions.request_card_action import RequestCardAction
+from base.actions.stop_action import StopAction
+from base.constants import Constants
+from base.utils.rank_counts import NUM_RANKS, NUM_SUITS
+
+#: the reward models the solver supports
+ENV_REWARD = "env"  # The per-step reward of BlackjackEnv.step
+CONSTANTS_REWARD = "constants"  # The final score mapped through Constants.rewards
+
+NUM_CARDS_PER_RANK = NUM_SUITS
+NUM_DECK_CARDS = NUM_RANKS * NUM_CARDS_PER_RANK
+
+#: the weight of every rank in the key of a hand, a key is the hand's rank counts written in base 5
+RANK_KEY_WEIGHTS = [(NUM_CARDS_PER_RANK + 1) ** i for i in range(NUM_RANKS)]
+
+
+def hand_key(rank_counts) -> int:
+    """Return the integer key of a hand given the number of cards of every rank (ace first)."""
+    return sum(count * weight for count, weight in zip(rank_counts, RANK_KEY_WEIGHTS))
+
+
+def env_step_reward(score: int) -> int:
+    """The reward BlackjackEnv.step gives for a step that does not break the player."""
+    return int((score ** 2 / (abs(score - 21) + 1)))
+
+
+class OptimalPolicy:
+    """Lookup table with the optimal action and its expected value for every reachable decision state."""
+
+    def __init__(self, keys: np.ndarray, actions: np.ndarray, values: np.ndarray, reward_mode: str, penalty: float,
+                 gamma: float):
+        self.keys = keys
+        self.actions = actions
+        self.values = values
+        self.reward_mode = reward_mode
+        self.penalty = penalty
+        self.gamma = gamma
+        self._key_to_action = dict(zip(keys.tolist(), actions.tolist()))  # type: Dict[int, int]
+
+    @property
+    def expected_value(self) -> float:
+        """The expected return of a new game when playing optimally."""
+        return float(self.values[np.searchsorted(self.keys, 0)])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def action_idx(self, key: int) -> int:
+        """Return the index of the optimal action for the hand with the given key."""
+        return self._key_to_action[key]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, keys=self.keys, actions=self.actions, values=self.values,
+                            reward_mode=self.reward_mode, penalty=self.penalty, gamma=self.gamma)
+
+    @classmethod
+    def load(cls, path: str) -> 'OptimalPolicy':
+        with np.load(path) as data:
+            return cls(data['keys'], data['actions'], data['values'], str(data['reward_mode']),
+                       float(data['penalty']), float(data['gamma']))
+
+
+class OptimalSolver:
+    """
+    Memoized expectimax over (hand rank counts, score).
+
+    :param reward_mode: :data:`ENV_REWARD` to use the per-step reward of :class:`BlackjackEnv` (where ``penalty`` is
+                        the reward for breaking), or :data:`CONSTANTS_REWARD` to only reward the final score through
+                        :attr:`Constants.rewards` (where breaking is worth ``penalty``)
+    :param penalty: the reward for exceeding 21
+    :param gamma: discount factor applied to the value of the next decision state
+    """
+
+    def __init__(self, reward_mode: str = ENV_REWARD, penalty: float = 0, gamma: float = 1.0):
+        if reward_mode not in (ENV_REWARD, CONSTANTS_REWARD):
+            raise ValueError("Unknown reward mode '{}'".format(reward_mode))
+        self.reward_mode = reward_mode
+        self.penalty = penalty
+        self.gamma = gamma
+        self.request_card_idx = ActionService().action_to_idx(RequestCardAction())
+        self.stop_idx = ActionService().action_to_idx(StopAction())
+        self._table = {}  # type: Dict[int, Tuple[int, float]]
+        self._decide = None  # type: Optional[Callable[[Tuple[int, ...], int], int]]
+
+    def solve(self) -> OptimalPolicy:
+        """Compute the optimal action and its expected value for every reachable decision state."""
+        self._solve()
+        keys = np.array(sorted(self._table), dtype=np.uint64)
+        actions = np.array([self._table[k][0] for k in keys.tolist()], dtype=np.uint8)
+        values = np.array([self._table[k][1] for k in keys.tolist()], dtype=np.float64)
+        return OptimalPolicy(keys, actions, values, self.reward_mode, self.penalty, self.gamma)
+
+    def evaluate(self, decide: Callable[[Tuple[int, ...], int], int]) -> float:
+        """
+        Return the exact expected return of a new game under a deterministic policy.
+
+        :param decide: function that returns an action index given the hand's rank counts (ace first) and its score,
+                       e.g. a wrapper around a trained model, to compare it against the optimal expected value
+        """
+        return self._solve(decide)
+
+    def stop_reward(self, score: int) -> float:
+        """The reward for stopping with the given score."""
+        if self.reward_mode == ENV_REWARD:
+            return env_step_reward(score)
+        return Constants.rewards.get(score, 0)
+
+    def draw_reward(self, score: int) -> float:
+        """The reward for drawing a card that results in the given (non-breaking) score."""
+        if self.reward_mode == ENV_REWARD:
+            return env_step_reward(score)
+        # Reaching 21 ends the game, any other draw is only rewarded when the player stops
+        return Constants.rewards.get(score, 0) if score == 21 else 0
+
+    def _solve(self, decide: Optional[Callable[[Tuple[int, ...], int], int]] = None) -> float:
+        self._table = {}
+        self._decide = decide
+        try:
+            return self._value([0] * NUM_RANKS, 0, 0, 0)
+        finally:
+            self._decide = None
+
+    def _value(self, rank_counts, key: int, score: int, num_cards: int) -> float:
+        if key in self._table:
+            return self._table[key][1]
+        stop_value = self.stop_reward(score)
+        if self._decide is not None and self._decide(tuple(rank_counts), score) != self.request_card_idx:
+            self._table[key] = (self.stop_idx, stop_value)
+            return stop_value
+        draw_value = 0.0
+        num_left = NUM_DECK_CARDS - num_cards
+        for rank_index in range(NUM_RANKS):
+            left = NUM_CARDS_PER_RANK - rank_counts[rank_index]
+            if not left:
+                continue
+            new_score = score + rank_index + 1
+            if new_score > 21:
+                value = self.penalty
+            elif new_score == 21:
+                value = self.draw_reward(new_score)
+            else:
+                rank_counts[rank_index] += 1
+                next_value = self._value(rank_counts, key + RANK_KEY_WEIGHTS[rank_index], new_score, num_cards + 1)
+                rank_counts[rank_index] -= 1
+                value = self.draw_reward(new_score) + self.gamma * next_value
+            draw_value += left / num_left * value
+        if self._decide is not None or draw_value > stop_value:
+            self._table[key] = (self.request_card_idx, draw_value)
+        else:
+            self._table[key] = (self.stop_idx, stop_value)
+        return self._table[key][1]
+
+
+#: the policies solved by default_policy(), by rewards table
+_default_policies = {}  # type: Dict[Tuple[Tuple[int, float], ...], OptimalPolicy]
+
+
+def default_policy() -> OptimalPolicy:
+    """
+    Return the policy that maximizes the expected :attr:`Constants.rewards`.
+
+    The policy is solved once per process (and per rewards table) and shared, it must not be modified.
+    """
+    rewards = tuple(sorted(Constants.rewards.items()))
+    if rewards not in _default_policies:
+        _default_policies[rewards] = OptimalSolver(CONSTANTS_REWARD).solve()
+    return _default_policies[rewards]
+
+
+def main(args: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Solve the game exactly and store the optimal policy.")
+    parser.add_argument("--reward-mode", choices=[ENV_REWARD, CONSTANTS_REWARD], default=ENV_REWARD)
+    parser.add_argument("--penalty", type=float, default=0)
+    parser.add_argument("--gamma", type=float, default=1.0)
+    parser.add_argument("--output", default=None, help="path of the .npz file to store the lookup table in")
+    parsed = parser.parse_args(args)
+    policy = OptimalSolver(parsed.reward_mode, parsed.penalty, parsed.gamma).solve()
+    print("States: {}".format(len(policy)))
+    print("Expected value: {:.4f}".format(policy.expected_value))
+    if parsed.output is not None:
+        policy.save(parsed.output)
+
+
+if __name__ == '__main__':
+    main()
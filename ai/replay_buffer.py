@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+def experience_fields(state_size: int, num_actions: int) -> Dict[str, Tuple[type, Tuple[int, ...]]]:
+    """The dtype and per-experience shape of every field of an experience."""
+    return {
+        's': (np.float32, (state_size,)),
+        'a': (np.int64, ()),
+        'r': (np.float32, ()),
+        's2': (np.float32, (state_size,)),
+        'done': (np.bool_, ()),
+        'm': (np.bool_, (num_actions,)),
+        'm2': (np.bool_, (num_actions,)),
+    }
+
+
+class ReplayBuffer:
+    """
+    Fixed-size experience replay memory backed by preallocated typed arrays.
+
+    Every experience holds the state (s), action (a), reward (r), next state (s2), done flag and the valid-action masks
+    of the state (m) and of the next state (m2).
+
+    Experiences are written into a ring buffer, so adding an experience is O(1) and overwrites the oldest one once
+    the buffer is full. Batches are sampled with a single fancy-index per field.
+    If a directory is given, the arrays are memory-mapped files in a new subdirectory of that directory, which allows
+    buffers that are much larger than the available RAM. Every buffer has its own subdirectory, so buffers that share a
+    directory (e.g. of concurrent training runs) never overwrite each other, and it is removed with the buffer.
+    """
+
+    def __init__(self, capacity: int, state_size: int, num_actions: int, memmap_dir: Optional[str] = None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.num_actions = num_actions
+        self.memmap_dir = memmap_dir
+        self.memmap_path = None  # type: Optional[str]
+        self._fields = experience_fields(state_size, num_actions)
+        self._arrays = None  # type: Optional[Dict[str, np.ndarray]]
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Return all stored values of the given field (not in insertion order once the buffer wrapped around)."""
+        if self._arrays is None:
+            return np.empty((0,) + self._fields[key][1], dtype=self._fields[key][0])
+        return self._arrays[key][:self._size]
+
+    def add(self, exp: Dict[str, np.ndarray]) -> None:
+        """Add an experience, a dict with a value for each of the keys 's', 'a', 'r', 's2', 'done', 'm' and 'm2'."""
+        if self._arrays is None:
+            # Allocate on first use, so buffers that are never filled (e.g. of a target network) cost nothing
+            self._arrays = self._allocate()
+        for key, array in self._arrays.items():
+            array[self._next] = exp[key]
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def add_batch(self, batch: Dict[str, np.ndarray]) -> None:
+        """Add a batch of experiences, a dict with an array of values for each key (or a record array)."""
+        num = len(batch['a'])
+        if num > self.capacity:
+            batch = {key: batch[key][-self.capacity:] for key in self._fields}
+            num = self.capacity
+        if self._arrays is None:
+            self._arrays = self._allocate()
+        # Write in at most two slices, the second one wraps around to the start of the buffer
+        first = min(num, self.capacity - self._next)
+        for key, array in self._arrays.items():
+            values = batch[key]
+            array[self._next:self._next + first] = values[:first]
+            array[:num - first] = values[first:num]
+        self._next = (self._next + num) % self.capacity
+        self._size = min(self._size + num, self.capacity)
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """Return a batch of uniformly sampled experiences (with replacement) as a dict of arrays."""
+        if rng is None:
+            ids = np.random.randint(low=0, high=self._size, size=batch_size)
+        else:
+            ids = rng.integers(low=0, high=self._size, size=batch_size)
+        return {key: array[ids] for key, array in self._arrays.items()}
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
+
+    def _allocate(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        if self.memmap_dir is not None:
+            os.makedirs(self.memmap_dir, exist_ok=True)
+            self.memmap_path = tempfile.mkdtemp(prefix="replay_", dir=self.memmap_dir)
+            weakref.finalize(self, shutil.rmtree, self.memmap_path, True)
+        for key, (dtype, shape) in self._fields.items():
+            full_shape = (self.capacity,) + shape
+            if self.memmap_dir is None:
+                arrays[key] = np.zeros(full_shape, dtype=dtype)
+            else:
+                path = os.path.join(self.memmap_path, "{}.dat".format(key))
+                arrays[key] = np.memmap(path, dtype=dtype, mode='w+', shape=full_shape)
+        return arrays
@@ -0,0 +1,180 @@
+"""
+Offline datasets of (s, a, r, s2, done, m, m2) transitions.
+
+A dataset is a directory with a ``dataset.json`` description and shards of ``shard_size`` transitions. Every field of
+a shard is a separate ``.npy`` file (``shard_00000_s.npy``, ...) that is written and read as a memory map. Next to the
+experience fields of :class:`ReplayBuffer`, every transition stores whether the step broke the player, so the rewards
+can be recomputed for any penalty and a dataset can be reused by training runs with different penalties.
+"""
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ai.ai_env import step_reward
+from ai.controlled_game import ControlledGame
+from ai.replay_buffer import experience_fields
+from base.actions.action_service import ActionService
+from base.game_state import CARD_ENCODING, RANK_ENCODING, GameState
+from base.players.player import Player
+
+DESCRIPTION_FILE = "dataset.json"
+
+
+def transition_fields(state_size: int, num_actions: int) -> Dict[str, tuple]:
+    fields = experience_fields(state_size, num_actions)
+    fields['broken'] = (np.bool_, ())
+    return fields
+
+
+def shard_path(directory: str, shard: int, key: str) -> str:
+    return os.path.join(directory, "shard_{:05d}_{}.npy".format(shard, key))
+
+
+class TransitionDatasetGenerator:
+    """
+    Let a player play games and record the transitions the way :class:`BlackjackEnv` would produce them.
+
+    :param player: the policy, any :class:`Player` that chooses its actions itself (e.g. a random, optimal or AI player)
+    :param penalty: the reward for breaking
+    :param epsilon: probability of taking a uniformly random valid action instead of the player's action
+    :param seed: seed of the deck shuffling and of the exploration
+    :param state_encoding: encoding of the states, CARD_ENCODING or RANK_ENCODING
+    """
+
+    def __init__(self, player: Player, penalty, epsilon: float = 0.0, seed: Optional[int] = None,
+                 state_encoding: str = CARD_ENCODING):
+        self.player = player
+        self.penalty = penalty
+        self.epsilon = epsilon
+        self.seed = seed
+        self.state_encoding = state_encoding
+        self.state_size = GameState.state_size(state_encoding)
+        self._rng = np.random.default_rng(seed)
+        self._action_service = ActionService()
+        self._game = ControlledGame(seed=seed)
+        self._game.player = player
+
+    def transitions(self) -> Iterator[Dict[str, object]]:
+        """Yield transitions forever, starting a new game whenever a game is finished."""
+        game = self._game
+        while True:
+            if game.initialized:
+                game.reset_game(keep_players=True)
+            else:
+                game.initialize_game(initialize_players=False)
+            state = self._encode()
+            mask = game.get_current_actions_mask()
+            while not game.is_finished():
+                if self.epsilon and self._rng.random() < self.epsilon:
+                    action_idx = int(self._rng.choice(np.flatnonzero(mask)))
+                else:
+                    action = self.player._choose_action(game.get_state())
+                    action_idx = self._action_service.action_to_idx(action)
+                game.play_action_idx(action_idx)
+                next_state = self._encode()
+                next_mask = game.get_current_actions_mask()
+                yield {'s': state, 'a': action_idx, 'r': step_reward(self.player, self.penalty), 's2': next_state,
+                       'done': game.is_finished(), 'm': mask, 'm2': next_mask, 'broken': self.player.broken}
+                state, mask = next_state, next_mask
+
+    def _encode(self) -> np.ndarray:
+        if self.state_encoding == RANK_ENCODING:
+            return GameState.encode_ranks(self.player, self._game.deck)
+        return GameState.encode(self.player)
+
+    def generate(self, directory: str, num_transitions: int, shard_size: int = 100000,
+                 policy: str = "") -> 'TransitionDataset':
+        """Write num_transitions transitions to a new dataset in the given directory."""
+        os.makedirs(directory, exist_ok=True)
+        fields = transition_fields(self.state_size, self._action_service.num_actions)
+        transitions = self.transitions()
+        shard_sizes = []
+        for shard, start in enumerate(range(0, num_transitions, shard_size)):
+            size = min(shard_size, num_transitions - start)
+            arrays = {key: np.lib.format.open_memmap(shard_path(directory, shard, key), mode='w+', dtype=dtype,
+                                                     shape=(size,) + shape)
+                      for key, (dtype, shape) in fields.items()}
+            for i in range(size):
+                transition = next(transitions)
+                for key, array in arrays.items():
+                    array[i] = transition[key]
+            for array in arrays.values():
+                array.flush()
+            shard_sizes.append(size)
+        description = {
+            "policy": policy or type(self.player).__name__,
+            "penalty": self.penalty,
+            "epsilon": self.epsilon,
+            "seed": self.seed,
+            "state_encoding": self.state_encoding,
+            "state_size": self.state_size,
+            "num_actions": self._action_service.num_actions,
+            "num_transitions": num_transitions,
+            "shard_sizes": shard_sizes,
+        }
+        with open(os.path.join(directory, DESCRIPTION_FILE), 'w') as f:
+            json.dump(description, f, indent=2)
+        return TransitionDataset(directory)
+
+
+class TransitionDataset:
+    """A dataset written by :class:`TransitionDatasetGenerator`, the shards are memory mapped when they are used."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, DESCRIPTION_FILE)) as f:
+            self.description = json.load(f)
+        self.penalty = self.description["penalty"]
+        self.shard_sizes = self.description["shard_sizes"]  # type: List[int]
+        self.fields = transition_fields(self.description["state_size"], self.description["num_actions"])
+
+    def __len__(self):
+        return sum(self.shard_sizes)
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.shard_sizes)
+
+    def shard(self, shard: int) -> Dict[str, np.ndarray]:
+        return {key: np.load(shard_path(self.directory, shard, key), mmap_mode='r') for key in self.fields}
+
+    def batches(self, batch_size: int, penalty=None, shuffle: bool = True, seed: Optional[int] = None,
+                repeat: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield batches of experiences as dicts of arrays with the keys of :class:`ReplayBuffer`.
+
+        Shards are visited in random order and shuffled within the shard, so only one shard is read at a time.
+
+        :param penalty: the reward for breaking, defaults to the penalty the dataset was generated with
+        :param repeat: if True, yield batches forever, otherwise stop after a single pass over the dataset
+        """
+        rng = np.random.default_rng(seed)
+        penalty = self.penalty if penalty is None else penalty
+        keys = [key for key in self.fields if key != 'broken']
+        while True:
+            shards = rng.permutation(self.num_shards) if shuffle else range(self.num_shards)
+            for shard in shards:
+                arrays = self.shard(int(shard))
+                ids = rng.permutation(self.shard_sizes[shard]) if shuffle else np.arange(self.shard_sizes[shard])
+                for start in range(0, len(ids), batch_size):
+                    # Sorted ids read the memory map sequentially
+                    batch_ids = np.sort(ids[start:start + batch_size])
+                    batch = {key: np.asarray(arrays[key][batch_ids]) for key in keys}
+                    if penalty != self.penalty:
+                        batch['r'] = np.where(arrays['broken'][batch_ids], np.float32(penalty), batch['r'])
+                    yield batch
+            if not repeat:
+                return
+
+    def as_tf_dataset(self, batch_size: int, penalty=None, shuffle: bool = True, seed: Optional[int] = None,
+                      repeat: bool = True):
+        """Stream :meth:`batches` through a prefetching ``tf.data.Dataset``."""
+        import tensorflow as tf
+        signature = {key: tf.TensorSpec(shape=(None,) + shape, dtype=tf.as_dtype(dtype))
+                     for key, (dtype, shape) in self.fields.items() if key != 'broken'}
+        dataset = tf.data.Dataset.from_generator(
+            lambda: self.batches(batch_size, penalty=penalty, shuffle=shuffle, seed=seed, repeat=repeat),
+            output_signature=signature)
+        return dataset.prefetch(tf.data.AUTOTUNE)
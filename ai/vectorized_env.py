@@ -0,0 +1,106 @@
+import logging
+from typing import Optional, Tuple, Dict, Any
+
+import numpy as np
+
+from base.actions.action_service import ActionService
+from base.actions.request_card_action import RequestCardAction
+from base.cards.card import DECK_CARDS
+from base.game_state import GameState
+
+#: the rank of every card id
+CARD_RANKS = np.array([card.get_rank() for card in DECK_CARDS], dtype=np.int16)
+
+NUM_DECK_CARDS = len(DECK_CARDS)
+
+
+class VectorizedBlackjackEnv:
+    """
+    A batch of Blackjack games that are stepped in lockstep with NumPy.
+
+    Every game is represented by a row in a handful of arrays instead of a :class:`ControlledGame` object graph:
+    the shuffled deck as a permutation of card ids, a pointer to the next card to deal, a bitmask of the cards in
+    the hand, the score and the done flag. The rules and rewards are the same as those of :class:`BlackjackEnv`.
+    Finished games are reset automatically at the end of :meth:`step`.
+    """
+
+    def __init__(self, num_envs: int, penalty, seed: Optional[int] = None):
+        self.__version__ = "0.1.0"
+        self.num_envs = num_envs
+        self.penalty = penalty
+        self.num_actions = ActionService().num_actions
+        self.state_size = GameState.SIZE
+        self._request_card_idx = ActionService().action_to_idx(RequestCardAction())
+        self._rng = np.random.default_rng(seed)
+        logging.info("Vectorized Blackjack - Version {} - {} games".format(self.__version__, num_envs))
+
+        self.decks = np.zeros((num_envs, NUM_DECK_CARDS), dtype=np.int8)
+        self.pointers = np.zeros(num_envs, dtype=np.int16)
+        self.hands = np.zeros(num_envs, dtype=np.uint64)
+        self.scores = np.zeros(num_envs, dtype=np.int16)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self._observations = np.zeros((num_envs, self.state_size), dtype=np.float32)
+        self._masks = np.ones((num_envs, self.num_actions), dtype=bool)
+
+    def reset(self, decks: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reset all games and return the initial observations.
+
+        :param decks: optional (N, 52) array of card ids in the order they will be dealt, shuffled decks are drawn
+                      from the environment's random generator if omitted
+        """
+        self._reset_games(np.arange(self.num_envs), decks)
+        return self._observations.copy()
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Execute one action in every game.
+
+        :param actions: (N,) array of action indexes as defined by the :class:`ActionService`
+        :return: observations, rewards, dones and info.
+                 Games that finished in this step are already reset, so their observation is the first observation
+                 of the new game. The last observation of the finished game is stored in info['final_observation'] and
+                 the valid-action masks of the returned observations in info['action_masks'].
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError("Expected {} actions, got an array of shape {}".format(self.num_envs, actions.shape))
+        if np.any((actions < 0) | (actions >= self.num_actions)):
+            raise ValueError("Invalid action index in {}".format(actions))
+
+        draw = actions == self._request_card_idx
+        games = np.flatnonzero(draw)
+        cards = self.decks[games, self.pointers[games]]
+        self.pointers[games] += 1
+        self.hands[games] |= np.left_shift(np.uint64(1), cards.astype(np.uint64))
+        self.scores[games] += CARD_RANKS[cards]
+        self._observations[games, cards.astype(np.intp) + 1] = 1
+        self._observations[:, -1] = self.scores
+
+        scores = self.scores.astype(np.int64)
+        broken = scores > 21
+        self.dones = broken | ~draw | (scores == 21)
+        rewards = np.where(broken, self.penalty, scores ** 2 // (np.abs(scores - 21) + 1)).astype(np.float32)
+        dones = self.dones.copy()
+
+        info = {'final_observation': self._observations.copy()}
+        finished = np.flatnonzero(dones)
+        if finished.size:
+            self._reset_games(finished)
+        info['action_masks'] = self.get_current_actions_mask()
+        return self._observations.copy(), rewards, dones, info
+
+    def get_current_actions_mask(self) -> np.ndarray:
+        """Return an (N, num_actions) boolean mask of the valid actions in every game."""
+        self._masks[:] = ~self.dones[:, np.newaxis]
+        return self._masks.copy()
+
+    def _reset_games(self, games: np.ndarray, decks: Optional[np.ndarray] = None) -> None:
+        if decks is None:
+            decks = np.argsort(self._rng.random((len(games), NUM_DECK_CARDS)), axis=1)
+        self.decks[games] = decks
+        self.pointers[games] = 0
+        self.hands[games] = 0
+        self.scores[games] = 0
+        self.dones[games] = False
+        self._observations[games] = 0
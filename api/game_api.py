@@ -0,0 +1,146 @@
+"""
+JSON API to play the games of the :class:`GameRunner` over HTTP.
+
+    GET    /api/games                   ids of the running games
+    POST   /api/games                   start a game, body: {"player_type": "random"} (optional)
+    GET    /api/games/{game_id}         state of a game
+    POST   /api/games/{game_id}/step    play a step, body: {"action": 0} to play the given action index instead of
+                                        letting the player choose (required for human players)
+    DELETE /api/games/{game_id}         end a game
+    GET    /api/stats                   handled requests and the session counters of the GameRunner
+
+Every game operation runs in a thread pool under the lock of its game, so player decisions (e.g. model inference of
+AI players) never block the event loop and concurrent requests for the same game are serialized.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Optional
+
+from api.http_server import HTTPError, Request, Router
+from base.actions.action_service import ActionService
+from base.game import Game
+from base.players.player_registry import PlayerRegistry
+from run.game_runner import GameRunner
+
+
+def game_to_json(game_id: str, game: Game) -> Dict[str, object]:
+    player = game.player
+    mask = ActionService().get_mask(player, game.phase)
+    return {
+        "game_id": game_id,
+        "phase": game.phase.name,
+        "hand": [str(card) for card in player.hand.get_raw_cards()],
+        "score": player.score,
+        "broken": player.broken,
+        "stopped": player.stopped,
+        "finished": game.is_finished(),
+        "won": game.player_won(),
+        "valid_actions": [i for i, is_valid in enumerate(mask) if is_valid],
+        "cards_left": game.deck.num_cards(),
+    }
+
+
+class GameAPI:
+    """
+    Request handlers of the game API.
+
+    :param max_workers: number of threads that play the games
+    """
+
+    def __init__(self, game_runner: Optional[GameRunner] = None, max_workers: int = 8):
+        self.game_runner = game_runner if game_runner is not None else GameRunner()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="GameAPI")
+        self.num_requests = 0
+
+    def router(self) -> Router:
+        router = Router()
+        router.add("GET", "/api/games", self.list_games)
+        router.add("POST", "/api/games", self.start_game)
+        router.add("GET", "/api/games/{game_id}", self.get_game)
+        router.add("POST", "/api/games/{game_id}/step", self.step_game)
+        router.add("DELETE", "/api/games/{game_id}", self.end_game)
+        router.add("GET", "/api/stats", self.stats)
+        return router
+
+    async def evict_expired_games(self, interval: float) -> None:
+        """Evict the expired games of the GameRunner every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self._run(self.game_runner.evict_expired)
+
+    async def save_sessions_periodically(self, path: str, interval: float) -> None:
+        """Save all sessions of the GameRunner to the given file every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self._run(self.game_runner.save_sessions, path)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    async def list_games(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        return {"games": self.game_runner.get_running_games()}
+
+    async def start_game(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        player_type = request.json().get("player_type")
+        if player_type is not None and player_type not in PlayerRegistry().get_player_types():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Unknown player type '{}', expected one of {}".format(
+                player_type, PlayerRegistry().get_player_types()))
+        # Creating a player can load a model
+        return await self._run(self._start_game, player_type)
+
+    async def get_game(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        return await self._run(self._with_game, request.path_params["game_id"], None)
+
+    async def step_game(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        action = request.json().get("action")
+        if action is not None and (not isinstance(action, int) or isinstance(action, bool)
+                                   or not 0 <= action < ActionService().num_actions):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "The action must be an action index in [0, {})".format(
+                ActionService().num_actions))
+        return await self._run(self._with_game, request.path_params["game_id"], lambda game: self._step(game, action))
+
+    async def end_game(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        game_id = request.path_params["game_id"]
+        if not self.game_runner.end_game(game_id):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "No game with id '{}'".format(game_id))
+        return {"game_id": game_id, "ended": True}
+
+    async def stats(self, request: Request) -> Dict[str, object]:
+        self.num_requests += 1
+        stats = self.game_runner.stats()
+        stats["requests"] = self.num_requests
+        return stats
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _start_game(self, player_type: Optional[str]) -> Dict[str, object]:
+        game_id, _ = self.game_runner.start_game(player_type)
+        return self._with_game(game_id, None)
+
+    def _with_game(self, game_id: str, update: Optional[Callable[[Game], None]]) -> Dict[str, object]:
+        with self.game_runner.locked_game(game_id) as game:
+            if game is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, "No game with id '{}'".format(game_id))
+            if update is not None:
+                update(game)
+            return game_to_json(game_id, game)
+
+    @staticmethod
+    def _step(game: Game, action: Optional[int]) -> None:
+        if game.is_finished():
+            raise HTTPError(HTTPStatus.CONFLICT, "The game is finished")
+        if action is None:
+            if game.player.is_human:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "A human player needs an action")
+            game.play_single_step()
+        else:
+            if not ActionService().get_bitmask(game.player, game.phase) >> action & 1:
+                raise HTTPError(HTTPStatus.CONFLICT, "Action {} is not valid in the current state".format(action))
+            game.play_action_idx(action)
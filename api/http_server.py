@@ -0,0 +1,176 @@
+"""
+Minimal asyncio HTTP/1.1 server for JSON APIs, built on the standard library only.
+
+Connections are kept alive between requests (HTTP/1.1 semantics, unless the client sends ``Connection: close``) and
+requests on a connection are handled one at a time. Handlers are coroutines that receive a :class:`Request` and return
+a JSON serializable body, or raise :class:`HTTPError`. Handlers run on the event loop, so any blocking work has to be
+moved off it, e.g. with ``loop.run_in_executor``.
+"""
+import asyncio
+import json
+import logging
+import re
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class HTTPError(Exception):
+    """Error that is sent to the client as a JSON ``{"error": message}`` response with the given status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes,
+                 path_params: Optional[Dict[str, str]] = None):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.path_params = path_params or {}
+
+    def json(self) -> Dict[str, object]:
+        """Return the JSON object in the body, or an empty dict if there is no body."""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid JSON body: {}".format(e))
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "The JSON body must be an object")
+        return data
+
+
+Handler = Callable[[Request], Awaitable[object]]
+
+
+class Router:
+    """Maps (method, path pattern) onto handlers, patterns capture path parameters with ``{name}``."""
+
+    def __init__(self):
+        self._routes = []  # type: List[Tuple[Pattern, Dict[str, Handler]]]
+
+    def add(self, method: str, pattern: str, handler: Handler) -> None:
+        regex = re.compile("^" + re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", pattern) + "$")
+        for route_regex, handlers in self._routes:
+            if route_regex.pattern == regex.pattern:
+                handlers[method] = handler
+                return
+        self._routes.append((regex, {method: handler}))
+
+    def resolve(self, method: str, path: str) -> Tuple[Handler, Dict[str, str]]:
+        for regex, handlers in self._routes:
+            match = regex.match(path)
+            if match is None:
+                continue
+            if method not in handlers:
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "{} is not allowed on {}".format(method, path))
+            return handlers[method], match.groupdict()
+        raise HTTPError(HTTPStatus.NOT_FOUND, "No route for {}".format(path))
+
+
+class HTTPServer:
+
+    def __init__(self, router: Router, host: str = "0.0.0.0", port: int = 4800, backlog: int = 4096):
+        self.router = router
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self._server = None  # type: Optional[asyncio.AbstractServer]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=self.backlog, limit=MAX_HEADER_SIZE)
+        # Port 0 binds a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        LOGGER.info("Serving on %s:%d", self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                status, body = await self._dispatch(request)
+                await self._write_response(writer, status, body, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            # The client closed the connection between requests
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+    async def _dispatch(self, request: Request) -> Tuple[int, object]:
+        try:
+            handler, request.path_params = self.router.resolve(request.method, request.path)
+            return HTTPStatus.OK, await handler(request)
+        except HTTPError as e:
+            return e.status, {"error": e.message}
+        except Exception:
+            LOGGER.exception("Error handling %s %s", request.method, request.path)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, body: object, keep_alive: bool) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        status = HTTPStatus(status)
+        head = ("HTTP/1.1 {} {}\r\n"
+                "Content-Type: application/json\r\n"
+                "Content-Length: {}\r\n"
+                "Access-Control-Allow-Origin: *\r\n"
+                "Connection: {}\r\n\r\n").format(status.value, status.phrase, len(payload),
+                                                 "keep-alive" if keep_alive else "close")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
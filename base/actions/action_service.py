@@ -1,15 +1,35 @@
 from copy import copy
-from typing import List, TYPE_CHECKING
+from typing import Callable, List, TYPE_CHECKING, Tuple
+
+import numpy as np
 
 from base.actions.action import Action
 from base.actions.request_card_action import RequestCardAction
 from base.actions.stop_action import StopAction
+from base.enums.game_phase import GamePhase
 from base.players.player import Player
 from base.utils.singleton import Singleton
 
 if TYPE_CHECKING:
+    from base.cards.deck import Deck
     from base.game_state import GameState
 
+#: integer codes of the actions, equal to their unique indexes
+REQUEST_CARD = 0
+STOP = 1
+
+
+class _PlayerFlags:
+    """The part of a player the actions are validated on."""
+
+    def __init__(self, broken: bool, stopped: bool):
+        self.broken = broken
+        self.stopped = stopped
+
+
+def _mask_index(phase: GamePhase, broken: bool, stopped: bool) -> int:
+    return phase.value * 4 + broken * 2 + stopped
+
 
 class ActionService(metaclass=Singleton):
 
@@ -19,10 +39,33 @@ class ActionService(metaclass=Singleton):
         self._action_to_idx = {action: i for i, action in enumerate(self._all_actions)}
         self._idx_to_action = {i: action for action, i in self._action_to_idx.items()}
 
+        # Whether an action is valid only depends on the phase and on the player being broken or stopped, so the masks
+        # of all combinations are computed once, as shared read-only arrays and as bitmasks (bit i is action i)
+        num_masks = _mask_index(max(GamePhase, key=lambda p: p.value), True, True) + 1
+        self._masks = [None] * num_masks  # type: List[np.ndarray]
+        self._bitmasks = [0] * num_masks  # type: List[int]
+        for phase in GamePhase:
+            for broken in (False, True):
+                for stopped in (False, True):
+                    player = _PlayerFlags(broken, stopped)
+                    mask = np.array([a.validate(player, None, phase) for a in self._all_actions], dtype=bool)
+                    mask.setflags(write=False)
+                    index = _mask_index(phase, broken, stopped)
+                    self._masks[index] = mask
+                    self._bitmasks[index] = sum(1 << i for i, is_valid in enumerate(mask) if is_valid)
+
+        # Transition table with the effect and the target phase of every action code, used by execute_idx()
+        self._transitions = tuple(
+            (a._execute, a._target_phase) for a in self._all_actions)  # type: Tuple[Tuple[Callable, Callable], ...]
+
     def action_to_idx(self, action: 'Action') -> int:
         """Return the unique index associated with the given action."""
         return self._action_to_idx[action]
 
+    def action(self, index: int) -> 'Action':
+        """Return the shared action object with the given unique index, it must not be modified."""
+        return self._all_actions[index]
+
     def idx_to_action(self, index: int) -> 'Action':
         """Return the action associated with the given unique index."""
         # Always return a copy so a unique action object is obtained
@@ -31,8 +74,31 @@ class ActionService(metaclass=Singleton):
     def get_valid_actions(self, player: 'Player', game_state: 'GameState') -> List['Action']:
         """Return a list of all valid actions for the given player."""
         # Make sure to return copies of each action so they can be executed later on
-        return [copy(a) for a in self._all_actions if a.validate(player, game_state.deck, game_state.phase)]
+        mask = self.get_mask(player, game_state.phase)
+        return [copy(a) for a, is_valid in zip(self._all_actions, mask) if is_valid]
 
     def get_valid_actions_mask(self, player: 'Player', game_state: 'GameState') -> List[bool]:
         """Return a boolean mask corresponding to the unique indexes representing the current valid actions."""
-        return [a.validate(player, game_state.deck, game_state.phase) for a in self._all_actions]
+        return self.get_mask(player, game_state.phase).tolist()
+
+    def get_mask(self, player: 'Player', phase: GamePhase) -> np.ndarray:
+        """Return the valid actions mask as a shared, read-only boolean array."""
+        return self._masks[_mask_index(phase, player.broken, player.stopped)]
+
+    def get_bitmask(self, player: 'Player', phase: GamePhase) -> int:
+        """Return the valid actions mask as an integer, bit i is set if the action with index i is valid."""
+        return self._bitmasks[_mask_index(phase, player.broken, player.stopped)]
+
+    def execute_idx(self, index: int, player: 'Player', deck: 'Deck', phase: GamePhase) -> GamePhase:
+        """
+        Execute the action with the given index for the given player and return the new phase.
+
+        This is the fast path of :meth:`Action.execute`, no action objects are created and the action is validated
+        through the precomputed masks.
+        """
+        if not self._bitmasks[_mask_index(phase, player.broken, player.stopped)] >> index & 1:
+            raise Exception("Invalid action. \n {} \n {} \n {} \n {}".format(
+                self._all_actions[index], player, phase, deck))
+        execute, target_phase = self._transitions[index]
+        execute(player, deck, phase)
+        return target_phase(player, deck, phase)
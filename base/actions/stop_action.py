@@ -23,10 +23,11 @@ class StopAction(Action):
     def validate(self, player: 'Player', deck: 'Deck', phase: 'GamePhase', verbose: bool = False):
         if phase != GamePhase.PLAYER_PHASE:
             if verbose:
-                logging.info("Invalid action {}. Reason: wrong phase - {}".format(self, phase))
+                logging.info("Invalid action %s. Reason: wrong phase - %s", self, phase)
             return False
         if player.broken:
-            logging.info("Invalid action {}. Player is broken.")
+            if verbose:
+                logging.info("Invalid action %s. Player is broken.", self)
             return False
         return True
 
@@ -1,7 +1,7 @@
 from typing import Union
 
 from base.utils.card_constants import POSSIBLE_RANK, POSSIBLE_SUIT, JOKER_SUIT, JOKER_RANK, RANK_TRANSLATION, \
-    RANK_TRANSLATION_SHORT, HEARTS, DIAMONDS, SPADES
+    RANK_TRANSLATION_SHORT, HEARTS, DIAMONDS, SPADES, CLUBS
 
 """This module provides the :class:`Card` object.
 This module also has 5 constant attributes that help validate or string format
@@ -11,21 +11,32 @@ the :class:`Card` object: :attr:`POSSIBLE_SUIT`, :attr:`POSSIBLE_RANK`,
 
 
 class Card(object):
-    """A Card object"""
+    """A Card object
 
-    #: Holds the suit as a lowercase string
-    _suit = None
+    Cards are immutable flyweights: there is exactly one interned instance per (rank, suit), which is returned by
+    every ``Card(rank, suit)`` call. Each card is also addressable by a small integer id, see :meth:`get_id`.
+    The hash, ordering key and display strings are computed once when the card table is built.
+    """
 
-    #: Holds an integer which represents the card rank
-    _rank = None
+    __slots__ = ('_rank', '_suit', '_id', '_hash', '_sort_key', '_str', '_repr', '_print')
 
-    def __init__(self, rank, suit):
+    #: maps (rank, suit) onto the interned card
+    _interned = {}
+
+    #: the interned cards, indexed by card id
+    _by_id = []
+
+    def __new__(cls, rank, suit):
         """
         :param int rank: a rank in :attr:`POSSIBLE_RANK` or :attr:`JOKER_RANK`
         :param str suit: a case-independent string in :attr:`POSSIBLE_SUIT` or
                          :attr:`JOKER_SUIT`
         :raises: ValueError
         """
+        try:
+            return cls._interned[(rank, suit)]
+        except (KeyError, TypeError):
+            pass
 
         # convert to lowercase
         suit = suit.lower()
@@ -33,20 +44,36 @@ class Card(object):
         base_error_str = 'A new Card cannot be created.'
 
         if suit == JOKER_SUIT:
-            if rank == JOKER_RANK:
-                self._suit = suit
-                self._rank = rank
-            else:
+            if rank != JOKER_RANK:
                 raise ValueError(base_error_str + " Joker's rank must be %d" % JOKER_RANK)
         elif suit in POSSIBLE_SUIT:
-            self._suit = suit
-
-            if rank in POSSIBLE_RANK:
-                self._rank = rank
-            else:
+            if rank not in POSSIBLE_RANK:
                 raise ValueError(base_error_str + " A normal card's rank (%s) is not %s." % (rank, POSSIBLE_RANK))
         else:
             raise ValueError(base_error_str + " Suit ('%s') is not in %s." % (suit, POSSIBLE_SUIT + [JOKER_SUIT]))
+        return cls._interned[(rank, suit)]
+
+    @classmethod
+    def _intern(cls, rank: int, suit: str) -> 'Card':
+        """Create the single instance of the given card and add it to the card table."""
+        card = object.__new__(cls)
+        set_slot = object.__setattr__
+        set_slot(card, '_rank', rank)
+        set_slot(card, '_suit', suit)
+        set_slot(card, '_id', len(cls._by_id))
+        set_slot(card, '_hash', hash((rank, suit)))
+        set_slot(card, '_sort_key', (-1, rank) if suit == JOKER_SUIT else (SUIT_ORDER.index(suit), rank))
+        set_slot(card, '_repr', "Card(_rank=%s, _suit=%s)" % (rank, suit))
+        set_slot(card, '_str', card._format_str())
+        set_slot(card, '_print', card._format_print())
+        cls._interned[(rank, suit)] = card
+        cls._by_id.append(card)
+        return card
+
+    @classmethod
+    def from_id(cls, card_id: int) -> 'Card':
+        """Return the card with the given id."""
+        return cls._by_id[card_id]
 
     def _translate_rank(self) -> Union[int, str]:
         """This is a hidden method that changes the card rank to a
@@ -77,12 +104,26 @@ class Card(object):
         else:
             return self.get_rank()
 
+    def _format_str(self) -> str:
+        translated_rank = self.translate_rank_short()
+        if self.is_joker():
+            return translated_rank
+        else:
+            return "%s-%s" % (translated_rank, self._suit[0].upper())
+
+    def _format_print(self) -> str:
+        translated_rank = self._translate_rank()
+        if self.is_joker():
+            return translated_rank
+        else:
+            return "%s of %s" % (translated_rank, self._suit.title())
+
     def __repr__(self) -> str:
         """This method returns an unambigious string representation of the card object
         :returns: unambigious string representation of card object
         :rtype: str
         """
-        return "Card(_rank=%s, _suit=%s)" % (self.get_rank(), self.get_suit())
+        return self._repr
 
     def __str__(self) -> str:
         """This method returns a short string representation of the card object
@@ -90,11 +131,7 @@ class Card(object):
         :returns: human readable string representation of card object
         :rtype: str
         """
-        translated_rank = self.translate_rank_short()
-        if self.is_joker():
-            return translated_rank
-        else:
-            return "%s-%s" % (translated_rank, self._suit[0].upper())
+        return self._str
 
     def print(self):
         """This method returns a nice string representation of the card object
@@ -102,11 +139,7 @@ class Card(object):
         :returns: human readable string representation of card object
         :rtype: str
         """
-        translated_rank = self._translate_rank()
-        if self.is_joker():
-            return translated_rank
-        else:
-            return "%s of %s" % (translated_rank, self._suit.title())
+        return self._print
 
     def get_rank(self) -> int:
         """
@@ -122,6 +155,13 @@ class Card(object):
         """
         return self._suit
 
+    def get_id(self) -> int:
+        """
+        :returns: :attr:`_id`, the index of this card in the card table (0-51 for the normal cards, 52 for the joker)
+        :rtype: int
+        """
+        return self._id
+
     def is_joker(self) -> bool:
         """
         :returns: True if joker
@@ -133,13 +173,15 @@ class Card(object):
         return self._rank, self._suit
 
     def __hash__(self):
-        return hash(self._key())
+        return self._hash
 
     def __eq__(self, other) -> bool:
         """Override equality method
         :returns: True if two objects are cards and have the same :attr:`_rank` and :attr:`_suit`
         :rtype: bool
         """
+        if self is other:
+            return True
         if type(other) is type(self):
             if self._key() == other._key():
                 return True
@@ -153,24 +195,32 @@ class Card(object):
         return not self.__eq__(other)
 
     def __lt__(self, other: 'Card') -> bool:
-        if self.is_joker():
-            return True
-        if other.is_joker():
-            return False
-        self_suit = self.get_suit()
-        other_suit = other.get_suit()
-        if self_suit == other_suit:
-            return self.get_rank() < other.get_rank()
-        else:
-            if self_suit == HEARTS:
-                return True
-            elif other_suit == HEARTS:
-                return False
-            elif self_suit == SPADES:
-                return True
-            elif other_suit == SPADES:
-                return False
-            elif self_suit == DIAMONDS:
-                return True
-            else:
-                return False
+        """Jokers come first, followed by hearts, spades, diamonds and clubs, each ordered by rank."""
+        return self._sort_key < other._sort_key
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Card objects are immutable")
+
+    def __reduce__(self):
+        # Unpickling and copying go through the constructor so they return the interned instance
+        return Card, (self._rank, self._suit)
+
+
+#: the order of the suits when sorting cards
+SUIT_ORDER = [HEARTS, SPADES, DIAMONDS, CLUBS]
+
+# Build the card table, the card id of the normal cards follows the order of POSSIBLE_SUIT and POSSIBLE_RANK
+for _suit in POSSIBLE_SUIT:
+    for _rank in POSSIBLE_RANK:
+        Card._intern(_rank, _suit)
+Card._intern(JOKER_RANK, JOKER_SUIT)
+del _suit, _rank
+
+#: the 52 cards of a deck without jokers, indexed by card id
+DECK_CARDS = tuple(Card._by_id[:len(POSSIBLE_SUIT) * len(POSSIBLE_RANK)])
+
+#: the card id of the joker
+JOKER_ID = Card(JOKER_RANK, JOKER_SUIT).get_id()
@@ -1,20 +1,61 @@
 from typing import List, Union, Optional
+
 import numpy as np
-from sklearn.preprocessing import MultiLabelBinarizer
 
-from base.cards.card import Card
-from base.utils.card_constants import POSSIBLE_SUIT, POSSIBLE_RANK, JOKER_SUIT, JOKER_RANK
+from base.cards.card import Card, DECK_CARDS, JOKER_ID
+from base.utils.singleton import Singleton
+
 
+class CardEncoder(metaclass=Singleton):
+    """
+    Multi-hot encoder for (sets of) cards.
 
-class CardEncoder:
+    Every class is mapped onto a fixed column through a static lookup table, so encoding a set of cards only
+    touches the columns of the cards in that set.
+    """
 
     def __init__(self):
         classes = [None]                                                                    # empty set of cards
-        classes += [Card(rank, suit) for suit in POSSIBLE_SUIT for rank in POSSIBLE_RANK]   # individual cards
-        classes += [Card(JOKER_RANK, JOKER_SUIT)]                                           # joker
-        self.encoder = MultiLabelBinarizer(classes=classes)
+        classes += DECK_CARDS                                                               # individual cards
+        classes += [Card.from_id(JOKER_ID)]                                                 # joker
+        self.classes = classes  # type: List[Optional[Card]]
+        self.num_classes = len(classes)
+        self._class_to_column = {card: column for column, card in enumerate(classes)}
+
+    def column(self, card: Optional[Card]) -> int:
+        """Return the column that represents the given card."""
+        return self._class_to_column[card]
 
-    def encode(self, cards: Union[Optional[Card], List[Card]]) -> np.ndarray:
+    def encode(self, cards: Union[Optional[Card], List[Card]], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the multi-hot encoding of the given card(s).
+
+        :param cards: a single card, a list of cards or None (the empty set of cards)
+        :param out: optional array of length :attr:`num_classes` to write the encoding into instead of allocating one
+        """
         if cards is None or isinstance(cards, Card):
             cards = [cards]
-        return self.encoder.fit_transform([cards])[0]
+        if out is None:
+            out = np.zeros(self.num_classes, dtype=np.int64)
+        else:
+            out[:] = 0
+        class_to_column = self._class_to_column
+        for card in cards:
+            out[class_to_column[card]] = 1
+        return out
+
+    def encode_masks(self, masks: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the multi-hot encodings of a batch of card bitmasks, see :meth:`Hand.get_mask`.
+
+        :param masks: (N,) array of bitmasks in which bit i is set if the card with id i is in the set
+        :param out: optional (N, :attr:`num_classes`) array to write the encodings into instead of allocating one
+        """
+        masks = np.asarray(masks, dtype='<u8')
+        if out is None:
+            out = np.zeros((len(masks), self.num_classes), dtype=np.int64)
+        # Unpack the little-endian bytes of every mask into one column per card id, the card with id i has column i+1
+        bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        out[:, 0] = 0
+        out[:, 1:] = bits[:, :self.num_classes - 1]
+        return out
@@ -5,10 +5,11 @@
 import logging
 import random
 #: a logger object
-from typing import List
+from typing import List, Optional, Sequence, Union
 
-from base.cards.card import Card
+from base.cards.card import Card, DECK_CARDS, JOKER_ID
 from base.utils.card_constants import JOKER_RANK, JOKER_SUIT, POSSIBLE_RANK, POSSIBLE_SUIT
+from base.utils.instrumentation import timed
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,29 +31,58 @@ class Deck(object):
     #: an array of :class:`deck_of_cards.card.Card` objects that have been dealt
     _in_play_cards = []
 
-    def __init__(self, with_jokers=True):
+    #: the number of unused cards of every rank, indexed by rank (index 0 counts the jokers)
+    _rank_counts = []
+
+    def __init__(self, with_jokers=True, rng: Optional[random.Random] = None):
         """
         :param bool with_jokers: include jokers if True
+        :param rng: random generator used to shuffle the deck, the global :mod:`random` module if None
         """
         LOGGER.debug("Creating a new deck (with_jokers:%s)", with_jokers)
 
+        self._rng = rng if rng is not None else random  # type: Union[random.Random, type(random)]
+
         self._num_added_cards = 0  # Keep track of how many cards are added to the deck after creation
         self._with_jokers = with_jokers
         self._cards = []
         self._in_play_cards = []
+        self._rank_counts = [0] + [len(POSSIBLE_SUIT)] * len(POSSIBLE_RANK)
 
         # add jokers if necessary
         if with_jokers:
-            for _ in range(2):
-                self._cards.append(Card(JOKER_RANK, JOKER_SUIT))
+            joker = Card.from_id(JOKER_ID)
+            self._cards.extend([joker, joker])
+            self._rank_counts[JOKER_RANK] = 2
+
+        # cards are interned, so the deck is filled from the card table instead of creating new cards
+        self._cards.extend(DECK_CARDS)
 
-        for suit in POSSIBLE_SUIT:
-            for rank in POSSIBLE_RANK:
-                self._cards.append(Card(rank, suit))
+    @classmethod
+    def from_card_ids(cls, card_ids: Sequence[int], in_play_cards: Optional[Sequence[Card]] = None) -> 'Deck':
+        """
+        Create a deck that deals the cards with the given ids in the given order (e.g. a permutation of a deck bank).
+
+        :param card_ids: ids of the cards (see :meth:`Card.get_id`), the first id is dealt first
+        :param in_play_cards: cards that were already dealt from this deck, e.g. the hand of a restored game
+        """
+        card_ids = list(card_ids)
+        deck = cls(with_jokers=False)
+        # The deck deals from the end of _cards
+        deck._cards = [DECK_CARDS[card_id] if card_id < JOKER_ID else Card.from_id(card_id)
+                       for card_id in reversed(card_ids)]
+        deck._in_play_cards = list(in_play_cards) if in_play_cards is not None else []
+        deck._with_jokers = JOKER_ID in card_ids or any(card.get_id() == JOKER_ID for card in deck._in_play_cards)
+        deck._rank_counts = [0] * (len(POSSIBLE_RANK) + 1)
+        for card in deck._cards:
+            deck._rank_counts[card.get_rank()] += 1
+        return deck
 
     def add_cards(self, cards: List[Card]) -> None:
         self._cards.extend(cards)
         self._num_added_cards += len(cards)
+        for card in cards:
+            self._rank_counts[card.get_rank()] += 1
 
     def __repr__(self):
         """
@@ -105,12 +135,30 @@ class Deck(object):
     def num_cards(self) -> int:
         return len(self._cards)
 
+    def get_raw_cards(self) -> List[Card]:
+        """Return the unused cards, the last card in the list is the next one to be dealt."""
+        return self._cards
+
+    def rank_counts(self) -> List[int]:
+        """
+        Return the number of unused cards of every rank, indexed by rank (index 0 counts the jokers).
+
+        The counts are kept up to date by :meth:`deal`, so this is O(1). The returned list must not be modified.
+        """
+        return self._rank_counts
+
+    def get_card_ids(self) -> List[int]:
+        """Return the ids of the unused cards in dealing order, the inverse of :meth:`from_card_ids`."""
+        return [card.get_id() for card in reversed(self._cards)]
+
+    @timed("deck.shuffle")
     def shuffle(self):
         """Shuffle the unused set of cards in :attr:`_cards`
         """
         LOGGER.debug("Shuffling deck")
-        random.shuffle(self._cards)
+        self._rng.shuffle(self._cards)
 
+    @timed("deck.deal")
     def deal(self):
         """Deals a single :class:`deck_of_cards.card.Card` from :attr:`_cards`
         Raises an IndexError when :attr:`_cards` is empty
@@ -128,6 +176,7 @@ class Deck(object):
 
         # add the newly dealt card to the _in_play_cards array
         self._in_play_cards.append(deal_card)
+        self._rank_counts[deal_card.get_rank()] -= 1
 
         LOGGER.info("Dealing : %s", deal_card)
         return deal_card
@@ -0,0 +1,98 @@
+"""This module provides the :class:`DeckBank` object
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+from base.cards.card import DECK_CARDS
+from base.cards.deck import Deck
+
+NUM_DECK_CARDS = len(DECK_CARDS)
+
+
+def shuffled_card_ids(num_decks: int, rng: np.random.Generator) -> np.ndarray:
+    """Return num_decks independent permutations of the card ids of a deck without jokers, one per row."""
+    card_ids = np.broadcast_to(np.arange(NUM_DECK_CARDS, dtype=np.uint8), (num_decks, NUM_DECK_CARDS))
+    return rng.permuted(card_ids, axis=1)
+
+
+class DeckBank:
+    """
+    A batch of pre-shuffled decks (without jokers).
+
+    The decks are stored as one uint8 array of card ids with a row per deck, in dealing order. A bank saved to a
+    ``.npy`` file is memory mapped when it is loaded, so many worker processes can share it without copying it.
+    Decks are consumed in order through :meth:`next_deck`, any deck can be replayed with :meth:`deck`.
+
+    :param card_ids: uint8 array of shape (num_decks, 52)
+    :param path: the file the bank was loaded from, if any
+    """
+
+    def __init__(self, card_ids: np.ndarray, path: Optional[str] = None):
+        if card_ids.ndim != 2 or card_ids.shape[1] != NUM_DECK_CARDS:
+            raise ValueError("Expected an array of shape (num_decks, {}), got {}".format(NUM_DECK_CARDS,
+                                                                                       card_ids.shape))
+        self.card_ids = card_ids
+        self.path = path
+        self._next_index = 0
+        self._step = 1
+        #: the index of the deck that was returned by the last call of :meth:`next_deck`
+        self.last_index = None  # type: Optional[int]
+
+    def __len__(self):
+        return len(self.card_ids)
+
+    @classmethod
+    def generate(cls, num_decks: int, seed: Optional[int] = None, path: Optional[str] = None,
+                 chunk_size: int = 10 ** 6) -> 'DeckBank':
+        """
+        Shuffle num_decks decks at once.
+
+        :param seed: seed of the NumPy generator, the bank is fully determined by (num_decks, seed, chunk_size)
+        :param path: if given, the bank is written to this ``.npy`` file (chunk_size decks at a time) and memory mapped
+        """
+        rng = np.random.default_rng(seed)
+        if path is None:
+            return cls(shuffled_card_ids(num_decks, rng))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        card_ids = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(num_decks, NUM_DECK_CARDS))
+        for start in range(0, num_decks, chunk_size):
+            stop = min(num_decks, start + chunk_size)
+            card_ids[start:stop] = shuffled_card_ids(stop - start, rng)
+        card_ids.flush()
+        del card_ids
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DeckBank':
+        """Memory map a bank that was saved with :meth:`generate` or :meth:`save`."""
+        return cls(np.load(path, mmap_mode='r'), path=path)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.save(path, np.ascontiguousarray(self.card_ids, dtype=np.uint8))
+        self.path = path
+
+    def seek(self, index: int, step: int = 1) -> None:
+        """
+        Let :meth:`next_deck` continue at the given index.
+
+        :param step: distance between consecutive decks, e.g. the number of workers when every worker starts at its
+                     own index so the workers never deal the same deck
+        """
+        self._next_index = index
+        self._step = step
+
+    def deck(self, index: int) -> Deck:
+        """Return a new deck that deals the cards of the deck at the given index."""
+        return Deck.from_card_ids(self.card_ids[index].tolist())
+
+    def next_deck(self) -> Deck:
+        """Return the next deck of the bank, raises an IndexError when the bank is exhausted."""
+        index = self._next_index
+        if index >= len(self.card_ids):
+            raise IndexError("Deck bank exhausted after {} decks".format(len(self.card_ids)))
+        self._next_index += self._step
+        self.last_index = index
+        return self.deck(index)
@@ -1,27 +1,86 @@
-from typing import Union, List
+from typing import Union, List, Optional
 
 from base.cards.card import Card
 from base.cards.card_set import CardSet
+from base.utils.card_constants import POSSIBLE_RANK
 
 
 class Hand(CardSet):
+    """
+    The cards held by a player.
+
+    Next to the list of cards, a hand keeps a bitmask of the card ids it contains, the number of cards of every rank
+    and the sum of the ranks of its cards. All are updated incrementally, so membership tests and the score are O(1).
+    """
+
+    def __init__(self, cards: Optional[List[Card]] = None):
+        super().__init__(cards)
+        self._mask = 0
+        self._score = 0
+        self._rank_counts = [0] * (len(POSSIBLE_RANK) + 1)
+        self._num_duplicates = 0  # Number of cards whose id was already in the mask when they were added
+        for card in self._cards:
+            self._track(card)
 
     def description(self) -> str:
         return "Hand"
 
+    @property
+    def score(self) -> int:
+        """The sum of the ranks of all cards in this hand."""
+        return self._score
+
+    def get_mask(self) -> int:
+        """Return a bitmask with bit i set if the card with id i is in this hand."""
+        return self._mask
+
+    def get_rank_counts(self) -> List[int]:
+        """Return the number of cards of every rank in this hand, indexed by rank (index 0 counts the jokers)."""
+        return self._rank_counts
+
+    def __contains__(self, item):
+        if isinstance(item, Card):
+            return bool(self._mask >> item.get_id() & 1)
+        return False
+
     def add(self, cards: Union[Card, List[Card]]):
         if isinstance(cards, Card):
             self._cards.append(cards)
+            self._track(cards)
         else:
             self._cards.extend(cards)
+            for card in cards:
+                self._track(card)
 
     def pop(self, card: Card) -> Card:
-        if card in self._cards:
+        if card in self:
             self._cards.remove(card)
+            self._score -= card.get_rank()
+            self._rank_counts[card.get_rank()] -= 1
+            if self._num_duplicates and card in self._cards:
+                # Another copy of the same card is still in the hand, keep its bit set
+                self._num_duplicates -= 1
+            else:
+                self._mask &= ~(1 << card.get_id())
         return card
 
+    def clear(self):
+        super().clear()
+        self._mask = 0
+        self._score = 0
+        self._rank_counts = [0] * (len(POSSIBLE_RANK) + 1)
+        self._num_duplicates = 0
+
     def is_empty(self) -> bool:
         return len(self._cards) == 0
 
     def sort(self, key=None, reverse=False):
         self._cards.sort(key=key, reverse=reverse)
+
+    def _track(self, card: Card) -> None:
+        bit = 1 << card.get_id()
+        if self._mask & bit:
+            self._num_duplicates += 1
+        self._mask |= bit
+        self._score += card.get_rank()
+        self._rank_counts[card.get_rank()] += 1
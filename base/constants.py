@@ -8,5 +8,8 @@ class Constants:
     PLAYER_TYPE = "ai"
 
     GAME_ID_LENGTH = 20
+    MAX_RUNNING_GAMES = 10000  # Least recently used games are evicted beyond this number
+    GAME_IDLE_TTL = 900  # Seconds after which a game that is not used is evicted
+    GAME_POOL_SIZE = 256  # Number of evicted or ended games kept per player type for reuse
 
     rewards = {21: 150, 20: 70, 19: 50, 18: 20, 17: 10, 16: 5, 15: 3, 14: 2}
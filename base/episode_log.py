@@ -0,0 +1,182 @@
+"""
+Compact append-only binary log of played games.
+
+A log file starts with a fixed size header (magic, version, record layout, penalty and policy name), followed by
+fixed width records of :data:`RECORD_DTYPE`:
+
+* ``deck``: the card ids of the deck at the start of the game, in dealing order (52 uint8)
+* ``actions``: the action indexes of the game, padded with :data:`NO_ACTION` (:data:`MAX_ACTIONS` uint8)
+* ``num_actions``, ``score`` and ``flags`` (see :attr:`Player.flags`): one uint8 each
+
+A record takes 71 bytes, so a billion games take 71 GB. Records are written through a buffer and read through a
+memory map, in chunks of NumPy record arrays.
+"""
+import os
+import struct
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from base.cards.card import DECK_CARDS
+from base.players.player import player_flags
+
+MAGIC = b"BJEPLOG\x00"
+VERSION = 1
+
+NUM_DECK_CARDS = len(DECK_CARDS)
+#: the most actions a game can take: at most 11 cards can be drawn without exceeding 21, a stop ends the game
+MAX_ACTIONS = 16
+NO_ACTION = 255
+
+RECORD_DTYPE = np.dtype([
+    ("deck", np.uint8, (NUM_DECK_CARDS,)),
+    ("actions", np.uint8, (MAX_ACTIONS,)),
+    ("num_actions", np.uint8),
+    ("score", np.uint8),
+    ("flags", np.uint8),
+])
+
+# magic, version, header size, record size, max actions, penalty, policy name (utf-8, zero padded)
+_HEADER_STRUCT = struct.Struct("<8sHHHHd64s")
+HEADER_SIZE = 128
+
+
+class EpisodeLogHeader:
+
+    def __init__(self, policy: str, penalty: float = 0.0, record_size: int = RECORD_DTYPE.itemsize,
+                 max_actions: int = MAX_ACTIONS, version: int = VERSION):
+        self.policy = policy
+        self.penalty = penalty
+        self.record_size = record_size
+        self.max_actions = max_actions
+        self.version = version
+
+    def pack(self) -> bytes:
+        policy = self.policy.encode("utf-8")
+        if len(policy) > 64:
+            raise ValueError("The policy name can be at most 64 bytes long, got '{}'".format(self.policy))
+        header = _HEADER_STRUCT.pack(MAGIC, self.version, HEADER_SIZE, self.record_size, self.max_actions,
+                                     self.penalty, policy)
+        return header.ljust(HEADER_SIZE, b"\x00")
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'EpisodeLogHeader':
+        if len(data) < HEADER_SIZE or data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not an episode log")
+        magic, version, header_size, record_size, max_actions, penalty, policy = \
+            _HEADER_STRUCT.unpack_from(data)
+        if version != VERSION or header_size != HEADER_SIZE:
+            raise ValueError("Unsupported episode log version {}".format(version))
+        if record_size != RECORD_DTYPE.itemsize or max_actions != MAX_ACTIONS:
+            raise ValueError("Episode log records of {} bytes with {} actions are not supported".format(
+                record_size, max_actions))
+        return cls(policy.rstrip(b"\x00").decode("utf-8"), penalty, record_size, max_actions, version)
+
+    @classmethod
+    def read(cls, path: str) -> 'EpisodeLogHeader':
+        with open(path, 'rb') as f:
+            return cls.unpack(f.read(HEADER_SIZE))
+
+
+class EpisodeLogWriter:
+    """
+    Buffered writer of an episode log.
+
+    Opening an existing log appends to it, as long as it was written for the same policy and penalty.
+
+    :param policy: name of the policy that plays the games, e.g. the player type
+    :param penalty: the penalty for breaking the games were played with
+    :param buffer_size: number of records that are buffered before they are written to the file
+    """
+
+    def __init__(self, path: str, policy: str, penalty: float = 0.0, buffer_size: int = 4096):
+        self.path = path
+        self.header = EpisodeLogHeader(policy, penalty)
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._num_buffered = 0
+        self.num_written = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing = EpisodeLogHeader.read(path)
+            if (existing.policy, existing.penalty) != (policy, penalty):
+                raise ValueError("{} holds games of policy '{}' with penalty {}".format(
+                    path, existing.policy, existing.penalty))
+            self._file = open(path, 'r+b')
+            # Drop a partially written record left behind by an interrupted writer
+            num_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            self._file.truncate(HEADER_SIZE + num_records * RECORD_DTYPE.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(self.header.pack())
+
+    def write(self, deck: Sequence[int], actions: Sequence[int], score: int, broken: bool, stopped: bool) -> None:
+        """
+        Add a finished game to the log.
+
+        :param deck: the card ids of the deck at the start of the game, in dealing order
+        :param actions: the action indexes of the game
+        """
+        if len(actions) > MAX_ACTIONS:
+            raise ValueError("A game can have at most {} actions, got {}".format(MAX_ACTIONS, len(actions)))
+        record = self._buffer[self._num_buffered]
+        record["deck"] = deck
+        record["actions"][:len(actions)] = actions
+        record["actions"][len(actions):] = NO_ACTION
+        record["num_actions"] = len(actions)
+        record["score"] = score
+        record["flags"] = player_flags(broken, stopped)
+        self._num_buffered += 1
+        if self._num_buffered == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._num_buffered:
+            self._file.write(self._buffer[:self._num_buffered].tobytes())
+            self.num_written += self._num_buffered
+            self._num_buffered = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class EpisodeLogReader:
+    """Memory mapped reader of an episode log."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header = EpisodeLogHeader.read(path)
+        # A partially written last record is ignored
+        num_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if num_records:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(num_records,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    def iter_chunks(self, chunk_size: int = 1 << 20, start: int = 0,
+                    stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Yield the records from start to stop as record arrays of at most chunk_size records."""
+        stop = len(self.records) if stop is None else min(stop, len(self.records))
+        for chunk_start in range(start, stop, chunk_size):
+            yield self.records[chunk_start:min(stop, chunk_start + chunk_size)]
+
+    def actions(self, index: int) -> np.ndarray:
+        """Return the actions of the game with the given index, without padding."""
+        record = self.records[index]
+        return record["actions"][:record["num_actions"]]
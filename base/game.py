@@ -1,24 +1,42 @@
-from functools import partial
+import random
 from typing import List, Optional
 
-from ai.model_configs.mlp_config import MLPConfig
+from base.actions.action_service import ActionService
 from base.cards.deck import Deck
+from base.cards.deck_bank import DeckBank
+from base.episode_log import EpisodeLogWriter
 from base.constants import Constants
 from base.enums.game_phase import GamePhase
 from base.game_state import GameState
-from base.players.ai_player import AIPlayer
-from base.players.human_player import HumanPlayer
+from base.game_snapshot import GameSnapshot
 from base.players.player import Player
-from base.players.random_player import RandomPlayer
+from base.players.player_registry import PlayerRegistry
 
 
 class Game:
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, rng: Optional[random.Random] = None,
+                 deck_bank: Optional[DeckBank] = None, episode_log: Optional[EpisodeLogWriter] = None):
+        """
+        :param seed: seed of the random generator that shuffles the decks of this game
+        :param rng: random generator that shuffles the decks of this game, takes precedence over seed. If neither is
+                    given, decks are shuffled with the global :mod:`random` module
+        :param deck_bank: if given, every new game takes the next deck of this bank instead of shuffling a deck
+        :param episode_log: if given, every finished game is written to this log
+        """
+        if rng is None and seed is not None:
+            rng = random.Random(seed)
+        self.rng = rng  # type: Optional[random.Random]
+        self.deck_bank = deck_bank
+        self.deck_index = None  # type: Optional[int]
+        self.episode_log = episode_log
+        self._logged_deck = None  # type: Optional[List[int]]
+        self._logged_actions = []  # type: List[int]
         self.deck = None  # type: Optional[Deck]
         self.player = None  # type: Optional[Player]
         self.phase = None  # type: Optional[GamePhase]
         self.initialized = False
+        self._action_service = ActionService()
 
     def reset_game(self, initialize: bool = True, keep_players: bool = False) -> None:
         """
@@ -30,6 +48,7 @@ class Game:
         """
         self.phase = None
         self.deck = None
+        self.deck_index = None
         if not keep_players:
             self.player = None  # type: Optional[List[Player]]
         else:
@@ -39,7 +58,10 @@ class Game:
         if initialize:
             self.initialize_game(initialize_players=not keep_players)
 
-    def initialize_game(self, initialize_players: bool = True):
+    def initialize_game(self, initialize_players: bool = True, deck: Optional[Deck] = None):
+        """
+        :param deck: play with this deck instead of a new one
+        """
         if not self.initialized:
             # Set up game phase
             self.phase = GamePhase.PLAYER_PHASE
@@ -47,8 +69,18 @@ class Game:
             if initialize_players:
                 self._initialize_players()
             # Create new deck
-            self.deck = self._create_deck()
+            self.deck = deck if deck is not None else self._create_deck()
             self.initialized = True
+            if self.episode_log is not None:
+                self._logged_deck = self.deck.get_card_ids()
+                self._logged_actions = []
+
+    def replay_deck(self, deck_bank: DeckBank, index: int) -> None:
+        """Reset the game (keeping the players) and play it with the deck at the given index of a deck bank."""
+        keep_players = self.player is not None
+        self.reset_game(initialize=False, keep_players=keep_players)
+        self.initialize_game(initialize_players=not keep_players, deck=deck_bank.deck(index))
+        self.deck_index = index
 
     def play_single_step(self, verbose: bool = False):
         """Play a single action in the game."""
@@ -59,11 +91,26 @@ class Game:
                 self.print()
             game_phase = self.player.play_single_step(self.get_state(), verbose=verbose)
             self.phase = game_phase
+            if self.episode_log is not None:
+                self._log_action(self._action_service.action_to_idx(self.player.last_action))
+
+    def play_action_idx(self, action_idx: int) -> None:
+        """Play the action with the given index for the player, instead of letting the player choose an action."""
+        if not self.initialized:
+            raise Exception("Game not initialized")
+        self.phase = self._action_service.execute_idx(action_idx, self.player, self.deck, self.phase)
+        self.player.last_action = self._action_service.action(action_idx)
+        if self.episode_log is not None:
+            self._log_action(action_idx)
 
     def get_state(self) -> GameState:
         """Return the current GameState of this Board."""
         return GameState(self.phase, self.deck, self.player)
 
+    def snapshot(self) -> GameSnapshot:
+        """Return a compact copy of the current game for lookahead, see :class:`GameSnapshot`."""
+        return GameSnapshot.from_state(self.get_state())
+
     def is_finished(self) -> bool:
         """
         Return True if the game is finished.
@@ -72,17 +119,23 @@ class Game:
         """
         return self.player.stopped or self.player.broken
 
+    def _log_action(self, action_idx: int) -> None:
+        """Record an action of the current game, the game is written to the episode log once it is finished."""
+        self._logged_actions.append(action_idx)
+        if self.is_finished() and self._logged_deck is not None:
+            self.episode_log.write(self._logged_deck, self._logged_actions, self.player.score, self.player.broken,
+                                   self.player.stopped)
+            self._logged_deck = None
+
     def _initialize_players(self) -> None:
-        type_to_cls = {
-            "random": RandomPlayer,
-            "ai": partial(AIPlayer, config=MLPConfig()),
-            "human": HumanPlayer
-        }
-        self.player = type_to_cls.get(Constants.PLAYER_TYPE)()
-
-    @staticmethod
-    def _create_deck() -> Deck:
-        deck = Deck(with_jokers=False)
+        self.player = PlayerRegistry().create(Constants.PLAYER_TYPE)
+
+    def _create_deck(self) -> Deck:
+        if self.deck_bank is not None:
+            deck = self.deck_bank.next_deck()
+            self.deck_index = self.deck_bank.last_index
+            return deck
+        deck = Deck(with_jokers=False, rng=self.rng)
         deck.shuffle()
         return deck
 
@@ -0,0 +1,63 @@
+"""
+Compact fixed width record of a running game, for saving and restoring games in bulk.
+
+A record of :data:`GAME_RECORD_DTYPE` holds the card ids of the remaining deck in dealing order and of the hand (both
+padded with :data:`NO_CARD`), the game phase, the broken/stopped flags of the player and the index of the player type
+in a table that is stored with the records. Players are recreated from their type (AI players through the
+:class:`ModelRegistry`), so models are referenced by name and never serialized.
+"""
+from typing import List
+
+import numpy as np
+
+from base.cards.card import Card, DECK_CARDS, JOKER_ID
+from base.cards.deck import Deck
+from base.enums.game_phase import GamePhase
+from base.game import Game
+from base.players.player import BROKEN_FLAG, STOPPED_FLAG, Player
+
+#: the most cards a deck or hand can hold: the deck cards and two jokers
+MAX_CARDS = len(DECK_CARDS) + 2
+NO_CARD = 255
+
+GAME_RECORD_DTYPE = np.dtype([
+    ("deck", np.uint8, (MAX_CARDS,)),
+    ("hand", np.uint8, (MAX_CARDS,)),
+    ("num_deck", np.uint8),
+    ("num_hand", np.uint8),
+    ("phase", np.uint8),
+    ("flags", np.uint8),
+    ("player_type", np.uint8),
+])
+
+
+def write_game_record(game: Game, record: np.void, player_type_index: int) -> None:
+    """Write an initialized game into a record of :data:`GAME_RECORD_DTYPE`."""
+    deck = game.deck.get_card_ids()
+    hand = [card.get_id() for card in game.player.hand.get_raw_cards()]
+    record["deck"][:len(deck)] = deck
+    record["deck"][len(deck):] = NO_CARD
+    record["hand"][:len(hand)] = hand
+    record["hand"][len(hand):] = NO_CARD
+    record["num_deck"] = len(deck)
+    record["num_hand"] = len(hand)
+    record["phase"] = game.phase.value
+    record["flags"] = game.player.flags
+    record["player_type"] = player_type_index
+
+
+def read_game_record(record: np.void, player: Player) -> Game:
+    """Recreate the game of a record, played by the given (new or reset) player."""
+    hand = [DECK_CARDS[card_id] if card_id < JOKER_ID else Card.from_id(card_id)
+            for card_id in record["hand"][:record["num_hand"]].tolist()]  # type: List[Card]
+    # The cards in the hand were dealt from this deck
+    deck = Deck.from_card_ids(record["deck"][:record["num_deck"]].tolist(), in_play_cards=hand)
+    player.hand.add(hand)
+    flags = int(record["flags"])
+    player.broken = bool(flags & BROKEN_FLAG)
+    player.stopped = bool(flags & STOPPED_FLAG)
+    game = Game()
+    game.player = player
+    game.initialize_game(initialize_players=False, deck=deck)
+    game.phase = GamePhase(int(record["phase"]))
+    return game
@@ -0,0 +1,120 @@
+"""
+Compact, immutable snapshot of a single player game for lookahead.
+
+A snapshot holds four integers: the composition of the remaining deck (the number of cards left of every rank, packed
+in 3 bits per rank), the bitmask of the card ids in the hand, the score and the broken/stopped flags. Every transition
+returns a new snapshot in O(1), so cloning is free and undoing a move is dropping the new snapshot.
+"""
+from typing import TYPE_CHECKING
+
+from base.cards.card import DECK_CARDS
+from base.players.player import BROKEN_FLAG, STOPPED_FLAG
+from base.utils.card_constants import POSSIBLE_RANK
+from base.utils.rank_counts import NUM_RANKS, NUM_SUITS, RANK_COUNT_MASK, RANK_COUNTS_BITS, pack_rank_counts, rank_shift
+
+if TYPE_CHECKING:
+    from base.game import Game
+    from base.game_state import GameState
+
+_SCORE_SHIFT = RANK_COUNTS_BITS
+_FLAGS_SHIFT = _SCORE_SHIFT + 8
+
+
+class GameSnapshot:
+    """
+    The remaining deck composition, hand, score and flags of a game.
+
+    The order of the remaining cards is not part of a snapshot: a lookahead only knows which cards are left, so
+    :meth:`draw_rank` draws a card of a given rank instead of the next card of the deck.
+    """
+
+    __slots__ = ('deck_counts', 'hand_mask', 'score', 'flags')
+
+    def __init__(self, deck_counts: int, hand_mask: int = 0, score: int = 0, flags: int = 0):
+        self.deck_counts = deck_counts
+        self.hand_mask = hand_mask
+        self.score = score
+        self.flags = flags
+
+    @classmethod
+    def from_state(cls, game_state: 'GameState') -> 'GameSnapshot':
+        """Take a snapshot of the deck and the player of a game state (jokers in the deck are ignored)."""
+        player = game_state.player
+        return cls(pack_rank_counts(game_state.deck.rank_counts()), player.hand.get_mask(), player.score, player.flags)
+
+    @classmethod
+    def from_game(cls, game: 'Game') -> 'GameSnapshot':
+        return cls.from_state(game.get_state())
+
+    @property
+    def key(self) -> int:
+        """
+        Integer key of the position, for transposition tables.
+
+        The hand itself is left out: two hands with the same score drawn from the same remaining deck have the same
+        future, whatever the suits of their cards.
+        """
+        return self.deck_counts | self.score << _SCORE_SHIFT | self.flags << _FLAGS_SHIFT
+
+    @property
+    def broken(self) -> bool:
+        return bool(self.flags & BROKEN_FLAG)
+
+    @property
+    def stopped(self) -> bool:
+        return bool(self.flags & STOPPED_FLAG)
+
+    def is_finished(self) -> bool:
+        return self.flags != 0
+
+    def num_left(self, rank: int) -> int:
+        """Return the number of cards of the given rank left in the deck."""
+        return self.deck_counts >> rank_shift(rank) & RANK_COUNT_MASK
+
+    def num_cards_left(self) -> int:
+        return sum(self.num_left(rank) for rank in POSSIBLE_RANK)
+
+    def clone(self) -> 'GameSnapshot':
+        return GameSnapshot(self.deck_counts, self.hand_mask, self.score, self.flags)
+
+    def draw_card(self, card_id: int) -> 'GameSnapshot':
+        """Return the snapshot after drawing the card with the given id."""
+        return self._draw(DECK_CARDS[card_id].get_rank(), card_id)
+
+    def draw_rank(self, rank: int) -> 'GameSnapshot':
+        """Return the snapshot after drawing a card of the given rank, which must be left in the deck."""
+        # The hand gets the card of the first suit it does not hold yet
+        card_id = rank - 1
+        while self.hand_mask >> card_id & 1 and card_id < NUM_SUITS * NUM_RANKS - NUM_RANKS:
+            card_id += NUM_RANKS
+        return self._draw(rank, card_id)
+
+    def stop(self) -> 'GameSnapshot':
+        """Return the snapshot after the player stops."""
+        return GameSnapshot(self.deck_counts, self.hand_mask, self.score, self.flags | STOPPED_FLAG)
+
+    def _draw(self, rank: int, card_id: int) -> 'GameSnapshot':
+        if not self.num_left(rank):
+            raise ValueError("No card of rank {} is left in the deck".format(rank))
+        score = self.score + rank
+        # Same rules as RequestCardAction: reaching 21 stops the player, exceeding it breaks them
+        flags = self.flags
+        if score == 21:
+            flags |= STOPPED_FLAG
+        elif score > 21:
+            flags |= BROKEN_FLAG
+        return GameSnapshot(self.deck_counts - (1 << rank_shift(rank)), self.hand_mask | 1 << card_id, score, flags)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameSnapshot):
+            return NotImplemented
+        return (self.deck_counts, self.hand_mask, self.score, self.flags) == \
+            (other.deck_counts, other.hand_mask, other.score, other.flags)
+
+    def __hash__(self):
+        return hash((self.deck_counts, self.hand_mask, self.score, self.flags))
+
+    def __repr__(self):
+        counts = [self.num_left(rank) for rank in POSSIBLE_RANK]
+        return "GameSnapshot(deck={}, hand={:#x}, score={}, flags={})".format(counts, self.hand_mask, self.score,
+                                                                             self.flags)
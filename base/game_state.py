@@ -1,44 +1,136 @@
-from typing import List, TYPE_CHECKING, Union
+from typing import List, TYPE_CHECKING, Union, Optional, Sequence
 
 import numpy as np
 
 from base.cards.card_encoder import CardEncoder
 from base.cards.deck import Deck
 from base.enums.game_phase import GamePhase
+from base.utils.instrumentation import timed
+from base.utils.rank_counts import NUM_RANKS, RANK_COUNTS_BITS, pack_rank_counts
 
 if TYPE_CHECKING:
     from base.players.player import Player
 
 
+#: one-hot encoding of the exact cards in the hand, see :meth:`GameState.encode`
+CARD_ENCODING = "cards"
+#: suit-symmetric encoding of the ranks in the hand and the deck, see :meth:`GameState.encode_ranks`
+RANK_ENCODING = "ranks"
+STATE_ENCODINGS = (CARD_ENCODING, RANK_ENCODING)
+
+
 class GameState:
     """
     The full current state of the game.
     The game state contains all necessary information for a player to determine the next action.
     """
 
-    SIZE = 56  # Total number of integers required to represent the game state
+    HAND_SIZE = 54  # Number of integers in the hand encoding (empty set of cards, 52 cards and the joker)
+    SIZE = HAND_SIZE + 1  # Total number of integers required to represent the game state
+    # Number of integers in the rank encoding: cards per rank in the hand and in the deck, and the score
+    RANKS_SIZE = 2 * NUM_RANKS + 1
 
     def __init__(self, phase: GamePhase, deck: Deck, player: 'Player'):
         self.phase = phase
         self.deck = deck
         self.player = player
 
-    def create_numeral_representation(self, player: 'Player', as_array: bool = True) -> Union[List[int], np.array]:
+    @timed("game_state.create_numeral_representation")
+    def create_numeral_representation(self, player: 'Player', as_array: bool = True,
+                                      out: Optional[np.ndarray] = None,
+                                      encoding: str = CARD_ENCODING) -> Union[List[int], np.array]:
         """
         Create a numerical representation of (a subset of) the game state for the specified player.
 
         This representation only contains information that is accessible to the specified player.
+
+        :param player: the player to create the representation for
+        :param as_array: if True, return a float32 array instead of a list
+        :param out: optional preallocated float32 array of length :meth:`state_size` to write the representation into
+        :param encoding: :data:`CARD_ENCODING` or :data:`RANK_ENCODING`
+        """
+        if encoding == RANK_ENCODING:
+            representation = self.encode_ranks(player, self.deck, out=out)
+            return representation if as_array else representation.tolist()
+        if not as_array:
+            representation = []
+            representation.extend(self._hand_representation(player=player))
+            representation.extend(self._score_representation(player=player))
+            return representation
+        return self.encode(player, out=out)
+
+    @classmethod
+    def encode_batch(cls, players: Sequence['Player'], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Create the numerical representation for every given player at once.
+
+        :param players: the players to encode, one row per player
+        :param out: optional preallocated float32 array of shape (N, :attr:`SIZE`) to write the representations into
+        :return: a float32 array of shape (N, :attr:`SIZE`)
         """
-        representation = []
-        representation.extend(self._hand_representation(player=player))
-        representation.extend(self._score_representation(player=player))
-        if as_array:
-            representation = np.array(representation, dtype=np.float32)
-        return representation
+        if out is None:
+            out = np.empty((len(players), cls.SIZE), dtype=np.float32)
+        masks = np.fromiter((player.hand.get_mask() for player in players), dtype=np.uint64, count=len(players))
+        CardEncoder().encode_masks(masks, out=out[:, :cls.HAND_SIZE])
+        out[:, cls.HAND_SIZE] = [player.score for player in players]
+        return out
+
+    @timed("game_state.encode")
+    @classmethod
+    def encode(cls, player: 'Player', out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Same as :meth:`create_numeral_representation`, without creating a GameState."""
+        if out is None:
+            out = np.empty(cls.SIZE, dtype=np.float32)
+        cls._encode_into(player, out)
+        return out
+
+    @staticmethod
+    def state_size(encoding: str = CARD_ENCODING) -> int:
+        """Return the number of integers in the representation of the given encoding."""
+        if encoding == CARD_ENCODING:
+            return GameState.SIZE
+        if encoding == RANK_ENCODING:
+            return GameState.RANKS_SIZE
+        raise ValueError("Unknown state encoding '{}', expected one of {}".format(encoding, STATE_ENCODINGS))
+
+    @timed("game_state.encode_ranks")
+    @staticmethod
+    def encode_ranks(player: 'Player', deck: Deck, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Create the suit-symmetric representation of the state of a player: the number of cards of every rank in the
+        hand, the number of cards of every rank left in the deck and the score.
+
+        The rewards and the dynamics of the game only depend on the ranks, so states that only differ in the suits of
+        the cards have the same representation. Both counts are maintained incrementally by the hand and the deck.
+
+        :param out: optional preallocated float32 array of length :attr:`RANKS_SIZE` to write the representation into
+        """
+        if out is None:
+            out = np.empty(GameState.RANKS_SIZE, dtype=np.float32)
+        # Index 0 of both counts holds the jokers, which are left out
+        out[:] = player.hand.get_rank_counts()[1:] + deck.rank_counts()[1:] + [player.score]
+        return out
+
+    @staticmethod
+    def canonical_key(player: 'Player', deck: Deck) -> int:
+        """
+        Return an integer key that is equal for two states if and only if their :meth:`encode_ranks` representations
+        are equal, e.g. to share cache entries between suit-isomorphic states.
+
+        The score is the sum of the ranks in the hand, so only the counts are packed, the deck's above the hand's (see
+        :func:`base.utils.rank_counts.pack_rank_counts`). Jokers are left out like in :meth:`encode_ranks`.
+        """
+        hand_counts = pack_rank_counts(player.hand.get_rank_counts())
+        return pack_rank_counts(deck.rank_counts()) << RANK_COUNTS_BITS | hand_counts
+
+    @staticmethod
+    def _encode_into(player: 'Player', out: np.ndarray) -> None:
+        CardEncoder().encode(player.hand.get_raw_cards(), out=out[:GameState.HAND_SIZE])
+        out[GameState.HAND_SIZE] = player.score
 
     @staticmethod
     def _hand_representation(player: 'Player'):
-        return list(CardEncoder().encode(player.hand.get_raw_cards()))
+        return CardEncoder().encode(player.hand.get_raw_cards()).tolist()
 
     @staticmethod
     def _score_representation(player: 'Player'):
@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING
 
 import numpy as np
 
+from ai.inference_service import InferenceService
+from ai.model_registry import ModelRegistry
 from ai.model_configs.mlp_config import MLPConfig
 from base.actions.action_service import ActionService
 from base.game_state import GameState
@@ -16,18 +18,32 @@ class AIPlayer(Player):
     def __init__(self, config: MLPConfig):
         super().__init__()
         self.action_service = ActionService()
-        self.model = config.load_model()
+        if config.use_inference_service:
+            # Decisions are batched with those of other AI players in a service that holds the model
+            self.inference_service = InferenceService.for_config(config)
+            self.model = self.inference_service.model
+        else:
+            self.inference_service = None
+            # Shared by all players of the same model, and reloaded when its checkpoint changes
+            self.model = ModelRegistry().get(config)
+        self.state_encoding = config.state_encoding
+        self._state_buffer = np.empty((1, config.num_states), dtype=np.float32)
 
     def _predict(self, game_state: 'GameState'):
-        return self.model.predict({"state": np.atleast_2d(game_state.create_numeral_representation(self))})
+        game_state.create_numeral_representation(self, out=self._state_buffer[0], encoding=self.state_encoding)
+        return self.model.predict({"state": self._state_buffer})
 
     @property
     def is_human(self):
         return False
 
     def _choose_action(self, game_state: 'GameState', verbose: bool = False) -> 'Action':
+        mask = self.action_service.get_mask(self, game_state.phase)
+        if self.inference_service is not None:
+            game_state.create_numeral_representation(self, out=self._state_buffer[0], encoding=self.state_encoding)
+            action_idx = self.inference_service.choose_action(self._state_buffer[0], mask)
+            return self.action_service.idx_to_action(action_idx)
         predictions = self._predict(game_state=game_state)
-        mask = self.action_service.get_valid_actions_mask(self, game_state)
         proper_predictions = predictions * np.atleast_2d(mask)
         masked_predictions = np.atleast_2d(np.logical_not(mask) * (np.min(predictions) - 1))
         predictions = proper_predictions + masked_predictions
@@ -0,0 +1,36 @@
+from typing import Optional, TYPE_CHECKING
+
+from ai.optimal_solver import OptimalPolicy, default_policy, hand_key
+from base.actions.action_service import ActionService
+from base.players.player import Player
+
+if TYPE_CHECKING:
+    from base.game_state import GameState
+    from base.actions.action import Action
+
+
+class OptimalPlayer(Player):
+    """
+    Player that looks up every decision in an exact :class:`OptimalPolicy` table.
+
+    If no policy is given, the policy that maximizes the expected :attr:`Constants.rewards` is used, see
+    :func:`default_policy`.
+    """
+
+    def __init__(self, policy: Optional[OptimalPolicy] = None):
+        super().__init__()
+        self.action_service = ActionService()
+        self.policy = policy if policy is not None else default_policy()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'OptimalPlayer':
+        return cls(OptimalPolicy.load(path))
+
+    @property
+    def is_human(self):
+        return False
+
+    def _choose_action(self, game_state: 'GameState', verbose: bool = False) -> 'Action':
+        # Index 0 of the counts holds the jokers, which the solver does not know
+        key = hand_key(self.hand.get_rank_counts()[1:])
+        return self.action_service.idx_to_action(self.policy.action_idx(key))
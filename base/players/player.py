@@ -1,5 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 from base.cards.hand import Hand
 from base.enums.game_phase import GamePhase
@@ -8,6 +8,14 @@ if TYPE_CHECKING:
     from base.game_state import GameState
     from base.actions.action import Action
 
+#: bits of :attr:`Player.flags`, shared by the compact formats that store players (snapshots, records, logs)
+BROKEN_FLAG = 1
+STOPPED_FLAG = 2
+
+
+def player_flags(broken: bool, stopped: bool) -> int:
+    return BROKEN_FLAG * broken | STOPPED_FLAG * stopped
+
 
 class Player(metaclass=ABCMeta):
 
@@ -15,6 +23,7 @@ class Player(metaclass=ABCMeta):
         self.hand = Hand()  # type: Hand
         self.broken = False
         self.stopped = False
+        self.last_action = None  # type: Optional[Action]
 
     @property
     @abstractmethod
@@ -23,7 +32,12 @@ class Player(metaclass=ABCMeta):
 
     @property
     def score(self) -> float:
-        return sum([card.get_rank() for card in self.hand])
+        return self.hand.score
+
+    @property
+    def flags(self) -> int:
+        """The broken and stopped state as :data:`BROKEN_FLAG` and :data:`STOPPED_FLAG` bits."""
+        return player_flags(self.broken, self.stopped)
 
     @abstractmethod
     def _choose_action(self, game_state: 'GameState', verbose: bool = False) -> 'Action':
@@ -36,7 +50,7 @@ class Player(metaclass=ABCMeta):
         raise NotImplementedError
 
     def reset(self):
-        self.hand = Hand()
+        self.hand.clear()
         self.stopped = False
         self.broken = False
 
@@ -52,6 +66,7 @@ class Player(metaclass=ABCMeta):
         if verbose:
             print("Executing {}".format(action))
         new_phase = action.execute(self, game_state.deck, game_state.phase)
+        self.last_action = action
         return new_phase
 
     def num_cards(self) -> int:
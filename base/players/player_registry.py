@@ -0,0 +1,66 @@
+from typing import Callable, Dict, List, TYPE_CHECKING
+
+from base.utils.singleton import Singleton
+
+if TYPE_CHECKING:
+    from base.players.player import Player
+
+
+def _create_random_player() -> 'Player':
+    from base.players.random_player import RandomPlayer
+    return RandomPlayer()
+
+
+def _create_human_player() -> 'Player':
+    from base.players.human_player import HumanPlayer
+    return HumanPlayer()
+
+
+def _create_optimal_player() -> 'Player':
+    from ai.optimal_solver import default_policy
+    from base.players.optimal_player import OptimalPlayer
+    # Every game gets a new player, the table is solved once and shared between them
+    return OptimalPlayer(default_policy())
+
+
+def _create_search_player() -> 'Player':
+    from base.players.search_player import SearchPlayer
+    return SearchPlayer()
+
+
+def _create_ai_player() -> 'Player':
+    # TensorFlow is only imported here, so games without AI players never pay for it
+    from ai.model_configs.mlp_config import MLPConfig
+    from base.players.ai_player import AIPlayer
+    return AIPlayer(config=MLPConfig())
+
+
+class PlayerRegistry(metaclass=Singleton):
+    """
+    Registry of the available player types.
+
+    Every player type maps onto a factory that imports the player class when it is called, so the (heavy)
+    dependencies of a player type are only loaded when a player of that type is actually created.
+    """
+
+    def __init__(self):
+        self._factories = {}  # type: Dict[str, Callable[[], 'Player']]
+        self.register("random", _create_random_player)
+        self.register("ai", _create_ai_player)
+        self.register("human", _create_human_player)
+        self.register("optimal", _create_optimal_player)
+        self.register("search", _create_search_player)
+
+    def register(self, player_type: str, factory: Callable[[], 'Player']) -> None:
+        """Register a factory that creates a new player of the given type."""
+        self._factories[player_type] = factory
+
+    def get_player_types(self) -> List[str]:
+        return list(self._factories.keys())
+
+    def create(self, player_type: str) -> 'Player':
+        """Create a new player of the given type."""
+        if player_type not in self._factories:
+            raise ValueError("Unknown player type '{}', expected one of {}".format(
+                player_type, self.get_player_types()))
+        return self._factories[player_type]()
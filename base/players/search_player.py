@@ -0,0 +1,128 @@
+from typing import Dict, Tuple, TYPE_CHECKING
+
+from ai.optimal_solver import OptimalSolver, CONSTANTS_REWARD
+from base.actions.action_service import ActionService, REQUEST_CARD, STOP
+from base.game_snapshot import GameSnapshot
+from base.players.player import Player
+from base.utils.card_constants import POSSIBLE_RANK
+
+if TYPE_CHECKING:
+    from base.game_state import GameState
+    from base.actions.action import Action
+
+#: search depth of transposition table entries whose value does not depend on the depth limit
+EXACT_DEPTH = 1 << 30
+
+
+class SearchPlayer(Player):
+    """
+    Player that decides by depth-limited expectimax over the rank of the next card.
+
+    Every decision is searched with iterative deepening on :class:`GameSnapshot` positions until ``max_depth`` draws
+    are looked ahead, the tree is solved exactly or ``node_budget`` nodes are expanded. Positions past the depth
+    limit or the budget are valued as if the player stops there. The transposition table is kept between decisions,
+    so positions that were solved before cost a single lookup.
+
+    :param max_depth: number of draws to look ahead at most
+    :param node_budget: number of nodes a single decision may expand, trades decision latency against play quality
+    :param reward_mode: reward model of :class:`OptimalSolver` to maximize
+    :param penalty: the reward for exceeding 21
+    :param table_size: number of positions after which the transposition table is cleared
+    """
+
+    def __init__(self, max_depth: int = 11, node_budget: int = 5000, reward_mode: str = CONSTANTS_REWARD,
+                 penalty: float = 0, gamma: float = 1.0, table_size: int = 1 << 20):
+        super().__init__()
+        self.action_service = ActionService()
+        self.max_depth = max_depth
+        self.node_budget = node_budget
+        self.table_size = table_size
+        self._rewards = OptimalSolver(reward_mode, penalty, gamma)
+        self.penalty = penalty
+        self.gamma = gamma
+        # position key -> (searched depth, action index, value)
+        self._table = {}  # type: Dict[int, Tuple[int, int, float]]
+        self._num_nodes = 0
+        self._cutoff = False
+        self._budget_exhausted = False
+        self.last_num_nodes = 0  # Nodes expanded by the last decision
+        self.last_depth = 0  # Depth of the last completed search of the last decision
+
+    @property
+    def is_human(self):
+        return False
+
+    def _choose_action(self, game_state: 'GameState', verbose: bool = False) -> 'Action':
+        action_idx, value = self.search(GameSnapshot.from_state(game_state))
+        if verbose:
+            print("Searched {} nodes to depth {}, expected value {:.3f}".format(self.last_num_nodes, self.last_depth,
+                                                                               value))
+        return self.action_service.idx_to_action(action_idx)
+
+    def search(self, snapshot: GameSnapshot) -> Tuple[int, float]:
+        """Return the best action index and its expected value in the given position."""
+        if len(self._table) > self.table_size:
+            self._table.clear()
+        self._num_nodes = 0
+        self._budget_exhausted = False
+        best = STOP, self._rewards.stop_reward(snapshot.score)
+        for depth in range(1, self.max_depth + 1):
+            self._cutoff = False
+            value = self._value(snapshot, depth)
+            entry = self._table.get(snapshot.key)
+            if entry is None or entry[0] < depth:
+                # The budget ran out before the root was completed, keep the result of the previous depth
+                break
+            best = entry[1], value
+            self.last_depth = depth
+            if not self._cutoff or self._budget_exhausted:
+                break
+        self.last_num_nodes = self._num_nodes
+        return best
+
+    def clear_table(self) -> None:
+        self._table.clear()
+
+    def _value(self, snapshot: GameSnapshot, depth: int) -> float:
+        key = snapshot.key
+        entry = self._table.get(key)
+        if entry is not None and entry[0] >= depth:
+            if entry[0] != EXACT_DEPTH:
+                self._cutoff = True
+            return entry[2]
+        stop_value = self._rewards.stop_reward(snapshot.score)
+        num_left = snapshot.num_cards_left()
+        if not num_left:
+            return stop_value
+        if depth == 0 or self._num_nodes >= self.node_budget:
+            self._cutoff = True
+            self._budget_exhausted = self._budget_exhausted or depth > 0
+            return stop_value
+        self._num_nodes += 1
+        outer_cutoff, self._cutoff = self._cutoff, False
+        draw_value = 0.0
+        can_break = False
+        for rank in POSSIBLE_RANK:
+            left = snapshot.num_left(rank)
+            if not left:
+                continue
+            new_score = snapshot.score + rank
+            if new_score > 21:
+                value = self.penalty
+                can_break = True
+            elif new_score == 21:
+                value = self._rewards.draw_reward(new_score)
+            else:
+                next_value = self._value(snapshot.draw_rank(rank), depth - 1)
+                value = self._rewards.draw_reward(new_score) + self.gamma * next_value
+            draw_value += left / num_left * value
+        # On a tie (e.g. when every draw is cut off) it is safe to draw if no card can break the player
+        if draw_value > stop_value or (draw_value == stop_value and not can_break):
+            action_idx, value = REQUEST_CARD, draw_value
+        else:
+            action_idx, value = STOP, stop_value
+        # Values cut off by the budget depend on the order of the search, they are not stored
+        if not self._budget_exhausted:
+            self._table[key] = (depth if self._cutoff else EXACT_DEPTH, action_idx, value)
+        self._cutoff = outer_cutoff or self._cutoff
+        return value
@@ -0,0 +1,184 @@
+"""
+Named timers and counters for the hot paths of the game and the training loop.
+
+Methods are instrumented with the :func:`timed` decorator. While the instrumentation is disabled the decorator leaves
+the original method in place, so instrumented code runs at full speed. Enabling the instrumentation swaps timing
+wrappers into the classes, disabling it puts the original methods back.
+"""
+import functools
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from base.utils.singleton import Singleton
+
+
+class TimerStats:
+    """Number of calls and total (inclusive) time spent in a timer."""
+
+    __slots__ = ("count", "total_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "total_seconds": self.total_seconds,
+                "mean_us": self.total_seconds / self.count * 1e6 if self.count else 0.0}
+
+
+class _Timer:
+    """Context manager that adds the time spent in its block to a timer."""
+
+    __slots__ = ("_stats", "_start")
+
+    def __init__(self, stats: TimerStats):
+        self._stats = stats
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._stats.add(time.perf_counter() - self._start)
+        return False
+
+
+class _NullTimer:
+    """Context manager used while the instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation(metaclass=Singleton):
+    """Process wide registry of the timers and counters."""
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}  # type: Dict[str, TimerStats]
+        self.counters = {}  # type: Dict[str, int]
+        # (class, attribute name, original attribute, timer name) of every method decorated with timed()
+        self._methods = []  # type: List[Tuple[type, str, object, str]]
+        self._start_time = time.perf_counter()
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        for owner, name, original, timer_name in self._methods:
+            setattr(owner, name, _timed_attribute(original, self.get_timer(timer_name)))
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, name, original, _ in self._methods:
+            setattr(owner, name, original)
+
+    def reset(self) -> None:
+        """Clear all timers and counters (the timers of instrumented methods keep being updated)."""
+        for stats in self.timers.values():
+            stats.count, stats.total_seconds = 0, 0.0
+        self.counters.clear()
+        self._start_time = time.perf_counter()
+
+    def get_timer(self, name: str) -> TimerStats:
+        if name not in self.timers:
+            self.timers[name] = TimerStats()
+        return self.timers[name]
+
+    def timer(self, name: str):
+        """Return a context manager that times its block under the given name (a no-op while disabled)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.get_timer(name))
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> Dict[str, object]:
+        """Return the timers (with their share of the wall time since the last reset) and the counters."""
+        wall_seconds = time.perf_counter() - self._start_time
+        timers = {}
+        for name, stats in sorted(self.timers.items()):
+            if stats.count:
+                timers[name] = stats.to_dict()
+                timers[name]["wall_fraction"] = stats.total_seconds / wall_seconds if wall_seconds else 0.0
+        return {"wall_seconds": wall_seconds, "timers": timers, "counters": dict(self.counters)}
+
+    def write_summary(self, summary_writer, step: int) -> None:
+        """Write the time, wall time share and number of calls of every timer and the counters to TensorBoard."""
+        import tensorflow as tf
+        report = self.report()
+        with summary_writer.as_default():
+            for name, stats in report["timers"].items():
+                tf.summary.scalar("time/{} (s)".format(name), stats["total_seconds"], step=step)
+                tf.summary.scalar("time fraction/{}".format(name), stats["wall_fraction"], step=step)
+                tf.summary.scalar("calls/{}".format(name), stats["count"], step=step)
+            for name, value in report["counters"].items():
+                tf.summary.scalar("counters/{}".format(name), value, step=step)
+
+    def write_json(self, path: str, extra: Optional[Dict[str, object]] = None) -> None:
+        """Write :meth:`report`, extended with the given values, to a JSON file."""
+        report = self.report()
+        report.update(extra or {})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def _timed_attribute(attribute, stats: TimerStats):
+    """Wrap a function, classmethod or staticmethod so every call is added to the given timer."""
+    if isinstance(attribute, (classmethod, staticmethod)):
+        return type(attribute)(_timed_attribute(attribute.__func__, stats))
+    perf_counter = time.perf_counter
+
+    @functools.wraps(attribute)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return attribute(*args, **kwargs)
+        finally:
+            stats.add(perf_counter() - start)
+    return wrapper
+
+
+class _TimedMethod:
+    """Placeholder that registers a method with the instrumentation when its class is created."""
+
+    def __init__(self, attribute, timer_name: str):
+        self.attribute = attribute
+        self.timer_name = timer_name
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        instrumentation = Instrumentation()
+        instrumentation._methods.append((owner, name, self.attribute, self.timer_name))
+        if instrumentation.enabled:
+            setattr(owner, name, _timed_attribute(self.attribute, instrumentation.get_timer(self.timer_name)))
+        else:
+            setattr(owner, name, self.attribute)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator that times every call of a method under the given name while the instrumentation is enabled.
+
+    Must be the outermost decorator of a method in a class body, it also accepts classmethods and staticmethods.
+    """
+    def decorator(attribute):
+        return _TimedMethod(attribute, name)
+    return decorator
@@ -0,0 +1,38 @@
+"""
+Packing of per-rank card counts into a single integer, 3 bits per rank with the ace in the lowest bits.
+
+Shared by the deck composition of :class:`base.game_snapshot.GameSnapshot` and the canonical keys of
+:class:`base.game_state.GameState`.
+"""
+from typing import Sequence
+
+from base.utils.card_constants import POSSIBLE_RANK, POSSIBLE_SUIT
+
+NUM_RANKS = len(POSSIBLE_RANK)
+NUM_SUITS = len(POSSIBLE_SUIT)
+#: bits used for the number of cards of a single rank
+RANK_COUNT_BITS = 3
+RANK_COUNT_MASK = (1 << RANK_COUNT_BITS) - 1
+#: bits used for the counts of all the ranks
+RANK_COUNTS_BITS = NUM_RANKS * RANK_COUNT_BITS
+
+
+def rank_shift(rank: int) -> int:
+    """Return the position of the count of a rank in packed counts."""
+    return (rank - 1) * RANK_COUNT_BITS
+
+
+def pack_rank_counts(counts: Sequence[int]) -> int:
+    """
+    Pack the number of cards of every rank into an integer.
+
+    :param counts: the counts indexed by rank, index 0 (the jokers) is left out
+    """
+    packed = 0
+    for rank in POSSIBLE_RANK:
+        count = counts[rank]
+        if count > RANK_COUNT_MASK:
+            raise ValueError("At most {} cards of a rank can be packed, got {} of rank {}".format(
+                RANK_COUNT_MASK, count, rank))
+        packed |= count << rank_shift(rank)
+    return packed
@@ -0,0 +1,59 @@
+"""Action objects against integer action codes in ControlledGame, both must play exactly the same games."""
+import random
+import time
+
+from ai.controlled_game import ControlledGame
+from base.actions.action_service import ActionService, REQUEST_CARD, STOP
+
+
+def play_objects(game: ControlledGame, actions) -> None:
+    game.reset_game()
+    for action_idx in actions:
+        if game.is_finished():
+            break
+        ActionService().get_valid_actions_mask(game.player, game.get_state())
+        game.play_action(ActionService().idx_to_action(action_idx))
+
+
+def play_codes(game: ControlledGame, actions) -> None:
+    game.reset_game()
+    for action_idx in actions:
+        if game.is_finished():
+            break
+        game.get_current_actions_mask()
+        game.play_action_idx(action_idx)
+
+
+def check_parity(num_games: int = 500) -> None:
+    rng = random.Random(0)
+    for i in range(num_games):
+        actions = [REQUEST_CARD] * rng.randint(0, 6) + [STOP]
+        games = [ControlledGame(seed=i), ControlledGame(seed=i)]
+        play_objects(games[0], actions)
+        play_codes(games[1], actions)
+        old, new = games
+        assert old.player.hand.get_raw_cards() == new.player.hand.get_raw_cards()
+        assert (old.player.broken, old.player.stopped) == (new.player.broken, new.player.stopped)
+        assert old.phase == new.phase and old.player.last_action == new.player.last_action
+        assert old.get_current_actions_mask().tolist() == \
+            ActionService().get_valid_actions_mask(new.player, new.get_state())
+
+
+def bench(play, num_games: int) -> float:
+    game = ControlledGame(seed=0)
+    actions = [REQUEST_CARD, REQUEST_CARD, STOP]
+    start = time.perf_counter()
+    for _ in range(num_games):
+        play(game, actions)
+    return num_games / (time.perf_counter() - start)
+
+
+def main(num_games: int = 20000):
+    check_parity()
+    print("Parity OK")
+    print("{:<20} {:>10,.0f} games/s".format("Action objects", bench(play_objects, num_games)))
+    print("{:<20} {:>10,.0f} games/s".format("Action codes", bench(play_codes, num_games)))
+
+
+if __name__ == '__main__':
+    main()
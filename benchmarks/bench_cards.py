@@ -0,0 +1,85 @@
+"""Memory and throughput benchmark of the interned Card table against the original dict-backed Card."""
+import random
+import sys
+import timeit
+import tracemalloc
+
+from base.cards.card import Card
+from base.cards.deck import Deck
+from base.utils.card_constants import POSSIBLE_SUIT, POSSIBLE_RANK, HEARTS, SPADES, DIAMONDS
+
+
+class LegacyCard(object):
+    """The original Card: validated on every construction, dict-backed, hashed and ordered through its suit string."""
+
+    def __init__(self, rank, suit):
+        suit = suit.lower()
+        if suit in POSSIBLE_SUIT:
+            self._suit = suit
+            if rank in POSSIBLE_RANK:
+                self._rank = rank
+            else:
+                raise ValueError(rank)
+        else:
+            raise ValueError(suit)
+
+    def _key(self):
+        return self._rank, self._suit
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self._key() == other._key()
+
+    def __lt__(self, other):
+        if self._suit == other._suit:
+            return self._rank < other._rank
+        for suit in [HEARTS, SPADES, DIAMONDS]:
+            if self._suit == suit:
+                return True
+            if other._suit == suit:
+                return False
+        return False
+
+
+def legacy_deck():
+    return [LegacyCard(rank, suit) for suit in POSSIBLE_SUIT for rank in POSSIBLE_RANK]
+
+
+def allocated_bytes(fn, number: int) -> int:
+    """Return the number of bytes still allocated after creating `number` objects with fn."""
+    tracemalloc.start()
+    kept = [fn() for _ in range(number)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main(number: int = 10000):
+    legacy_card = LegacyCard(1, HEARTS)
+    card = Card(1, HEARTS)
+    print("size per card: legacy {} bytes, interned {} bytes (shared by every deck)".format(
+        sys.getsizeof(legacy_card) + sys.getsizeof(legacy_card.__dict__), sys.getsizeof(card)))
+
+    print("memory for {} decks: legacy {:,} bytes, interned {:,} bytes".format(
+        number, allocated_bytes(legacy_deck, number), allocated_bytes(lambda: Deck(with_jokers=False), number)))
+
+    for name, fn in [("legacy deck", legacy_deck), ("interned deck", lambda: Deck(with_jokers=False))]:
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print("{:<16} {:>8.2f} us/deck".format(name, best * 1e6 / number))
+
+    random.seed(0)
+    legacy_cards = legacy_deck()
+    random.shuffle(legacy_cards)
+    cards = Deck(with_jokers=False).get_raw_cards()
+    random.shuffle(cards)
+    for name, cs in [("legacy", legacy_cards), ("interned", cards)]:
+        hash_time = min(timeit.repeat(lambda: set(cs), number=1000, repeat=5))
+        sort_time = min(timeit.repeat(lambda: sorted(cs), number=1000, repeat=5))
+        print("{:<16} hash {:>6.2f} us/deck, sort {:>6.2f} us/deck".format(name, hash_time * 1e3, sort_time * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Cost of a new game deck: shuffling Card objects against taking the next permutation of a deck bank."""
+import os
+import tempfile
+import time
+
+from base.cards.deck import Deck
+from base.cards.deck_bank import DeckBank
+from base.constants import Constants
+from base.game import Game
+
+
+def bench(create_deck, num_decks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(num_decks):
+        create_deck()
+    return num_decks / (time.perf_counter() - start)
+
+
+def shuffled_deck() -> Deck:
+    deck = Deck(with_jokers=False)
+    deck.shuffle()
+    return deck
+
+
+def check_replay(path: str, num_games: int = 200) -> None:
+    """Games played from a bank must deal exactly the same cards when they are replayed from (bank file, index)."""
+    Constants.PLAYER_TYPE = "random"
+    game = Game(deck_bank=DeckBank.load(path))
+    game.initialize_game()
+    played = []
+    for _ in range(num_games):
+        game.reset_game(keep_players=True)
+        while not game.is_finished():
+            game.play_single_step()
+        played.append((game.deck_index, [card.get_id() for card in game.player.hand.get_raw_cards()]))
+    replay = Game()
+    replay.initialize_game()
+    bank = DeckBank.load(path)
+    for index, card_ids in played:
+        replay.replay_deck(bank, index)
+        replay.deck.deal_n(len(card_ids))
+        assert [card.get_id() for card in replay.deck._in_play_cards] == card_ids, index
+
+
+def check_seeded_games(seed: int = 7, num_decks: int = 100) -> None:
+    decks = []
+    for _ in range(2):
+        game = Game(seed=seed)
+        decks.append([[c.get_id() for c in game._create_deck().get_raw_cards()] for _ in range(num_decks)])
+    assert decks[0] == decks[1]
+
+
+def main(num_decks: int = 100000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "deck_bank.npy")
+        start = time.perf_counter()
+        bank = DeckBank.generate(num_decks, seed=0, path=path)
+        print("{:<25} {:>12,.0f} decks/s".format("DeckBank.generate", num_decks / (time.perf_counter() - start)))
+        print("{:<25} {:>12,.0f} decks/s".format("Deck.shuffle", bench(shuffled_deck, num_decks)))
+        print("{:<25} {:>12,.0f} decks/s".format("DeckBank.next_deck", bench(bank.next_deck, num_decks)))
+        check_replay(path)
+        check_seeded_games()
+        print("Replay and seeded games: OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Episode log round trip (logged games replay to the same result) and write/scan throughput."""
+import glob
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ai.controlled_game import ControlledGame
+from base.cards.deck import Deck
+from base.episode_log import EpisodeLogReader, EpisodeLogWriter, RECORD_DTYPE
+from base.players.player import BROKEN_FLAG, STOPPED_FLAG
+from run.evaluator import Evaluator
+
+
+def check_replay(log_dir: str, num_games: int = 2000) -> None:
+    """Every logged game must end with the logged score and flags when its actions are replayed on its deck."""
+    stats = Evaluator("optimal", num_workers=2, chunk_size=500, seed=0, episode_log_dir=log_dir).evaluate(num_games)
+    game = ControlledGame()
+    num_logged = 0
+    for path in glob.glob(os.path.join(log_dir, "*.bjlog")):
+        reader = EpisodeLogReader(path)
+        assert reader.header.policy == "optimal"
+        for chunk in reader.iter_chunks(chunk_size=256):
+            for record in chunk:
+                game.reset_game(initialize=False, keep_players=game.player is not None)
+                game.initialize_game(initialize_players=game.player is None,
+                                     deck=Deck.from_card_ids(record["deck"].tolist()))
+                for action_idx in record["actions"][:record["num_actions"]]:
+                    game.play_action_idx(int(action_idx))
+                assert game.is_finished()
+                assert game.player.score == record["score"]
+                assert game.player.broken == bool(record["flags"] & BROKEN_FLAG)
+                assert game.player.stopped == bool(record["flags"] & STOPPED_FLAG)
+                num_logged += 1
+    assert num_logged == stats.num_games == num_games, (num_logged, num_games)
+
+
+def bench_throughput(path: str, num_games: int) -> None:
+    rng = np.random.default_rng(0)
+    decks = rng.permuted(np.tile(np.arange(52, dtype=np.uint8), (1000, 1)), axis=1)
+    start = time.perf_counter()
+    with EpisodeLogWriter(path, policy="synthetic", penalty=-10.0) as writer:
+        for i in range(num_games):
+            writer.write(decks[i % len(decks)], [0, 0, 1], 17, False, True)
+    print("{:<10} {:>12,.0f} games/s".format("write", num_games / (time.perf_counter() - start)))
+
+    reader = EpisodeLogReader(path)
+    start = time.perf_counter()
+    histogram = np.zeros(256, dtype=np.int64)
+    for chunk in reader.iter_chunks():
+        histogram += np.bincount(chunk["score"], minlength=256)
+    seconds = time.perf_counter() - start
+    print("{:<10} {:>12,.0f} games/s, {:.2f} GB/s".format("scan", len(reader) / seconds,
+                                                          len(reader) * RECORD_DTYPE.itemsize / seconds / 1e9))
+    assert histogram[17] == num_games
+
+
+def main(num_games: int = 200000):
+    with tempfile.TemporaryDirectory() as tmp:
+        check_replay(os.path.join(tmp, "evaluator"))
+        print("Replay of logged games OK")
+        bench_throughput(os.path.join(tmp, "synthetic.bjlog"), num_games)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Decision throughput and latency of per-call model.predict against the batching InferenceService."""
+import threading
+import time
+
+import numpy as np
+
+from ai.inference_service import InferenceService
+from ai.model_configs.mlp_config import MLPConfig
+from ai.multi_layer_perceptron import MultiLayerPerceptron
+from base.game_state import GameState
+
+
+def bench_predict(model, num_decisions: int) -> float:
+    state = np.zeros((1, GameState.SIZE), dtype=np.float32)
+    model.predict({"state": state}, verbose=0)
+    start = time.perf_counter()
+    for _ in range(num_decisions):
+        model.predict({"state": state}, verbose=0)
+    return num_decisions / (time.perf_counter() - start)
+
+
+def bench_service(service: InferenceService, num_clients: int, decisions_per_client: int):
+    """Let num_clients threads, each playing one game at a time, request decisions concurrently."""
+    mask = np.ones(service.num_actions, dtype=bool)
+
+    def client(seed: int):
+        rng = np.random.default_rng(seed)
+        for _ in range(decisions_per_client):
+            service.choose_action(rng.random(GameState.SIZE, dtype=np.float32), mask)
+
+    service.choose_action(np.zeros(GameState.SIZE, dtype=np.float32), mask)
+    service.reset_metrics()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return service.get_metrics()
+
+
+def main(decisions: int = 200):
+    config = MLPConfig()
+    model = MultiLayerPerceptron(config)
+    print("{:<30} {:>10,.0f} decisions/s".format("model.predict per decision", bench_predict(model, decisions)))
+    for max_batch_size, max_wait_ms in [(64, 1.0), (256, 2.0)]:
+        service = InferenceService(model, config.num_actions, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        for num_clients in [1, 16, 64, 256]:
+            metrics = bench_service(service, num_clients, decisions)
+            print("batch {:>3} wait {:.1f}ms clients {:>3}: {:>10,.0f} decisions/s, p50 {:6.2f} ms, p99 {:6.2f} ms, "
+                  "mean batch {:6.1f}".format(max_batch_size, max_wait_ms, num_clients, metrics['requests_per_sec'],
+                                               metrics['p50_latency_ms'], metrics['p99_latency_ms'],
+                                               metrics['mean_batch_size']))
+        service.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Cost of creating AI players with a model load per player against the shared ModelRegistry, and hot reload checks."""
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from ai.model_configs.mlp_config import MLPConfig
+from ai.model_registry import ModelRegistry
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+from base.game_state import GameState
+from base.players.ai_player import AIPlayer
+
+
+class _TempMLPConfig(MLPConfig):
+    """Numpy backend config whose weights live in a temporary directory."""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.inference_backend = "numpy"
+
+    @property
+    def save_path(self) -> str:
+        return os.path.join(self.directory, self.name())
+
+
+def write_weights(config: MLPConfig, seed: int) -> NumpyMultiLayerPerceptron:
+    rng = np.random.default_rng(seed)
+    sizes = [config.num_states] + config.hidden_units + [config.num_actions]
+    model = NumpyMultiLayerPerceptron([rng.standard_normal((i, o)) for i, o in zip(sizes, sizes[1:])],
+                                      [rng.standard_normal(o) for o in sizes[1:]],
+                                      ["tanh"] * len(config.hidden_units) + ["linear"])
+    model.save(config.numpy_weights_path)
+    return model
+
+
+def bench_players(config: MLPConfig, num_players: int) -> None:
+    start = time.perf_counter()
+    for _ in range(num_players):
+        config.load_model()
+    load_rate = num_players / (time.perf_counter() - start)
+    ModelRegistry().clear()
+    start = time.perf_counter()
+    players = [AIPlayer(config) for _ in range(num_players)]
+    registry_rate = num_players / (time.perf_counter() - start)
+    assert all(player.model is players[0].model for player in players)
+    print("{:<28} {:>10,.0f} players/s".format("load_model per player", load_rate))
+    print("{:<28} {:>10,.0f} players/s".format("ModelRegistry", registry_rate))
+
+
+def check_reload(config: MLPConfig, num_threads: int = 4, num_reloads: int = 20) -> None:
+    """Concurrent callers must always see complete weights of one version while checkpoints are replaced."""
+    ModelRegistry().clear()
+    handle = ModelRegistry().get(config)
+    states = np.random.default_rng(0).random((8, GameState.SIZE), dtype=np.float32)
+    models = {0: write_weights(config, 0)}
+    handle.reload_if_changed()
+    first_version = handle.version
+    expected = {seed: model({'state': states}) for seed, model in models.items()}
+    errors = []
+    stop = threading.Event()
+
+    def call():
+        while not stop.is_set():
+            output = handle({'state': states})
+            if not any(np.array_equal(output, e) for e in list(expected.values())):
+                errors.append(output)
+
+    threads = [threading.Thread(target=call) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for seed in range(1, num_reloads + 1):
+        model = write_weights(config, seed)
+        expected[seed] = model({'state': states})
+        # Make sure the modification time changes on file systems with a coarse resolution
+        os.utime(config.numpy_weights_path, ns=(seed * 10 ** 9, seed * 10 ** 9))
+        assert ModelRegistry().reload_changed() == 1
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors, "{} calls saw weights of no single version".format(len(errors))
+    assert handle.version == first_version + num_reloads
+    assert np.array_equal(handle({'state': states}), expected[num_reloads])
+
+
+def main(num_players: int = 1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _TempMLPConfig(tmp)
+        write_weights(config, 0)
+        bench_players(config, num_players)
+        check_reload(config)
+        print("Hot reload: OK")
+
+
+if __name__ == '__main__':
+    main()
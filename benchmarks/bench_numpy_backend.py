@@ -0,0 +1,35 @@
+"""Parity and latency of the numpy inference backend against the TensorFlow MultiLayerPerceptron."""
+import os
+import tempfile
+import timeit
+
+import numpy as np
+
+from ai.model_configs.mlp_config import MLPConfig
+from ai.multi_layer_perceptron import MultiLayerPerceptron
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+
+
+def main(number: int = 200):
+    config = MLPConfig()
+    model = MultiLayerPerceptron(config)
+    rng = np.random.default_rng(0)
+    states = rng.random((1000, config.num_states), dtype=np.float32)
+    expected = model({'state': states}).numpy()
+
+    path = os.path.join(tempfile.mkdtemp(), "weights.npz")
+    model.export_numpy(path)
+    numpy_model = NumpyMultiLayerPerceptron.load(path)
+    np.testing.assert_allclose(numpy_model({'state': states}), expected, rtol=1e-5, atol=1e-5)
+    print("Parity OK, max abs difference {:.2e}".format(np.abs(numpy_model({'state': states}) - expected).max()))
+
+    single = {'state': states[:1]}
+    for name, fn in [("tf model.predict", lambda: model.predict(single, verbose=0)),
+                     ("tf model call", lambda: model(single)),
+                     ("numpy predict", lambda: numpy_model.predict(single))]:
+        best = min(timeit.repeat(fn, number=number, repeat=3))
+        print("{:<18} {:>10.1f} us/decision".format(name, best * 1e6 / number))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+The suit-symmetric rank encoding against the card encoding: input width, model size, inference cost, the number of
+distinct states a cache sees, and the convergence of DQN training per environment step.
+
+    PYTHONPATH=. python benchmarks/bench_rank_encoding.py [--steps 20000]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from ai.ai_env import BlackjackEnv
+from ai.model_configs.mlp_config import MLPConfig
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+from base.actions.action_service import ActionService
+from base.cards.card import DECK_CARDS
+from base.cards.deck import Deck
+from base.game_state import CARD_ENCODING, RANK_ENCODING, STATE_ENCODINGS, GameState
+from base.players.random_player import RandomPlayer
+from base.utils.card_constants import POSSIBLE_SUIT
+from base.utils.rank_counts import NUM_RANKS
+
+
+def _rank_encoding_from_scratch(player: RandomPlayer, deck: Deck) -> np.ndarray:
+    expected = np.zeros(GameState.RANKS_SIZE, dtype=np.float32)
+    for card in player.hand.get_raw_cards():
+        expected[card.get_rank() - 1] += 1
+    for card in deck.get_raw_cards():
+        expected[NUM_RANKS + card.get_rank() - 1] += 1
+    expected[-1] = player.score
+    return expected
+
+
+def _swap_suits(card_ids: List[int], permutation: List[int]) -> List[int]:
+    return [permutation[card_id // NUM_RANKS] * NUM_RANKS + card_id % NUM_RANKS for card_id in card_ids]
+
+
+def check_rank_encoding(num_games: int = 2000, seed: int = 0) -> None:
+    """
+    The incrementally maintained counts match counts computed from the cards, and games whose decks only differ in the
+    suits have the same encodings and canonical keys at every step.
+    """
+    rng = random.Random(seed)
+    for _ in range(num_games):
+        card_ids = list(range(len(DECK_CARDS)))
+        rng.shuffle(card_ids)
+        permutation = list(range(len(POSSIBLE_SUIT)))
+        rng.shuffle(permutation)
+        decks = [Deck.from_card_ids(card_ids), Deck.from_card_ids(_swap_suits(card_ids, permutation))]
+        players = [RandomPlayer(), RandomPlayer()]
+        for _ in range(rng.randint(0, 8)):
+            encodings = [GameState.encode_ranks(player, deck) for player, deck in zip(players, decks)]
+            keys = [GameState.canonical_key(player, deck) for player, deck in zip(players, decks)]
+            assert np.array_equal(encodings[0], _rank_encoding_from_scratch(players[0], decks[0]))
+            assert np.array_equal(encodings[0], encodings[1]) and keys[0] == keys[1]
+            for player, deck in zip(players, decks):
+                player.hand.add(deck.deal())
+        # Drawing one more card always changes the key
+        other = RandomPlayer()
+        other.hand.add(list(players[0].hand.get_raw_cards()) + [decks[0].deal()])
+        assert GameState.canonical_key(other, decks[0]) != GameState.canonical_key(players[0], decks[0])
+
+
+def count_distinct_states(num_games: int = 20000, seed: int = 0) -> Dict[str, int]:
+    """Number of distinct states a cache keyed by the exact cards and one keyed by the canonical key would hold."""
+    rng = random.Random(seed)
+    card_keys, canonical_keys = set(), set()
+    for _ in range(num_games):
+        deck = Deck(with_jokers=False, rng=rng)
+        deck.shuffle()
+        player = RandomPlayer()
+        while True:
+            card_keys.add(player.hand.get_mask())
+            canonical_keys.add(GameState.canonical_key(player, deck))
+            if player.score >= 21 or rng.random() < 0.3:
+                break
+            player.hand.add(deck.deal())
+    return {CARD_ENCODING: len(card_keys), RANK_ENCODING: len(canonical_keys)}
+
+
+def _config(encoding: str) -> MLPConfig:
+    config = MLPConfig(run_name="bench_rank_encoding")
+    config.state_encoding = encoding
+    return config
+
+
+def bench_inference(encoding: str, batch_size: int, number: int) -> Dict[str, float]:
+    config = _config(encoding)
+    rng = np.random.default_rng(0)
+    sizes = [config.num_states] + config.hidden_units + [config.num_actions]
+    model = NumpyMultiLayerPerceptron([rng.standard_normal((i, o)).astype(np.float32)
+                                       for i, o in zip(sizes, sizes[1:])],
+                                      [np.zeros(o, dtype=np.float32) for o in sizes[1:]],
+                                      ["tanh"] * len(config.hidden_units) + ["linear"])
+    states = {"state": rng.random((batch_size, config.num_states), dtype=np.float32)}
+    model(states)
+    start = time.perf_counter()
+    for _ in range(number):
+        model(states)
+    seconds = time.perf_counter() - start
+    return {"width": config.num_states, "params": sum(kernel.size + bias.size
+                                                      for kernel, bias in zip(model.kernels, model.biases)),
+            "forward_us": seconds / number * 1e6}
+
+
+def bench_encode(number: int = 20000) -> Dict[str, float]:
+    deck = Deck(with_jokers=False, rng=random.Random(0))
+    deck.shuffle()
+    player = RandomPlayer()
+    player.hand.add(deck.deal_n(3))
+    card_out = np.empty(GameState.SIZE, dtype=np.float32)
+    rank_out = np.empty(GameState.RANKS_SIZE, dtype=np.float32)
+    rates = {}
+    for name, fn in [(CARD_ENCODING, lambda: GameState.encode(player, out=card_out)),
+                     (RANK_ENCODING, lambda: GameState.encode_ranks(player, deck, out=rank_out))]:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rates[name] = number / (time.perf_counter() - start)
+    return rates
+
+
+def greedy_return(model: NumpyMultiLayerPerceptron, encoding: str, penalty, num_games: int, seed: int) -> float:
+    """Average return of the greedy policy of a model over a fixed set of decks."""
+    env = BlackjackEnv(ActionService().num_actions, GameState.state_size(encoding), penalty, seed=seed,
+                       record_actions=False, state_encoding=encoding)
+    total = 0.0
+    for _ in range(num_games):
+        state, done = env.reset(), False
+        while not done:
+            predictions = model({"state": state[None]})[0]
+            action = int(np.argmax(np.where(env.get_current_actions_mask(), predictions, -np.inf)))
+            state, reward, done, _ = env.step(action)
+            total += reward
+    return total / num_games
+
+
+def train_curve(encoding: str, penalty, num_steps: int, eval_every: int, eval_games: int,
+                seed: int = 0) -> List[float]:
+    """Train a DQN like ai_trainer.main and evaluate its greedy policy every eval_every environment steps."""
+    import tensorflow as tf
+    from ai.ai_trainer import DQN
+
+    tf.random.set_seed(seed)
+    np.random.seed(seed)
+    cfg = _config(encoding)
+    train_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr)
+    target_net = DQN(cfg, cfg.gamma, cfg.max_experiences, cfg.min_experiences, cfg.batch_size, cfg.lr)
+    env = BlackjackEnv(cfg.num_actions, cfg.num_states, penalty, seed=seed, record_actions=False,
+                       state_encoding=encoding)
+    epsilon = cfg.epsilon
+    state = env.reset()
+    curve = []
+    for step in range(1, num_steps + 1):
+        mask = env.get_current_actions_mask()
+        action = train_net.get_action(state, mask, epsilon)
+        next_state, reward, done, _ = env.step(action)
+        train_net.add_experience({'s': state, 'a': action, 'r': reward, 'm': mask, 's2': next_state, 'done': done,
+                                  'm2': env.get_current_actions_mask()})
+        train_net.train(target_net)
+        if step % cfg.copy_step == 0:
+            target_net.copy_weights(train_net)
+        if done:
+            epsilon = max(cfg.min_epsilon, epsilon * cfg.decay)
+            state = env.reset()
+        else:
+            state = next_state
+        if step % eval_every == 0:
+            curve.append(greedy_return(train_net.model.to_numpy(), encoding, penalty, eval_games, seed=10 ** 6))
+    return curve
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20000, help="environment steps of every training run")
+    parser.add_argument("--eval-every", type=int, default=2000)
+    parser.add_argument("--eval-games", type=int, default=500)
+    parser.add_argument("--penalty", type=float, default=-10)
+    parser.add_argument("--no-training", action="store_true", help="skip the training comparison")
+    parsed = parser.parse_args(args)
+
+    check_rank_encoding()
+    print("Rank encoding parity and suit symmetry OK")
+    distinct = count_distinct_states()
+    print("{:<10} {:>8} {:>8} {:>12} {:>14} {:>16} {:>16}".format(
+        "encoding", "width", "params", "encodes/s", "cached states", "forward 1 (us)", "forward 64 (us)"))
+    encode_rates = bench_encode()
+    for encoding in STATE_ENCODINGS:
+        single = bench_inference(encoding, 1, 20000)
+        batch = bench_inference(encoding, 64, 20000)
+        print("{:<10} {:>8} {:>8} {:>12,.0f} {:>14,} {:>16.2f} {:>16.2f}".format(
+            encoding, single["width"], single["params"], encode_rates[encoding], distinct[encoding],
+            single["forward_us"], batch["forward_us"]))
+    if parsed.no_training:
+        return
+    curves = {encoding: train_curve(encoding, parsed.penalty, parsed.steps, parsed.eval_every, parsed.eval_games)
+              for encoding in STATE_ENCODINGS}
+    print("Greedy return per {} environment steps of training".format(parsed.eval_every))
+    print("{:>10} ".format("env steps") + " ".join("{:>10}".format(encoding) for encoding in STATE_ENCODINGS))
+    for i in range(len(curves[CARD_ENCODING])):
+        print("{:>10} ".format((i + 1) * parsed.eval_every) +
+              " ".join("{:>10.2f}".format(curves[encoding][i]) for encoding in STATE_ENCODINGS))
+
+
+if __name__ == '__main__':
+    main()
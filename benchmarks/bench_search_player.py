@@ -0,0 +1,102 @@
+"""Cost of copying a game for lookahead, and decision latency against play quality of the SearchPlayer per node budget."""
+import copy
+import time
+
+from ai.optimal_solver import OptimalSolver, CONSTANTS_REWARD
+from base.cards.deck import Deck
+from base.constants import Constants
+from base.game import Game
+from base.game_snapshot import GameSnapshot
+from base.players.search_player import SearchPlayer
+
+
+def bench_copies(number: int = 20000) -> None:
+    game = Game(seed=0)
+    Constants.PLAYER_TYPE = "random"
+    game.initialize_game()
+    game.player.hand.add(game.deck.deal_n(3))
+    snapshot = game.snapshot()
+    start = time.perf_counter()
+    for _ in range(number // 100):
+        copy.deepcopy(game)
+    deepcopy_rate = number // 100 / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(number):
+        snapshot.clone()
+    clone_rate = number / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(number):
+        snapshot.draw_rank(5)
+    draw_rate = number / (time.perf_counter() - start)
+    print("{:<28} {:>12,.0f} copies/s".format("copy.deepcopy(Game)", deepcopy_rate))
+    print("{:<28} {:>12,.0f} copies/s".format("GameSnapshot.clone", clone_rate))
+    print("{:<28} {:>12,.0f} moves/s".format("GameSnapshot.draw_rank", draw_rate))
+
+
+def check_exact() -> None:
+    """Without a budget the search must find the value of the exact solver."""
+    player = SearchPlayer(node_budget=1 << 30)
+    full_deck = Deck(with_jokers=False)
+    game = Game()
+    game.deck = full_deck
+    game.player = player
+    _, value = player.search(game.snapshot())
+    expected = OptimalSolver(CONSTANTS_REWARD).solve().expected_value
+    assert abs(value - expected) < 1e-9, (value, expected)
+
+
+def check_snapshot(num_games: int = 200) -> None:
+    """Drawing the dealt cards on a snapshot must give the snapshot of the game after the draws."""
+    Constants.PLAYER_TYPE = "random"
+    game = Game(seed=3)
+    game.initialize_game()
+    for _ in range(num_games):
+        game.reset_game(keep_players=True)
+        snapshot = game.snapshot()
+        while not game.is_finished():
+            game.play_single_step()
+            if game.player.last_action.get_reward():
+                snapshot = snapshot.draw_card(game.player.hand.get_raw_cards()[-1].get_id())
+            else:
+                snapshot = snapshot.stop()
+        assert snapshot == game.snapshot(), (snapshot, game.snapshot())
+
+
+def play(budget: int, num_games: int, cold: bool, seed: int = 0):
+    """
+    Average reward and decision latency over num_games games.
+
+    :param cold: if True, every decision starts with an empty transposition table, otherwise the table is kept
+    """
+    player = SearchPlayer(node_budget=budget)
+    game = Game(seed=seed)
+    game.player = player
+    total_reward, decisions, seconds = 0, 0, 0.0
+    for _ in range(num_games):
+        game.reset_game(initialize=False, keep_players=True)
+        game.initialize_game(initialize_players=False)
+        while not game.is_finished():
+            if cold:
+                player.clear_table()
+            start = time.perf_counter()
+            game.play_single_step()
+            seconds += time.perf_counter() - start
+            decisions += 1
+        total_reward += Constants.rewards.get(player.score, 0)
+    return total_reward / num_games, seconds / decisions * 1e6
+
+
+def main(num_games: int = 200):
+    bench_copies()
+    check_snapshot()
+    check_exact()
+    print("Snapshot and exact search: OK")
+    print("{:>10} {:>6} {:>12} {:>16}".format("budget", "table", "avg reward", "us/decision"))
+    for budget in [1, 10, 100, 1000, 10000]:
+        for cold in (True, False):
+            reward, latency = play(budget, num_games, cold)
+            print("{:>10} {:>6} {:>12.2f} {:>16.1f}".format(budget, "cold" if cold else "warm", reward, latency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Time to save and restore all GameRunner sessions, and a check that restored games continue where they were saved."""
+import os
+import tempfile
+import time
+from typing import List
+
+from base.actions.action_service import REQUEST_CARD
+from base.constants import Constants
+from run.game_runner import GameRunner
+
+
+def game_summary(game):
+    return (game.deck.get_card_ids(), [card.get_id() for card in game.player.hand.get_raw_cards()], game.phase,
+            game.player.broken, game.player.stopped, type(game.player).__name__)
+
+
+def start_sessions(runner: GameRunner, num_sessions: int) -> List[str]:
+    game_ids = []
+    for i in range(num_sessions):
+        game_id, game = runner.start_game("random" if i % 4 else "search")
+        # Leave the games in different stages
+        for _ in range(i % 3):
+            if not game.is_finished():
+                game.play_action_idx(REQUEST_CARD)
+        game_ids.append(game_id)
+    return game_ids
+
+
+def check_restore(num_sessions: int = 2000) -> None:
+    """Restored sessions have the same games as the saved ones and can be played to the end."""
+    runner = GameRunner()
+    game_ids = start_sessions(runner, num_sessions)
+    summaries = {game_id: game_summary(runner.get_game(game_id)) for game_id in game_ids}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.bin")
+        assert runner.save_sessions(path) == num_sessions
+        for game_id in game_ids:
+            runner.end_game(game_id)
+        assert runner.restore_sessions(path) == num_sessions
+    for game_id in game_ids:
+        game = runner.get_game(game_id)
+        assert game_summary(game) == summaries[game_id], game_id
+        assert game.deck.check_deck(), game_id
+        while not game.is_finished():
+            game.play_action_idx(REQUEST_CARD)
+        runner.end_game(game_id)
+
+
+def main(num_sessions: int = 100000):
+    Constants.MAX_RUNNING_GAMES = num_sessions
+    runner = GameRunner()
+    runner.max_games = num_sessions
+    start = time.perf_counter()
+    game_ids = start_sessions(runner, num_sessions)
+    print("{:<30} {:>8.3f} s".format("start {:,} games".format(num_sessions), time.perf_counter() - start))
+    summaries = {game_id: game_summary(runner.get_game(game_id)) for game_id in game_ids}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.bin")
+        start = time.perf_counter()
+        assert runner.save_sessions(path) == num_sessions
+        print("{:<30} {:>8.3f} s ({:.1f} MB)".format("save_sessions", time.perf_counter() - start,
+                                                     os.path.getsize(path) / 1e6))
+        for game_id in game_ids:
+            runner.end_game(game_id)
+        start = time.perf_counter()
+        assert runner.restore_sessions(path) == num_sessions
+        print("{:<30} {:>8.3f} s".format("restore_sessions", time.perf_counter() - start))
+
+        # Saving sessions that were restored but not used yet copies their records
+        start = time.perf_counter()
+        assert runner.save_sessions(path) == num_sessions
+        print("{:<30} {:>8.3f} s".format("save_sessions (restored)", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for game_id in game_ids:
+        assert game_summary(runner.get_game(game_id)) == summaries[game_id], game_id
+    print("{:<30} {:>8.3f} s".format("rebuild all restored games", time.perf_counter() - start))
+    for game_id in game_ids[:1000]:
+        game = runner.get_game(game_id)
+        while not game.is_finished():
+            game.play_action_idx(REQUEST_CARD)
+    print("Restored games: OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Cold-start benchmark for every player type.
+
+Every player type is created in a fresh interpreter started with ``python -X importtime``. The wall-clock time to
+import the game and create the player is reported, together with the slowest top-level imports.
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+from base.players.player_registry import PlayerRegistry
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+from base.constants import Constants
+Constants.PLAYER_TYPE = {player_type!r}
+from base.game import Game
+Game().initialize_game()
+"""
+
+
+def parse_importtime(stderr: str, top: int = 5) -> List[Tuple[str, int]]:
+    """Return the `top` slowest top-level imports as (module, cumulative microseconds)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports are indented by a single space in the tree that importtime prints
+        if not name.startswith("  ") and cumulative.strip().isdigit():
+            imports.append((name.strip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def cold_start(player_type: str) -> Tuple[float, str, bool]:
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT.format(player_type=player_type)],
+                             env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True)
+    return time.perf_counter() - start, process.stderr, process.returncode == 0
+
+
+def main():
+    for player_type in PlayerRegistry().get_player_types():
+        duration, stderr, success = cold_start(player_type)
+        status = "" if success else " (failed: {})".format(stderr.strip().splitlines()[-1])
+        print("{:<8} {:>8.3f} s{}".format(player_type, duration, status))
+        for name, cumulative in parse_importtime(stderr):
+            print("    {:<40} {:>8.3f} s".format(name, cumulative / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Microbenchmark of the GameState encoding against the original per-call MultiLabelBinarizer implementation."""
+import random
+import timeit
+
+import numpy as np
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from base.cards.card import Card
+from base.cards.deck import Deck
+from base.game_state import GameState
+from base.players.random_player import RandomPlayer
+from base.utils.card_constants import POSSIBLE_SUIT, POSSIBLE_RANK, JOKER_RANK, JOKER_SUIT
+
+
+def legacy_representation(player) -> np.ndarray:
+    """The original encoding: a fresh set of classes and a MultiLabelBinarizer for every call."""
+    classes = [None]
+    classes += [Card(rank, suit) for suit in POSSIBLE_SUIT for rank in POSSIBLE_RANK]
+    classes += [Card(JOKER_RANK, JOKER_SUIT)]
+    hand = list(MultiLabelBinarizer(classes=classes).fit_transform([player.hand.get_raw_cards()])[0])
+    return np.array(hand + [player.score], dtype=np.float32)
+
+
+def random_players(num_players: int, max_cards: int = 5):
+    players = []
+    for _ in range(num_players):
+        deck = Deck(with_jokers=False)
+        deck.shuffle()
+        player = RandomPlayer()
+        player.hand.add(deck.deal_n(random.randint(0, max_cards)))
+        players.append(player)
+    return players
+
+
+def check_parity(players) -> None:
+    for player in players:
+        legacy = legacy_representation(player)
+        state = GameState(None, None, player)
+        if not np.array_equal(legacy, state.create_numeral_representation(player)):
+            raise AssertionError("Encoding differs from the legacy encoding for {}".format(player))
+        if legacy.tobytes() != GameState.encode_batch([player]).tobytes():
+            raise AssertionError("Batch encoding differs from the legacy encoding for {}".format(player))
+
+
+def main(num_players: int = 1000, repeat: int = 5):
+    random.seed(0)
+    players = random_players(num_players)
+    check_parity(players)
+    state = GameState(None, None, None)
+    buffer = np.empty(GameState.SIZE, dtype=np.float32)
+    batch_buffer = np.empty((num_players, GameState.SIZE), dtype=np.float32)
+
+    def run_legacy():
+        for p in players:
+            legacy_representation(p)
+
+    def run_single():
+        for p in players:
+            state.create_numeral_representation(p, out=buffer)
+
+    def run_batch():
+        GameState.encode_batch(players, out=batch_buffer)
+
+    results = {}
+    for name, fn in [("legacy", run_legacy), ("single", run_single), ("batch", run_batch)]:
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = best
+        print("{:<8} {:>10.2f} us/state".format(name, best * 1e6 / num_players))
+    print("speedup single: {:.1f}x, batch: {:.1f}x".format(results["legacy"] / results["single"],
+                                                          results["legacy"] / results["batch"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Parity check and steps/sec comparison of VectorizedBlackjackEnv against BlackjackEnv."""
+import random
+import time
+
+import numpy as np
+
+from ai.ai_env import BlackjackEnv
+from ai.vectorized_env import VectorizedBlackjackEnv
+from base.actions.action_service import ActionService
+from base.game_state import GameState
+
+
+def dealing_order(env: BlackjackEnv) -> np.ndarray:
+    """Return the card ids of the deck of the env's current game in the order they will be dealt."""
+    # Deck.deal() pops from the end of the list of cards
+    return np.array([card.get_id() for card in reversed(env.game.deck.get_raw_cards())],
+                    dtype=np.int8)
+
+
+def check_parity(num_games: int = 500, penalty: int = -10, seed: int = 0) -> None:
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    env = BlackjackEnv(ActionService().num_actions, GameState.SIZE, penalty)
+    vec_env = VectorizedBlackjackEnv(1, penalty, seed=seed)
+    for _ in range(num_games):
+        observation = env.reset()
+        vec_observation = vec_env.reset(decks=dealing_order(env)[np.newaxis])
+        done = False
+        while not done:
+            np.testing.assert_array_equal(observation, vec_observation[0])
+            mask = env.get_current_actions_mask()
+            np.testing.assert_array_equal(mask, vec_env.get_current_actions_mask()[0])
+            action = rng.integers(ActionService().num_actions)
+            observation, reward, done, _ = env.step(action)
+            vec_observation, vec_reward, vec_done, info = vec_env.step(np.array([action]))
+            np.testing.assert_array_equal(observation, info['final_observation'][0])
+            assert reward == vec_reward[0], (reward, vec_reward[0])
+            assert done == vec_done[0], (done, vec_done[0])
+    print("Parity OK over {} games".format(num_games))
+
+
+def bench_env(num_steps: int = 20000) -> float:
+    env = BlackjackEnv(ActionService().num_actions, GameState.SIZE, -10)
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        _, _, done, _ = env.step(random.randrange(ActionService().num_actions))
+        if done:
+            env.reset()
+    return num_steps / (time.perf_counter() - start)
+
+
+def bench_vectorized_env(num_envs: int, num_steps: int = 200) -> float:
+    env = VectorizedBlackjackEnv(num_envs, -10, seed=0)
+    env.reset()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(ActionService().num_actions, size=(num_steps, num_envs))
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    return num_steps * num_envs / (time.perf_counter() - start)
+
+
+def main():
+    check_parity()
+    print("{:<28} {:>14,.0f} steps/s".format("BlackjackEnv", bench_env()))
+    for num_envs in [1, 64, 1024, 16384]:
+        print("{:<28} {:>14,.0f} steps/s".format("VectorizedBlackjackEnv({})".format(num_envs),
+                                                  bench_vectorized_env(num_envs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""
+Benchmark suite with stored baselines and regression comparison.
+
+    PYTHONPATH=. python benchmarks/suite.py run [--only deck,env] [--quick] [--save-baseline | --output PATH]
+    PYTHONPATH=. python benchmarks/suite.py run --compare [BASELINE] [--threshold 0.1]
+    PYTHONPATH=. python benchmarks/suite.py compare NEW [BASELINE] [--threshold 0.1]
+    PYTHONPATH=. python benchmarks/suite.py check
+
+Results are stored as JSON tagged with the machine they were measured on, baselines are stored per machine in
+benchmarks/baselines/<machine tag>.json. A comparison fails (exit code 1) when any metric is more than the threshold
+worse than its baseline. ``check`` runs the parity checks of the individual bench_*.py scripts.
+
+Groups that need TensorFlow (dqn, and the TensorFlow variants of ai_player and episodes) are skipped when it is not
+installed.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import bench_action_dispatch
+import bench_deck_bank
+import bench_rank_encoding
+import bench_search_player
+import bench_session_snapshot
+import bench_vectorized_env
+from ai.ai_env import BlackjackEnv
+from ai.model_configs.mlp_config import MLPConfig
+from ai.numpy_mlp import NumpyMultiLayerPerceptron
+from base.actions.action_service import ActionService, REQUEST_CARD, STOP
+from base.cards.card import Card, DECK_CARDS
+from base.cards.deck import Deck
+from base.cards.deck_bank import DeckBank
+from base.game import Game
+from base.game_state import GameState
+from base.players.ai_player import AIPlayer
+from base.players.player_registry import PlayerRegistry
+from base.players.random_player import RandomPlayer
+from base.utils.card_constants import HEARTS
+from run.evaluator import play_games
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, "baselines")
+
+HAS_TENSORFLOW = importlib.util.find_spec("tensorflow") is not None
+
+#: benchmark groups by name, every group returns its metrics by name
+GROUPS = {}  # type: Dict[str, Callable[[float], Dict[str, Dict[str, object]]]]
+
+
+def group(name: str):
+    def decorator(fn):
+        GROUPS[name] = fn
+        return fn
+    return decorator
+
+
+def rate(fn: Callable, number: int, ops_per_call: int = 1, repeat: int = 3) -> Dict[str, object]:
+    """Operations per second of the best of repeat runs of number calls."""
+    best = min(timeit.repeat(fn, number=max(1, number), repeat=repeat))
+    return {"value": max(1, number) * ops_per_call / best, "unit": "ops/s", "higher_is_better": True}
+
+
+def latency(fn: Callable, number: int, repeat: int = 3) -> Dict[str, object]:
+    """Microseconds per call of the best of repeat runs of number calls."""
+    best = min(timeit.repeat(fn, number=max(1, number), repeat=repeat))
+    return {"value": best / max(1, number) * 1e6, "unit": "us", "higher_is_better": False}
+
+
+def _player_with_cards(num_cards: int, seed: int = 0) -> RandomPlayer:
+    deck = Deck(with_jokers=False, rng=random.Random(seed))
+    deck.shuffle()
+    player = RandomPlayer()
+    player.hand.add(deck.deal_n(num_cards))
+    return player
+
+
+class _UntrainedMLPConfig(MLPConfig):
+    """Serves a freshly initialized model, decision latency does not depend on the weights."""
+
+    def load_model(self):
+        if self.inference_backend == "numpy":
+            rng = np.random.default_rng(0)
+            sizes = [self.num_states] + self.hidden_units + [self.num_actions]
+            return NumpyMultiLayerPerceptron([rng.standard_normal((i, o)) for i, o in zip(sizes, sizes[1:])],
+                                             [np.zeros(o) for o in sizes[1:]],
+                                             ["tanh"] * len(self.hidden_units) + ["linear"])
+        return self.model_class(self)
+
+    def name(self):
+        # Keeps the untrained models apart from trained ones in the ModelRegistry
+        return "UntrainedMLPConfig"
+
+
+def _ai_player(backend: str) -> AIPlayer:
+    config = _UntrainedMLPConfig()
+    config.inference_backend = backend
+    return AIPlayer(config)
+
+
+def _backends() -> List[str]:
+    return ["numpy", "tensorflow"] if HAS_TENSORFLOW else ["numpy"]
+
+
+@group("deck")
+def bench_deck(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(2000 * scale)
+    deck = Deck(with_jokers=False)
+    bank = DeckBank.generate(3 * n, seed=0)
+    return {
+        "deck.create": rate(lambda: Deck(with_jokers=False), n),
+        "deck.shuffle": rate(deck.shuffle, n),
+        "deck.create_shuffle_deal": rate(bench_deck_bank.shuffled_deck, n),
+        "deck_bank.next_deck": rate(bank.next_deck, n),
+    }
+
+
+@group("card")
+def bench_card(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(2000 * scale)
+    cards = list(DECK_CARDS)
+    random.Random(0).shuffle(cards)
+    return {
+        "card.hash": rate(lambda: [hash(card) for card in cards], n, ops_per_call=len(cards)),
+        "card.sort_deck": rate(lambda: sorted(cards), n),
+        "card.lookup": rate(lambda: Card(7, HEARTS), 50 * n),
+    }
+
+
+@group("encoding")
+def bench_encoding(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(20000 * scale)
+    player = _player_with_cards(3)
+    state = GameState(None, None, player)
+    out = np.empty(GameState.SIZE, dtype=np.float32)
+    players = [_player_with_cards(i % 6, seed=i) for i in range(1024)]
+    batch_out = np.empty((len(players), GameState.SIZE), dtype=np.float32)
+    deck = Deck(with_jokers=False, rng=random.Random(0))
+    deck.shuffle()
+    ranks_player = RandomPlayer()
+    ranks_player.hand.add(deck.deal_n(3))
+    ranks_out = np.empty(GameState.RANKS_SIZE, dtype=np.float32)
+    return {
+        "game_state.create_numeral_representation": rate(lambda: state.create_numeral_representation(player), n),
+        "game_state.encode_into": rate(lambda: GameState.encode(player, out=out), n),
+        "game_state.encode_batch_1024": rate(lambda: GameState.encode_batch(players, out=batch_out),
+                                             max(1, n // 1000), ops_per_call=len(players)),
+        "game_state.encode_ranks": rate(lambda: GameState.encode_ranks(ranks_player, deck, out=ranks_out), n),
+        "game_state.canonical_key": rate(lambda: GameState.canonical_key(ranks_player, deck), n),
+    }
+
+
+@group("masks")
+def bench_masks(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(50000 * scale)
+    service = ActionService()
+    player = _player_with_cards(2)
+    game = Game()
+    game.player = player
+    game.initialize_game(initialize_players=False)
+    state = game.get_state()
+    return {
+        "action_service.get_valid_actions_mask": rate(lambda: service.get_valid_actions_mask(player, state), n),
+        "action_service.get_mask": rate(lambda: service.get_mask(player, state.phase), n),
+        "action_service.get_bitmask": rate(lambda: service.get_bitmask(player, state.phase), n),
+    }
+
+
+@group("env")
+def bench_env(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(20000 * scale)
+    env = BlackjackEnv(ActionService().num_actions, GameState.SIZE, -10, seed=0)
+    env.reset()
+    rng = random.Random(0)
+
+    def steps(num_steps: int) -> float:
+        """Seconds spent in env.step over num_steps random steps, resets are not counted."""
+        total = 0.0
+        env.reset()
+        for _ in range(num_steps):
+            action = REQUEST_CARD if rng.random() < 0.7 else STOP
+            start = time.perf_counter()
+            _, _, done, _ = env.step(action)
+            total += time.perf_counter() - start
+            if done:
+                env.reset()
+        return total
+
+    best_steps = min(steps(n) for _ in range(3))
+    return {
+        "env.reset": rate(env.reset, n),
+        "env.step": {"value": n / best_steps, "unit": "ops/s", "higher_is_better": True},
+        "env.step_with_resets": {"value": bench_vectorized_env.bench_env(n), "unit": "ops/s",
+                                 "higher_is_better": True},
+        "vectorized_env.step_1024": {"value": bench_vectorized_env.bench_vectorized_env(1024, max(10, n // 100)),
+                                     "unit": "ops/s", "higher_is_better": True},
+    }
+
+
+@group("episodes")
+def bench_episodes(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(2000 * scale)
+    players = {"random": lambda: PlayerRegistry().create("random"),
+               "optimal": lambda: PlayerRegistry().create("optimal")}
+    for backend in _backends():
+        players["ai_" + backend] = lambda backend=backend: _ai_player(backend)
+    metrics = {}
+    for name, create_player in players.items():
+        game = Game(seed=0)
+        game.player = create_player()
+        game.initialize_game(initialize_players=False)
+        # Model backed players are much slower, they play fewer games
+        num_games = n if not name.startswith("ai") else max(10, n // 20)
+        metrics["episodes." + name] = rate(lambda: play_games(game, num_games), 1, ops_per_call=num_games)
+    # The registry creates a player for every new game of a GameRunner or Evaluator worker
+    metrics["create.optimal"] = rate(lambda: PlayerRegistry().create("optimal"), n)
+    return metrics
+
+
+@group("ai_player")
+def bench_ai_player(scale: float) -> Dict[str, Dict[str, object]]:
+    n = int(1000 * scale)
+    metrics = {}
+    for backend in _backends():
+        player = _ai_player(backend)
+        game = Game(seed=0)
+        game.player = player
+        game.initialize_game(initialize_players=False)
+        player.hand.add(game.deck.deal_n(2))
+        state = game.get_state()
+        number = n if backend == "numpy" else max(10, n // 10)
+        metrics["ai_player.decision_latency_" + backend] = latency(lambda: player._choose_action(state), number)
+    return metrics
+
+
+@group("dqn")
+def bench_dqn(scale: float) -> Dict[str, Dict[str, object]]:
+    if not HAS_TENSORFLOW:
+        return {}
+    from ai.ai_trainer import DQN
+    n = int(500 * scale)
+    config = MLPConfig()
+    dqn = DQN(config, config.gamma, config.max_experiences, config.min_experiences, config.batch_size, config.lr)
+    target = DQN(config, config.gamma, config.max_experiences, config.min_experiences, config.batch_size, config.lr)
+    rng = np.random.default_rng(0)
+    mask = np.ones(config.num_actions, dtype=bool)
+    exp = {'s': rng.random(config.num_states, dtype=np.float32), 'a': 0, 'r': 1.0, 'm': mask,
+           's2': rng.random(config.num_states, dtype=np.float32), 'done': False, 'm2': mask}
+    add = rate(lambda: dqn.add_experience(exp), 10 * n)
+    dqn.train(target)  # Trace the training step before it is timed
+    return {
+        "dqn.add_experience": add,
+        "dqn.train": rate(lambda: dqn.train(target), n),
+    }
+
+
+def machine_info() -> Dict[str, object]:
+    info = {
+        "hostname": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+    info["tag"] = "{hostname}-{machine}-py{python}".format(**info)
+    return info
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(groups: List[str], scale: float) -> Dict[str, object]:
+    metrics = {}
+    for name in groups:
+        start = time.perf_counter()
+        group_metrics = GROUPS[name](scale)
+        metrics.update(group_metrics)
+        print("{:<10} {} metrics in {:.1f}s".format(name, len(group_metrics), time.perf_counter() - start),
+              file=sys.stderr)
+    return {
+        "machine": machine_info(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "scale": scale,
+        "metrics": metrics,
+    }
+
+
+def default_baseline_path() -> str:
+    return os.path.join(BASELINE_DIR, "{}.json".format(machine_info()["tag"]))
+
+
+def load(path: str) -> Dict[str, object]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(result: Dict[str, object], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print("Results written to {}".format(path), file=sys.stderr)
+
+
+def print_results(result: Dict[str, object]) -> None:
+    for name, metric in sorted(result["metrics"].items()):
+        print("{:<45} {:>16,.2f} {}".format(name, metric["value"], metric["unit"]))
+
+
+def compare(new: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Print the change of every metric against the baseline and return the names of the regressed metrics."""
+    if new["machine"]["tag"] != baseline["machine"]["tag"]:
+        print("Warning: comparing results of {} against a baseline of {}".format(
+            new["machine"]["tag"], baseline["machine"]["tag"]))
+    if new.get("scale") != baseline.get("scale"):
+        print("Warning: comparing results of scale {} against a baseline of scale {}".format(
+            new.get("scale"), baseline.get("scale")))
+    regressions = []
+    print("{:<45} {:>14} {:>14} {:>9}".format("metric", "baseline", "new", "change"))
+    for name, metric in sorted(new["metrics"].items()):
+        if name not in baseline["metrics"]:
+            print("{:<45} {:>14} {:>14,.2f} {:>9}".format(name, "-", metric["value"], "new"))
+            continue
+        old_value, new_value = baseline["metrics"][name]["value"], metric["value"]
+        # Positive changes are improvements, whatever the direction of the metric
+        if metric["higher_is_better"]:
+            change = new_value / old_value - 1
+        else:
+            change = old_value / new_value - 1
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(name)
+        print("{:<45} {:>14,.2f} {:>14,.2f} {:>+8.1f}%{}".format(name, old_value, new_value, change * 100,
+                                                                 "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def check() -> None:
+    """Run the parity checks of the individual benchmark scripts."""
+    random.seed(0)
+    if importlib.util.find_spec("sklearn") is not None:
+        import bench_state_encoder
+        bench_state_encoder.check_parity(bench_state_encoder.random_players(500))
+        print("GameState encoding parity OK")
+    else:
+        print("Skipping the GameState encoding parity check, the legacy encoding needs scikit-learn")
+    bench_vectorized_env.check_parity()
+    print("VectorizedBlackjackEnv parity OK")
+    bench_action_dispatch.check_parity()
+    print("Action dispatch parity OK")
+    bench_deck_bank.check_seeded_games()
+    print("Seeded games OK")
+    bench_search_player.check_snapshot()
+    bench_search_player.check_exact()
+    print("Game snapshots and exact search OK")
+    bench_rank_encoding.check_rank_encoding()
+    print("Rank encoding OK")
+    bench_session_snapshot.check_restore()
+    print("Session save and restore OK")
+
+
+def main(args: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare against stored baselines.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--only", default=None,
+                            help="comma separated groups to run, out of {}".format(", ".join(GROUPS)))
+    run_parser.add_argument("--quick", action="store_true", help="run a tenth of the iterations")
+    run_parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    run_parser.add_argument("--save-baseline", action="store_true",
+                            help="store the results as the baseline of this machine")
+    run_parser.add_argument("--compare", nargs="?", const="", default=None,
+                            help="compare against this baseline (default: the baseline of this machine)")
+    run_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="relative slowdown that counts as a regression (default: 0.1)")
+    compare_parser = subparsers.add_parser("compare", help="compare stored results against a baseline")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("baseline", nargs="?", default=None,
+                                help="default: the baseline of this machine")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    subparsers.add_parser("check", help="run the parity checks of the benchmark scripts")
+    parsed = parser.parse_args(args)
+
+    if parsed.command == "check":
+        check()
+        return 0
+    if parsed.command == "run":
+        groups = parsed.only.split(",") if parsed.only else list(GROUPS)
+        unknown = [name for name in groups if name not in GROUPS]
+        if unknown:
+            parser.error("Unknown groups {}, expected any of {}".format(unknown, list(GROUPS)))
+        result = run(groups, 0.1 if parsed.quick else 1.0)
+        print_results(result)
+        if parsed.output:
+            save(result, parsed.output)
+        if parsed.save_baseline:
+            save(result, default_baseline_path())
+        if parsed.compare is None:
+            return 0
+        baseline_path = parsed.compare or default_baseline_path()
+    else:
+        result = load(parsed.new)
+        baseline_path = parsed.baseline or default_baseline_path()
+    regressions = compare(result, load(baseline_path), parsed.threshold)
+    if regressions:
+        print("{} metrics regressed by more than {:.0f}%: {}".format(len(regressions), parsed.threshold * 100,
+                                                                  ", ".join(regressions)))
+        return 1
+    print("No regressions against {}".format(baseline_path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import argparse
+
+from ai.actor_learner import train_actor_learner
+from ai.model_configs.mlp_config import MLPConfig
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Report env and gradient steps/sec of actor/learner training as "
+                                                 "actors are added.")
+    parser.add_argument("--actors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--episodes", type=int, default=20000, help="episodes the learner trains on per actor count")
+    parser.add_argument("--replay-ratio", type=float, default=None,
+                        help="gradient steps per transition, lower it to let the actors run further ahead")
+    parser.add_argument("--penalty", type=float, default=-10)
+    args = parser.parse_args()
+
+    results = []
+    for num_actors in args.actors:
+        config = MLPConfig(run_name="actor_learner_{}".format(num_actors))
+        if args.replay_ratio is not None:
+            config.replay_ratio = args.replay_ratio
+        results.append(train_actor_learner(args.penalty, config, num_actors=num_actors, num_episodes=args.episodes,
+                                           save=False))
+    print("{:>7} {:>16} {:>20}".format("actors", "env steps/sec", "gradient steps/sec"))
+    for result in results:
+        print("{num_actors:>7} {env_steps_per_sec:>16,.0f} {gradient_steps_per_sec:>20,.1f}".format(**result))
@@ -0,0 +1,209 @@
+"""
+Load generator for the game API.
+
+Every simulated client keeps a connection open and plays games back to back (start, step until finished, end) for the
+given duration. Requests/sec and latency percentiles are reported per route and overall, together with the session
+counters of the server. Clients can abandon a share of their games without ending them, like clients that disconnect.
+
+    PYTHONPATH=. python run/api_load_generator.py --clients 2000 --duration 30 --spawn-server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Client:
+    """HTTP/1.1 client on a single keep-alive connection."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader = None  # type: Optional[asyncio.StreamReader]
+        self._writer = None  # type: Optional[asyncio.StreamWriter]
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, object]] = None) -> Tuple[int, object]:
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = "{} {} HTTP/1.1\r\nHost: {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n".format(
+            method, path, self.host, len(payload))
+        self._writer.write(head.encode("latin-1") + payload)
+        await self._writer.drain()
+        response_head = (await self._reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(response_head.split(" ", 2)[1])
+        length = 0
+        for line in response_head.split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self._reader.readexactly(length) if length else b""
+        return status, json.loads(data) if data else None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class LoadStats:
+
+    def __init__(self):
+        self.latencies = {}  # type: Dict[str, List[float]]
+        self.num_errors = 0
+        self.num_games = 0
+
+    def add(self, route: str, seconds: float) -> None:
+        self.latencies.setdefault(route, []).append(seconds)
+
+    def report(self, seconds: float) -> Dict[str, Dict[str, float]]:
+        routes = dict(self.latencies)
+        routes["all"] = [latency for latencies in self.latencies.values() for latency in latencies]
+        report = {}
+        for route, latencies in routes.items():
+            latencies_ms = np.array(latencies) * 1000
+            report[route] = {
+                "requests": len(latencies),
+                "requests_per_sec": len(latencies) / seconds,
+                "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else 0.0,
+                "p90_ms": float(np.percentile(latencies_ms, 90)) if len(latencies) else 0.0,
+                "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else 0.0,
+                "max_ms": float(latencies_ms.max()) if len(latencies) else 0.0,
+            }
+        return report
+
+
+async def simulate_client(host: str, port: int, stop_time: float, player_type: Optional[str], abandon_rate: float,
+                          stats: LoadStats) -> None:
+    client = Client(host, port)
+    try:
+        await client.connect()
+        body = {"player_type": player_type} if player_type else {}
+        while time.perf_counter() < stop_time:
+            start = time.perf_counter()
+            status, game = await client.request("POST", "/api/games", body)
+            stats.add("start", time.perf_counter() - start)
+            if status != 200:
+                stats.num_errors += 1
+                continue
+            path = "/api/games/{}".format(game["game_id"])
+            while not game["finished"]:
+                start = time.perf_counter()
+                status, game = await client.request("POST", path + "/step")
+                stats.add("step", time.perf_counter() - start)
+                if status != 200:
+                    stats.num_errors += 1
+                    break
+            stats.num_games += 1
+            if random.random() < abandon_rate:
+                continue
+            start = time.perf_counter()
+            status, _ = await client.request("DELETE", path)
+            stats.add("end", time.perf_counter() - start)
+            stats.num_errors += status != 200
+    except (ConnectionError, asyncio.IncompleteReadError, OSError):
+        stats.num_errors += 1
+    finally:
+        await client.close()
+
+
+async def generate_load(host: str, port: int, num_clients: int, duration: float, ramp_up: float,
+                        player_type: Optional[str], abandon_rate: float = 0.0) -> Tuple[LoadStats, float]:
+    stats = LoadStats()
+    start_time = time.perf_counter()
+    stop_time = start_time + ramp_up + duration
+    tasks = []
+    for _ in range(num_clients):
+        tasks.append(asyncio.ensure_future(simulate_client(host, port, stop_time, player_type, abandon_rate, stats)))
+        if ramp_up:
+            await asyncio.sleep(ramp_up / num_clients)
+    await asyncio.gather(*tasks)
+    return stats, time.perf_counter() - start_time
+
+
+async def server_stats(host: str, port: int) -> Dict[str, int]:
+    client = Client(host, port)
+    await client.connect()
+    try:
+        _, stats = await client.request("GET", "/api/stats")
+        return stats
+    finally:
+        await client.close()
+
+
+async def wait_for_server(host: str, port: int, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def raise_open_files_limit() -> None:
+    """Every client holds a connection, so allow as many open files as the hard limit permits."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main(args: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Drive the game API with concurrent simulated clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4800)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load after the ramp up")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which the clients are started")
+    parser.add_argument("--player-type", default="random")
+    parser.add_argument("--abandon-rate", type=float, default=0.0, help="share of the games that are not ended")
+    parser.add_argument("--spawn-server", action="store_true", help="start run/run_api.py for the duration of the run")
+    parser.add_argument("--output", default=None, help="path of a JSON file to write the report to")
+    parsed = parser.parse_args(args)
+
+    raise_open_files_limit()
+    server = None
+    if parsed.spawn_server:
+        env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+        server = subprocess.Popen([sys.executable, os.path.join(PROJECT_ROOT, "run", "run_api.py"),
+                                   "--host", parsed.host, "--port", str(parsed.port)], env=env)
+    try:
+        asyncio.run(wait_for_server(parsed.host, parsed.port))
+        stats, seconds = asyncio.run(generate_load(parsed.host, parsed.port, parsed.clients, parsed.duration,
+                                                   parsed.ramp_up, parsed.player_type, parsed.abandon_rate))
+        sessions = asyncio.run(server_stats(parsed.host, parsed.port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    report = stats.report(seconds)
+    print("{} clients, {:.1f} s, {} games, {} errors".format(parsed.clients, seconds, stats.num_games,
+                                                              stats.num_errors))
+    print("{:<6} {:>10} {:>10} {:>9} {:>9} {:>9} {:>9}".format("route", "requests", "req/s", "p50 ms", "p90 ms",
+                                                               "p99 ms", "max ms"))
+    for route, values in report.items():
+        print("{:<6} {requests:>10} {requests_per_sec:>10.0f} {p50_ms:>9.2f} {p90_ms:>9.2f} {p99_ms:>9.2f} "
+              "{max_ms:>9.2f}".format(route, **values))
+    print("server: " + ", ".join("{} {}".format(name, value) for name, value in sorted(sessions.items())))
+    if parsed.output is not None:
+        with open(parsed.output, 'w') as f:
+            json.dump({"clients": parsed.clients, "seconds": seconds, "games": stats.num_games,
+                       "errors": stats.num_errors, "routes": report,
+                       "server": sessions}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
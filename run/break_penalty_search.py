@@ -1,9 +1,8 @@
-from collections import defaultdict
+import argparse
+import os
 
-from numpy import mean
-
-from ai import ai_trainer
-from run.game_runner import GameRunner
+from config import Config
+from run.penalty_sweep import PenaltySweep
 
 
 def get_winner(g):
@@ -14,33 +13,17 @@ def get_winner(g):
     return player_1, player_0.score - player_1.score
 
 
-def train_ai(penalty):
-    ai_trainer.main(penalty)
-
-
 if __name__ == '__main__':
-    game_runner = GameRunner()
-    data = []
-    for penalty in range(0, -30, -3):
-        train_ai(penalty)
-        num_broken = 0
-        num_games = 100
-        scores = []
-        game_id, game = game_runner.start_game()
-        for i in range(num_games):
-            print("Playing game {}".format(i + 1))
-            while not game.is_finished():
-                game.play_single_step()
-            if game.player.broken:
-                num_broken += 1
-            else:
-                scores.append(game.player.score)
-            game.reset_game(keep_players=True)
-        break_percent = int((num_broken*100)/num_games)
-        mean_score = mean(scores)
-        print(f"Penalty: {penalty}")
-        print(f"Break Percent: {break_percent}%")
-        print(f"Average score: {mean_score}")
-        data.append((penalty, break_percent, mean_score))
-    for p, b, m in data:
-        print(f"{p} {b} {m}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and evaluate a model for a range of break penalties.")
+    parser.add_argument("--results", default=os.path.join(Config().project_root, "logs", "penalty_sweep.csv"),
+                        help="CSV table with one row per finished run, finished runs are skipped")
+    parser.add_argument("--workers", type=int, default=None, help="number of trainings to run concurrently")
+    parser.add_argument("--eval-games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sweep = PenaltySweep(range(0, -30, -3), args.results, num_workers=args.workers, num_eval_games=args.eval_games,
+                         seed=args.seed)
+    data = sweep.run()
+    for row in sorted(data, key=lambda r: float(r["penalty"]), reverse=True):
+        print("{} {} {}".format(row["penalty"], row["break_percent"], row["mean_score"]))
@@ -0,0 +1,204 @@
+import math
+import multiprocessing
+import os
+import random
+from typing import Optional, Tuple, Iterator
+
+import numpy as np
+
+from base.cards.deck_bank import DeckBank
+from base.constants import Constants
+from base.episode_log import EpisodeLogWriter
+from base.game import Game
+
+#: the highest score a game can end with: 20 followed by a king
+MAX_SCORE = 20 + 13
+
+#: z-value of the two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+
+
+class EvaluationStats:
+    """
+    Mergeable statistics of a set of played games.
+
+    All statistics are derived from a histogram of final scores, so the statistics of different workers can be
+    combined by adding their histograms. Like run_many.py, the mean score only counts games that did not break.
+    """
+
+    def __init__(self, histogram: Optional[np.ndarray] = None):
+        self.histogram = histogram if histogram is not None else np.zeros(MAX_SCORE + 1, dtype=np.int64)
+
+    def add(self, score: int) -> None:
+        self.histogram[score] += 1
+
+    def merge(self, other: 'EvaluationStats') -> 'EvaluationStats':
+        self.histogram += other.histogram
+        return self
+
+    @property
+    def num_games(self) -> int:
+        return int(self.histogram.sum())
+
+    @property
+    def num_broken(self) -> int:
+        return int(self.histogram[22:].sum())
+
+    @property
+    def break_rate(self) -> float:
+        return self.num_broken / self.num_games if self.num_games else 0.0
+
+    @property
+    def mean_score(self) -> float:
+        counts = self.histogram[:22]
+        num_scores = counts.sum()
+        return float(np.dot(np.arange(22), counts) / num_scores) if num_scores else 0.0
+
+    def break_rate_interval(self, z: float = Z_95) -> Tuple[float, float]:
+        """Wilson score interval of the break rate."""
+        n = self.num_games
+        if not n:
+            return 0.0, 1.0
+        p = self.break_rate
+        center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+        half_width = z * math.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+        return center - half_width, center + half_width
+
+    def mean_score_interval(self, z: float = Z_95) -> Tuple[float, float]:
+        """Normal approximation of the confidence interval of the mean score."""
+        counts = self.histogram[:22]
+        n = counts.sum()
+        if n < 2:
+            return 0.0, 21.0
+        scores = np.arange(22)
+        mean = np.dot(scores, counts) / n
+        variance = np.dot((scores - mean) ** 2, counts) / (n - 1)
+        half_width = z * math.sqrt(variance / n)
+        return float(mean - half_width), float(mean + half_width)
+
+    def summary(self) -> str:
+        low_break, high_break = self.break_rate_interval()
+        low_score, high_score = self.mean_score_interval()
+        return ("Games: {}\n"
+                "Break Percent: {:.2f}% (95% CI {:.2f}% - {:.2f}%)\n"
+                "Average score: {:.3f} (95% CI {:.3f} - {:.3f})").format(
+            self.num_games, self.break_rate * 100, low_break * 100, high_break * 100,
+            self.mean_score, low_score, high_score)
+
+
+# Game of the worker process, kept across chunks so players (e.g. AI models) are only created once per worker
+_worker_game = None  # type: Optional[Game]
+
+
+def _init_worker(player_type: str, deck_bank_path: Optional[str] = None,
+                 episode_log_dir: Optional[str] = None) -> None:
+    global _worker_game
+    Constants.PLAYER_TYPE = player_type
+    # Every worker memory maps the same bank file, but writes its own episode log
+    deck_bank = DeckBank.load(deck_bank_path) if deck_bank_path is not None else None
+    episode_log = None
+    if episode_log_dir is not None:
+        path = os.path.join(episode_log_dir, "{}-{}.bjlog".format(player_type, os.getpid()))
+        episode_log = EpisodeLogWriter(path, policy=player_type)
+    _worker_game = Game(deck_bank=deck_bank, episode_log=episode_log)
+    _worker_game.initialize_game()
+
+
+def play_games(game: Game, num_games: int) -> EvaluationStats:
+    """Play num_games games with the players of the given (initialized) game, resetting it before every game."""
+    stats = EvaluationStats()
+    for _ in range(num_games):
+        game.reset_game(keep_players=True)
+        while not game.is_finished():
+            game.play_single_step()
+        stats.add(game.player.score)
+    return stats
+
+
+def _play_chunk(task: Tuple[int, int, int]) -> EvaluationStats:
+    num_games, seed, first_deck_index = task
+    random.seed(seed)
+    np.random.seed(seed)
+    if _worker_game.deck_bank is not None:
+        _worker_game.deck_bank.seek(first_deck_index)
+    stats = play_games(_worker_game, num_games)
+    if _worker_game.episode_log is not None:
+        # Workers are terminated without notice, so every chunk ends up in the log once it has been played
+        _worker_game.episode_log.flush()
+    return stats
+
+
+class Evaluator:
+    """
+    Monte Carlo evaluation of a player type over a pool of worker processes.
+
+    Games are played in chunks, every chunk gets its own seed derived from the evaluator's seed, so results do not
+    depend on how chunks are scheduled over the workers. With a deck bank, every chunk plays its own range of decks of
+    the bank, so the n-th game of an evaluation is always played with the n-th deck of the bank.
+
+    :param deck_bank_path: path of a deck bank file (see :class:`DeckBank`) to take the decks from
+    :param episode_log_dir: if given, every worker writes the games it plays to an episode log in this directory
+    """
+
+    def __init__(self, player_type: str = Constants.PLAYER_TYPE, num_workers: Optional[int] = None,
+                 chunk_size: int = 1000, seed: Optional[int] = None, deck_bank_path: Optional[str] = None,
+                 episode_log_dir: Optional[str] = None):
+        self.player_type = player_type
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.deck_bank_path = deck_bank_path
+        self.episode_log_dir = episode_log_dir
+        self._num_bank_decks = len(DeckBank.load(deck_bank_path)) if deck_bank_path is not None else None
+        self._num_played = 0
+        self._seeds = np.random.SeedSequence(seed)
+
+    def _tasks(self, num_games: int) -> Iterator[Tuple[int, int, int]]:
+        if self._num_bank_decks is not None and self._num_played + num_games > self._num_bank_decks:
+            raise ValueError("The deck bank only has {} decks, {} games were requested after {} games".format(
+                self._num_bank_decks, num_games, self._num_played))
+        first_deck_index = self._num_played
+        self._num_played += num_games
+        num_chunks = -(-num_games // self.chunk_size)
+        for i, child in enumerate(self._seeds.spawn(num_chunks)):
+            size = min(self.chunk_size, num_games - i * self.chunk_size)
+            yield size, int(child.generate_state(1)[0]), first_deck_index + i * self.chunk_size
+
+    def _pool(self):
+        return multiprocessing.Pool(self.num_workers, initializer=_init_worker,
+                                    initargs=(self.player_type, self.deck_bank_path, self.episode_log_dir))
+
+    def evaluate(self, num_games: int) -> EvaluationStats:
+        """Play num_games games and return the merged statistics."""
+        with self._pool() as pool:
+            return self._play(pool, num_games)
+
+    def evaluate_adaptive(self, target_width: float, metric: str = "mean_score", max_games: int = 10 ** 8,
+                          min_games: Optional[int] = None) -> EvaluationStats:
+        """
+        Keep playing games until the 95% confidence interval of the given metric is narrower than target_width.
+
+        :param target_width: the target width of the confidence interval (in score points or as a break rate)
+        :param metric: "mean_score" or "break_rate"
+        :param max_games: stop after this many games, even if the target width has not been reached
+        :param min_games: number of games played before the width is checked for the first time
+        """
+        intervals = {"mean_score": EvaluationStats.mean_score_interval,
+                     "break_rate": EvaluationStats.break_rate_interval}
+        if metric not in intervals:
+            raise ValueError("Unknown metric '{}', expected one of {}".format(metric, list(intervals)))
+        round_size = self.chunk_size * self.num_workers
+        stats = EvaluationStats()
+        with self._pool() as pool:
+            num_games = min(max_games, min_games or round_size)
+            while True:
+                stats.merge(self._play(pool, num_games))
+                low, high = intervals[metric](stats)
+                if high - low < target_width or stats.num_games >= max_games:
+                    return stats
+                num_games = min(round_size, max_games - stats.num_games)
+
+    def _play(self, pool, num_games: int) -> EvaluationStats:
+        stats = EvaluationStats()
+        for chunk_stats in pool.imap_unordered(_play_chunk, self._tasks(num_games)):
+            stats.merge(chunk_stats)
+        return stats
@@ -0,0 +1,8 @@
+from ai.model_configs.mlp_config import MLPConfig
+
+if __name__ == '__main__':
+    # Export the weights of the saved TensorFlow model so it can be served with the numpy inference backend
+    config = MLPConfig()
+    model = config.load_model()
+    model.export_numpy(config.numpy_weights_path)
+    print("Exported {} to {}".format(config.save_path, config.numpy_weights_path))
@@ -1,35 +1,291 @@
+import json
+import os
 import random
 import string
-from typing import Optional, Tuple, List
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple, List
+
+import numpy as np
 
 from base.constants import Constants
 from base.game import Game
+from base.game_record import GAME_RECORD_DTYPE, read_game_record, write_game_record
+from base.players.player_registry import PlayerRegistry
 from base.utils.singleton import Singleton
 
+SESSIONS_MAGIC = b"BJSESS\x00\x00"
+SESSIONS_VERSION = 1
+SESSION_DTYPE = np.dtype([
+    ("game_id", "S{}".format(Constants.GAME_ID_LENGTH)),
+    ("idle_seconds", np.float32),
+    ("game", GAME_RECORD_DTYPE),
+])
+# magic, version, record size, length of the JSON metadata that follows the header
+_SESSIONS_HEADER = struct.Struct("<8sHHI")
+
+
+class _Session:
+    __slots__ = ('game', 'record', 'player_type', 'lock', 'last_access', 'closed')
+
+    def __init__(self, game: Optional[Game], player_type: str, record: Optional[np.void] = None,
+                 last_access: Optional[float] = None):
+        self.game = game
+        # Restored sessions keep their record until the game is first used
+        self.record = record
+        self.player_type = player_type
+        self.lock = threading.Lock()
+        self.last_access = last_access if last_access is not None else time.monotonic()
+        self.closed = False
+
 
 class GameRunner(metaclass=Singleton):
+    """
+    Bounded registry of the games that are being played, safe to use from multiple threads.
+
+    The registry is guarded by a lock that is only held for dictionary operations. Every game also has a lock of its
+    own, which callers hold through :meth:`locked_game` while they play or read the game, so two requests for the same
+    game never interleave while requests for different games run in parallel.
 
-    def __init__(self):
+    Games that were not used for ``idle_ttl`` seconds are evicted, and when ``max_games`` games are running the least
+    recently used game is evicted to make room for a new one. Ended and evicted games go back to a pool per player
+    type, and new games reuse them with :meth:`Game.reset_game` so their players (and e.g. the models of AI players)
+    are kept.
+
+    All sessions can be saved to a single file with :meth:`save_sessions` and restored with :meth:`restore_sessions`.
+    Restored games are only rebuilt from their record when they are first used, so a restore costs a single read.
+
+    :param max_games: number of running games, defaults to ``Constants.MAX_RUNNING_GAMES``
+    :param idle_ttl: seconds after which an unused game is evicted, defaults to ``Constants.GAME_IDLE_TTL``
+    :param pool_size: number of games kept for reuse per player type, defaults to ``Constants.GAME_POOL_SIZE``
+    """
+
+    def __init__(self, max_games: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 pool_size: Optional[int] = None):
         super().__init__()
-        self.running_games = {}
+        self.max_games = max_games if max_games is not None else Constants.MAX_RUNNING_GAMES
+        self.idle_ttl = idle_ttl if idle_ttl is not None else Constants.GAME_IDLE_TTL
+        self.pool_size = pool_size if pool_size is not None else Constants.GAME_POOL_SIZE
+        # Sessions in least recently used order
+        self._sessions = OrderedDict()  # type: OrderedDict[str, _Session]
+        self._pool = {}  # type: Dict[str, List[Game]]
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "ttl_evictions": 0, "lru_evictions": 0, "pool_hits": 0,
+                         "pool_misses": 0}
+
+    @property
+    def running_games(self) -> Dict[str, Game]:
+        with self._lock:
+            sessions = list(self._sessions.items())
+        games = {}
+        for game_id, session in sessions:
+            with session.lock:
+                if not session.closed:
+                    games[game_id] = self._session_game(session)
+        return games
 
     def get_running_games(self) -> List[str]:
-        return list(self.running_games.keys())
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def start_game(self, player_type: Optional[str] = None) -> Tuple[str, Game]:
+        """
+        Start a new game and register it under a new id.
 
-    def start_game(self) -> Tuple[str, Game]:
-        game_id = self.generate_new_game_id()
-        game = Game()
-        game.initialize_game()
-        self.running_games[game_id] = game
+        :param player_type: type of the player in the :class:`PlayerRegistry`, defaults to ``Constants.PLAYER_TYPE``
+        """
+        player_type = player_type or Constants.PLAYER_TYPE
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            while len(self._sessions) >= self.max_games:
+                _, session = self._sessions.popitem(last=False)
+                self._close(session)
+                self.counters["lru_evictions"] += 1
+            pooled = self._pool.get(player_type)
+            game = pooled.pop() if pooled else None
+            self.counters["pool_hits" if game is not None else "pool_misses"] += 1
+        if game is not None:
+            game.reset_game(keep_players=True)
+        else:
+            game = Game()
+            game.player = PlayerRegistry().create(player_type)
+            game.initialize_game(initialize_players=False)
+        session = _Session(game, player_type)
+        with self._lock:
+            game_id = self.generate_new_game_id()
+            while game_id in self._sessions:
+                game_id = self.generate_new_game_id()
+            self._sessions[game_id] = session
         return game_id, game
 
-    def end_game(self, game_id: str) -> None:
-        if game_id in self.running_games:
-            del self.running_games[game_id]
+    def end_game(self, game_id: str) -> bool:
+        """End a game, return False if there was no game with the given id."""
+        with self._lock:
+            session = self._sessions.pop(game_id, None)
+            if session is not None:
+                self._close(session)
+        return session is not None
 
     def get_game(self, game_id: str) -> Optional[Game]:
-        return self.running_games.get(game_id)
+        session = self._touch(game_id)
+        if session is None:
+            return None
+        with session.lock:
+            return self._session_game(session) if not session.closed else None
+
+    @contextmanager
+    def locked_game(self, game_id: str) -> Iterator[Optional[Game]]:
+        """Hold the lock of a game while the block runs, the block gets None if there is no game with the given id."""
+        session = self._touch(game_id)
+        if session is None:
+            yield None
+            return
+        with session.lock:
+            # The game may have been ended or evicted while waiting for the lock
+            yield self._session_game(session) if not session.closed else None
+
+    def evict_expired(self) -> int:
+        """Evict the games that were not used for idle_ttl seconds, return the number of evicted games."""
+        with self._lock:
+            return self._evict_expired(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["live_sessions"] = len(self._sessions)
+            stats["pooled_games"] = sum(len(games) for games in self._pool.values())
+        return stats
+
+    def save_sessions(self, path: str) -> int:
+        """
+        Save all sessions to a file with a single write, return the number of saved sessions.
+
+        The file is written next to the given path and then moved over it, so a crash never leaves a partial file.
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+        player_types = sorted({session.player_type for _, session in sessions})
+        type_indexes = {player_type: i for i, player_type in enumerate(player_types)}
+        records = np.zeros(len(sessions), dtype=SESSION_DTYPE)
+        saved = np.zeros(len(sessions), dtype=bool)
+        now = time.monotonic()
+        for i, (game_id, session) in enumerate(sessions):
+            record = records[i]
+            with session.lock:
+                if session.closed:
+                    continue
+                if session.game is None:
+                    record["game"] = session.record
+                    record["game"]["player_type"] = type_indexes[session.player_type]
+                else:
+                    write_game_record(session.game, record["game"], type_indexes[session.player_type])
+                record["idle_seconds"] = now - session.last_access
+            record["game_id"] = game_id.encode("ascii")
+            saved[i] = True
+        records = records[saved]
+        metadata = json.dumps({"player_types": player_types, "saved_at": time.time()}).encode("utf-8")
+        header = _SESSIONS_HEADER.pack(SESSIONS_MAGIC, SESSIONS_VERSION, SESSION_DTYPE.itemsize, len(metadata))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b"".join([header, metadata, records.tobytes()]))
+        os.replace(tmp_path, path)
+        return len(records)
+
+    def restore_sessions(self, path: str) -> int:
+        """
+        Restore the sessions saved by :meth:`save_sessions`, return the number of restored sessions.
+
+        Sessions keep the idle time they had when they were saved. Expired sessions, sessions whose id is already
+        running and the least recently used sessions beyond ``max_games`` are not restored.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, record_size, metadata_size = _SESSIONS_HEADER.unpack_from(data)
+        if magic != SESSIONS_MAGIC:
+            raise ValueError("{} is not a sessions file".format(path))
+        if version != SESSIONS_VERSION or record_size != SESSION_DTYPE.itemsize:
+            raise ValueError("Unsupported sessions file version {} with records of {} bytes".format(
+                version, record_size))
+        offset = _SESSIONS_HEADER.size + metadata_size
+        player_types = json.loads(data[_SESSIONS_HEADER.size:offset].decode("utf-8"))["player_types"]
+        records = np.frombuffer(data, dtype=SESSION_DTYPE, offset=offset)
+        game_ids = records["game_id"].tolist()
+        idle_seconds = records["idle_seconds"].tolist()
+        types = records["game"]["player_type"].tolist()
+        game_records = records["game"]
+        now = time.monotonic()
+        num_restored = 0
+        with self._lock:
+            # Sessions are saved in least recently used order, only the most recently used ones fit
+            for i in range(max(0, len(records) - self.max_games), len(records)):
+                game_id = game_ids[i].decode("ascii")
+                if idle_seconds[i] >= self.idle_ttl or game_id in self._sessions:
+                    continue
+                self._sessions[game_id] = _Session(None, player_types[types[i]], record=game_records[i],
+                                                   last_access=now - idle_seconds[i])
+                num_restored += 1
+            while len(self._sessions) > self.max_games:
+                _, session = self._sessions.popitem(last=False)
+                self._close(session)
+                self.counters["lru_evictions"] += 1
+        return num_restored
 
     @staticmethod
     def generate_new_game_id() -> str:
         return ''.join(random.choice(string.ascii_lowercase) for _ in range(Constants.GAME_ID_LENGTH))
+
+    def _touch(self, game_id: str) -> Optional[_Session]:
+        with self._lock:
+            session = self._sessions.get(game_id)
+            if session is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(game_id)
+            return session
+
+    def _evict_expired(self, now: float) -> int:
+        """Evict from the least recently used end until a game that is not expired, must hold self._lock."""
+        num_evicted = 0
+        while self._sessions:
+            game_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.idle_ttl:
+                break
+            del self._sessions[game_id]
+            self._close(session)
+            num_evicted += 1
+        self.counters["ttl_evictions"] += num_evicted
+        return num_evicted
+
+    def _session_game(self, session: _Session) -> Game:
+        """Return the game of a session, rebuilding a restored game from its record, must hold session.lock."""
+        if session.game is None:
+            with self._lock:
+                pooled = self._pool.get(session.player_type)
+                player = pooled.pop().player if pooled else None
+            if player is not None:
+                player.reset()
+            else:
+                player = PlayerRegistry().create(session.player_type)
+            session.game = read_game_record(session.record, player)
+            session.record = None
+        return session.game
+
+    def _close(self, session: _Session) -> None:
+        """Mark a removed session as closed and pool its game, must hold self._lock."""
+        # A game that is being played right now is not pooled, its thread still uses it
+        if not session.lock.acquire(blocking=False):
+            session.closed = True
+            return
+        try:
+            session.closed = True
+            pooled = self._pool.setdefault(session.player_type, [])
+            if session.game is not None and len(pooled) < self.pool_size:
+                pooled.append(session.game)
+        finally:
+            session.lock.release()
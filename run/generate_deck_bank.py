@@ -0,0 +1,16 @@
+import argparse
+import os
+
+from base.cards.deck_bank import DeckBank
+from config import Config
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Shuffle a bank of decks and store it as a memory mappable file.")
+    parser.add_argument("--decks", type=int, default=10 ** 6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="defaults to <project_root>/data/deck_bank_<seed>.npy")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(Config().project_root, "data", "deck_bank_{}.npy".format(args.seed))
+    bank = DeckBank.generate(args.decks, seed=args.seed, path=output)
+    print("Stored {} decks in {}".format(len(bank), output))
@@ -0,0 +1,29 @@
+import argparse
+
+from ai.model_configs.mlp_config import MLPConfig
+from ai.transition_dataset import TransitionDatasetGenerator
+from base.game_state import CARD_ENCODING, STATE_ENCODINGS
+from base.players.player_registry import PlayerRegistry
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Let a player play games and store the transitions as a dataset.")
+    parser.add_argument("output", help="directory of the dataset")
+    parser.add_argument("--player-type", default="random", choices=PlayerRegistry().get_player_types())
+    parser.add_argument("--run-name", default=None, help="for AI players: the training run of the checkpoint")
+    parser.add_argument("--transitions", type=int, default=10 ** 6)
+    parser.add_argument("--shard-size", type=int, default=100000)
+    parser.add_argument("--penalty", type=float, default=-10)
+    parser.add_argument("--epsilon", type=float, default=0.0, help="probability of a random action")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--state-encoding", default=CARD_ENCODING, choices=STATE_ENCODINGS)
+    args = parser.parse_args()
+
+    if args.player_type == "ai":
+        from base.players.ai_player import AIPlayer
+        player = AIPlayer(MLPConfig(run_name=args.run_name))
+    else:
+        player = PlayerRegistry().create(args.player_type)
+    generator = TransitionDatasetGenerator(player, args.penalty, epsilon=args.epsilon, seed=args.seed,
+                                           state_encoding=args.state_encoding)
+    dataset = generator.generate(args.output, args.transitions, shard_size=args.shard_size, policy=args.player_type)
+    print("Stored {} transitions in {} shards in {}".format(len(dataset), dataset.num_shards, args.output))
@@ -0,0 +1,119 @@
+import csv
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RESULT_FIELDS = ["penalty", "run_name", "break_percent", "mean_score", "num_games", "save_path", "train_seconds"]
+
+
+def run_name(penalty) -> str:
+    return "penalty_{}".format(penalty)
+
+
+def _train_and_evaluate(penalty, num_eval_games: int, seed: int, tf_threads: int) -> Dict[str, object]:
+    """Train a model for the given penalty in its own save path and evaluate that model."""
+    import tensorflow as tf
+    from ai import ai_trainer
+    from ai.model_configs.mlp_config import MLPConfig
+    from base.game import Game
+    from base.players.ai_player import AIPlayer
+    from run.evaluator import play_games
+
+    # Every run gets a share of the cores instead of all of them
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+    random.seed(seed)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+    config = MLPConfig(run_name=run_name(penalty))
+    start = time.perf_counter()
+    ai_trainer.main(penalty, config)
+    train_seconds = time.perf_counter() - start
+
+    # Evaluate the model that was just trained, through the numpy backend it was exported for
+    config.inference_backend = "numpy"
+    game = Game()
+    game.player = AIPlayer(config)
+    game.initialize_game(initialize_players=False)
+    stats = play_games(game, num_eval_games)
+    return {
+        "penalty": penalty,
+        "run_name": config.run_name,
+        "break_percent": stats.break_rate * 100,
+        "mean_score": stats.mean_score,
+        "num_games": stats.num_games,
+        "save_path": config.save_path,
+        "train_seconds": round(train_seconds, 1),
+    }
+
+
+class PenaltySweep:
+    """
+    Train and evaluate a model for every penalty, running the trainings concurrently.
+
+    Every run has its own save path and log dir (see :attr:`MLPConfig.run_name`). Results are appended to a single CSV
+    table as soon as a run finishes, runs whose penalty is already in the table are skipped, so an interrupted sweep
+    resumes where it stopped.
+    """
+
+    def __init__(self, penalties: List, results_path: str, num_workers: Optional[int] = None,
+                 num_eval_games: int = 10000, seed: int = 0):
+        self.penalties = list(penalties)
+        self.results_path = results_path
+        self.num_workers = num_workers or min(len(self.penalties), multiprocessing.cpu_count())
+        self.num_eval_games = num_eval_games
+        self.seed = seed
+
+    def load_results(self) -> List[Dict[str, str]]:
+        if not os.path.exists(self.results_path):
+            return []
+        with open(self.results_path, newline='') as f:
+            return list(csv.DictReader(f))
+
+    def pending_penalties(self) -> List:
+        finished = {row["run_name"] for row in self.load_results()}
+        return [p for p in self.penalties if run_name(p) not in finished]
+
+    def run(self) -> List[Dict[str, str]]:
+        pending = self.pending_penalties()
+        skipped = len(self.penalties) - len(pending)
+        if skipped:
+            print("Skipping {} finished runs".format(skipped))
+        tf_threads = max(1, multiprocessing.cpu_count() // max(1, self.num_workers))
+        # TensorFlow does not survive a fork, so workers are spawned, and every worker only runs a single training so
+        # runs never share TensorFlow state or the process singletons (ModelRegistry, Instrumentation)
+        context = multiprocessing.get_context("spawn")
+        failed = []
+        with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=context, max_tasks_per_child=1) as executor:
+            futures = {executor.submit(_train_and_evaluate, penalty, self.num_eval_games,
+                                       self.seed + self.penalties.index(penalty), tf_threads): penalty
+                       for penalty in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The other runs go on, the failed run is not in the table so the next sweep retries it
+                    failed.append(futures[future])
+                    print("Penalty: {} - Failed: {!r}".format(futures[future], e))
+                    continue
+                self._append_result(result)
+                print("Penalty: {penalty} - Break Percent: {break_percent:.1f}% - Average score: {mean_score:.2f}"
+                      .format(**result))
+        if failed:
+            print("{} of {} runs failed, penalties: {}".format(len(failed), len(pending), failed))
+        return self.load_results()
+
+    def _append_result(self, result: Dict[str, object]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.results_path)), exist_ok=True)
+        write_header = not os.path.exists(self.results_path)
+        with open(self.results_path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            if write_header:
+                writer.writeheader()
+            writer.writerow(result)
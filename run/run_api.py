@@ -1,28 +1,77 @@
-# from flask import Flask
-# from flask_cors import CORS
-# from flask_restful import Api
-#
-# from api.game_resource import GameResource
-# from api.games_resource import GamesResource
-# from api.state_resource import StateResource
-#
-#
-# class HigherLowerAPI:
-#
-#     def __init__(self):
-#         self.app = Flask(__name__)
-#         self.api = Api(self.app)
-#         CORS(self.app, resources={r"/api/*": {"origins": "*"}})
-#         self._add_resources()
-#
-#     def _add_resources(self):
-#         self.api.add_resource(StateResource, '/api/state')
-#         self.api.add_resource(GameResource, '/api/game')
-#         self.api.add_resource(GamesResource, '/api/games')
-#
-#     def run(self):
-#         self.app.run(host="0.0.0.0", port=4800, threaded=False)
-#
-#
-# if __name__ == '__main__':
-#     HigherLowerAPI().run()
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from typing import Optional
+
+from ai.model_registry import ModelRegistry
+from api.game_api import GameAPI
+from api.http_server import HTTPServer
+from base.constants import Constants
+
+
+LOGGER = logging.getLogger("api")
+
+
+async def serve(host: str, port: int, max_workers: int, eviction_interval: float,
+                sessions_path: Optional[str] = None, snapshot_interval: float = 60.0) -> None:
+    """
+    :param sessions_path: if given, the sessions are restored from this file at startup, and saved to it every
+                          snapshot_interval seconds and on shutdown
+    """
+    game_api = GameAPI(max_workers=max_workers)
+    if sessions_path is not None and os.path.exists(sessions_path):
+        LOGGER.info("Restored %d sessions from %s", game_api.game_runner.restore_sessions(sessions_path),
+                    sessions_path)
+    server = HTTPServer(game_api.router(), host=host, port=port)
+    tasks = [asyncio.ensure_future(game_api.evict_expired_games(eviction_interval))]
+    if sessions_path is not None:
+        tasks.append(asyncio.ensure_future(game_api.save_sessions_periodically(sessions_path, snapshot_interval)))
+    try:
+        await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await server.close()
+        game_api.close()
+        if sessions_path is not None:
+            LOGGER.info("Saved %d sessions to %s", game_api.game_runner.save_sessions(sessions_path), sessions_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the game API, see api/game_api.py for the routes.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4800)
+    parser.add_argument("--workers", type=int, default=8, help="threads that play the games")
+    parser.add_argument("--player-type", default=None, help="default player type of new games")
+    parser.add_argument("--max-games", type=int, default=None, help="running games before the least recently used "
+                                                                    "one is evicted")
+    parser.add_argument("--idle-ttl", type=float, default=None, help="seconds after which an unused game is evicted")
+    parser.add_argument("--eviction-interval", type=float, default=10.0,
+                        help="seconds between two sweeps for expired games")
+    parser.add_argument("--model-reload-interval", type=float, default=10.0,
+                        help="seconds between two checks for new checkpoints of the loaded models")
+    parser.add_argument("--sessions-file", default=None,
+                        help="file the running games are restored from at startup and saved to while serving")
+    parser.add_argument("--snapshot-interval", type=float, default=60.0,
+                        help="seconds between two saves of the running games to the sessions file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # The game modules log every dealt card at INFO
+    logging.getLogger("api").setLevel(logging.INFO)
+    logging.getLogger("ai.model_registry").setLevel(logging.INFO)
+    if args.player_type is not None:
+        Constants.PLAYER_TYPE = args.player_type
+    if args.max_games is not None:
+        Constants.MAX_RUNNING_GAMES = args.max_games
+    if args.idle_ttl is not None:
+        Constants.GAME_IDLE_TTL = args.idle_ttl
+    ModelRegistry().start_watching(args.model_reload_interval)
+    # Shut down (and save the sessions) on SIGTERM the same way as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.eviction_interval, args.sessions_file,
+                          args.snapshot_interval))
+    except KeyboardInterrupt:
+        pass
@@ -1,8 +1,8 @@
+import argparse
 from collections import defaultdict
 
-from numpy import mean
-
-from run.game_runner import GameRunner
+from base.constants import Constants
+from run.evaluator import Evaluator
 
 
 def get_winner(g):
@@ -14,20 +14,22 @@ def get_winner(g):
 
 
 if __name__ == '__main__':
-    game_runner = GameRunner()
+    parser = argparse.ArgumentParser(description="Evaluate a player type over many games.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--player-type", default=Constants.PLAYER_TYPE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--target-width", type=float, default=None,
+                        help="keep playing until the 95%% CI of the mean score is narrower than this")
+    parser.add_argument("--deck-bank", default=None, help="play with the decks of this deck bank file")
+    parser.add_argument("--episode-log-dir", default=None, help="write every played game to an episode log here")
+    args = parser.parse_args()
 
-    num_broken = 0
-    num_games = 100
-    scores = []
-    game_id, game = game_runner.start_game()
-    for i in range(num_games):
-        print("Playing game {}".format(i + 1))
-        while not game.is_finished():
-            game.play_single_step()
-        if game.player.broken:
-            num_broken += 1
-        else:
-            scores.append(game.player.score)
-        game.reset_game(keep_players=True)
-    print(f"Break Percent: {int((num_broken*100)/num_games)}%")
-    print(f"Average score: {mean(scores)}")
+    evaluator = Evaluator(args.player_type, num_workers=args.workers, chunk_size=args.chunk_size, seed=args.seed,
+                          deck_bank_path=args.deck_bank, episode_log_dir=args.episode_log_dir)
+    if args.target_width is None:
+        stats = evaluator.evaluate(args.games)
+    else:
+        stats = evaluator.evaluate_adaptive(args.target_width, min_games=args.games)
+    print(stats.summary())
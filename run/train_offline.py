@@ -0,0 +1,21 @@
+import argparse
+
+from ai import ai_trainer
+from ai.model_configs.mlp_config import MLPConfig
+from ai.transition_dataset import TransitionDataset
+from base.game_state import CARD_ENCODING
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train a DQN on an offline transition dataset.")
+    parser.add_argument("dataset", help="directory of a dataset written by generate_transitions.py")
+    parser.add_argument("--penalty", type=float, default=None,
+                        help="the reward for breaking, defaults to the penalty of the dataset")
+    parser.add_argument("--steps", type=int, default=None, help="gradient steps, defaults to one pass")
+    parser.add_argument("--run-name", default=None)
+    args = parser.parse_args()
+
+    dataset = TransitionDataset(args.dataset)
+    cfg = MLPConfig(run_name=args.run_name)
+    # Datasets written before the rank encoding existed have no state_encoding
+    cfg.state_encoding = dataset.description.get("state_encoding", CARD_ENCODING)
+    ai_trainer.train_offline(dataset, penalty=args.penalty, cfg=cfg, num_steps=args.steps)